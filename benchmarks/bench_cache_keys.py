@@ -0,0 +1,92 @@
+"""
+Mesure le gain de taux de succès du cache apporté par les clés canoniques, en rejouant
+un journal de requêtes (JSON lines : {"prefix": ..., "params": {...}}) ou, à défaut,
+un journal synthétique reproduisant les variantes observées (casse, espaces, ordre des
+filtres, valeurs par défaut explicites ou omises).
+
+    python -m benchmarks.bench_cache_keys
+    python -m benchmarks.bench_cache_keys --log requetes.jsonl
+"""
+import argparse
+import json
+import random
+import unicodedata
+
+from src.cache.keys import make_key
+
+SEARCHES = [
+    "bail commercial", "responsabilité civile", "contrat de travail", "licenciement économique",
+    "propriété", "vice caché", "clause pénale", "rupture conventionnelle", "garde à vue",
+    "succession", "divorce", "prescription acquisitive", "servitude", "harcèlement moral",
+]
+CODES = ["Code civil", "Code du travail", "Code de commerce", "Code pénal"]
+BULLETINS = ["T", "F"]
+JURIDICTIONS = ["Cour de cassation", "Cour d'appel"]
+
+
+def legacy_key(prefix: str, params: dict) -> str:
+    """Clé utilisée avant la normalisation"""
+    return f"{prefix}:{json.dumps(sorted(params.items()))}"
+
+
+def _vary_text(rng: random.Random, text: str) -> str:
+    variant = rng.choice([text, text.capitalize(), text.upper(), f" {text} ", text.replace(" ", "  ")])
+    if rng.random() < 0.1:
+        variant = unicodedata.normalize("NFD", variant)
+    return variant
+
+
+def synthetic_log(size: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(SEARCHES))]
+    log = []
+    for _ in range(size):
+        search = _vary_text(rng, rng.choices(SEARCHES, weights)[0])
+        if rng.random() < 0.5:
+            params = {"search": search, "code_name": rng.choice(CODES)}
+            prefix = "code"
+            defaults = {"champ": "ALL", "sort": "PERTINENCE", "page_size": 10, "fetch_all": False}
+        else:
+            bulletins = rng.sample(BULLETINS, rng.randint(1, 2))
+            params = {"search": search, "publication_bulletin": bulletins, "juridiction_judiciaire": JURIDICTIONS[:1]}
+            prefix = "jurisprudence"
+            defaults = {"champ": "ALL", "sort": "DATE_DESC", "page_size": 10, "fetch_all": False}
+        # Certains clients envoient les valeurs par défaut, d'autres non (pydantic les ajoute)
+        if rng.random() < 0.7:
+            params.update(defaults)
+        log.append({"prefix": prefix, "params": params})
+    return log
+
+
+def hit_rate(log: list, key_function) -> tuple:
+    seen = set()
+    hits = 0
+    key_bytes = 0
+    for entry in log:
+        key = key_function(entry["prefix"], entry["params"])
+        key_bytes += len(key.encode("utf-8"))
+        if key in seen:
+            hits += 1
+        seen.add(key)
+    return hits / len(log), len(seen), key_bytes / len(log)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--log", help="Journal de requêtes JSON lines")
+    parser.add_argument("--size", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, encoding="utf-8") as handle:
+            log = [json.loads(line) for line in handle if line.strip()]
+    else:
+        log = synthetic_log(args.size)
+
+    for name, key_function in [("clés brutes", legacy_key), ("clés canoniques", make_key)]:
+        rate, distinct, key_size = hit_rate(log, key_function)
+        print(f"{name:<16} taux de succès {rate:6.1%}   clés distinctes {distinct:6d}   taille moyenne {key_size:5.0f} o")
+
+
+if __name__ == "__main__":
+    main()
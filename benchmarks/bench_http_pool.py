@@ -0,0 +1,84 @@
+"""
+Compare un `httpx.AsyncClient` créé à chaque appel (ancien comportement)
+et le client partagé de `LegifranceClient` contre le serveur factice.
+
+    python -m benchmarks.bench_http_pool --requests 500 --concurrency 20
+    python -m benchmarks.bench_http_pool --ssl-certfile cert.pem --ssl-keyfile key.pem
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from src.utils.http_pool import create_http_client
+from .stub_upstream import StubServer
+
+PAYLOAD = {
+    "recherche": {"champs": [], "filtres": [], "pageNumber": 1, "pageSize": 10},
+    "fond": "CODE_DATE",
+}
+
+
+async def _run(call, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def bench(url: str, total: int, concurrency: int, verify: bool) -> None:
+    async def per_call():
+        async with httpx.AsyncClient(verify=verify) as client:
+            (await client.post(f"{url}/code", json=PAYLOAD)).raise_for_status()
+
+    shared = create_http_client(verify=verify)
+
+    async def pooled():
+        (await shared.post(f"{url}/code", json=PAYLOAD)).raise_for_status()
+
+    results = {
+        "client par appel": await _run(per_call, total, concurrency),
+        "client partagé": await _run(pooled, total, concurrency),
+    }
+    await shared.aclose()
+
+    for name, stats in results.items():
+        print(
+            f"{name:<18} {stats['throughput']:8.1f} req/s   "
+            f"p50 {stats['p50_ms']:7.2f} ms   p95 {stats['p95_ms']:7.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ssl-certfile")
+    parser.add_argument("--ssl-keyfile")
+    args = parser.parse_args()
+
+    with StubServer(port=args.port, ssl_certfile=args.ssl_certfile, ssl_keyfile=args.ssl_keyfile) as server:
+        server.stub.latency = args.latency
+        asyncio.run(bench(server.url, args.requests, args.concurrency, verify=not args.ssl_certfile))
+
+
+if __name__ == "__main__":
+    main()
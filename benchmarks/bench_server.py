@@ -0,0 +1,364 @@
+"""
+Banc de charge de l'application (`src/server/main.py`) contre le serveur Légifrance factice :
+débit, latences p50/p95/p99, appels amont par endpoint, mémoire et durée de démarrage du serveur.
+
+    python -m benchmarks.bench_server --requests 2000 --concurrency 50
+    python -m benchmarks.bench_server --latency 0.05 --distribution lognormal --error-rate 0.02
+    python -m benchmarks.bench_server --workers 4 --label redis --fail-on-regression
+
+L'application tourne dans un processus uvicorn séparé, configuré par l'environnement
+courant (LEGIFRANCE_*), le serveur factice dans un thread et le générateur de charge en
+boucle fermée (`--concurrency` requêtes en cours en permanence). Les recherches suivent une
+loi de Zipf sur `--distinct` recherches distinctes, comme un trafic réel où quelques
+recherches dominent.
+
+Chaque mesure est ajoutée à `--results` (JSON lines). La dernière mesure de même
+configuration (et de même `--baseline` s'il est donné) sert de référence : un écart
+défavorable de plus de `--tolerance` sur le débit, les latences, les appels amont ou la
+mémoire est signalé comme régression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .stub_upstream import LATENCY_DISTRIBUTIONS, StubServer, StubUpstream
+
+DEFAULT_RESULTS = os.path.join(os.path.dirname(__file__), "results", "bench_server.jsonl")
+SEARCHES = [
+    "bail commercial", "responsabilité civile", "contrat de travail", "licenciement économique",
+    "propriété", "vice caché", "clause pénale", "rupture conventionnelle", "garde à vue",
+    "succession", "divorce", "prescription acquisitive", "servitude", "harcèlement moral",
+]
+# Route de l'application et corps de la requête pour la i-ème recherche distincte
+ROUTES = [
+    ("/tools/rechercher_code", lambda search: {"search": search, "code_name": "Code civil"}),
+    ("/tools/rechercher_texte_legal", lambda search: {"search": search}),
+    ("/tools/rechercher_jurisprudence_judiciaire", lambda search: {"search": search}),
+]
+# Indicateurs comparés à la référence : nom -> True si une valeur plus élevée est meilleure
+COMPARED = {
+    "throughput": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "upstream_calls": False,
+    "peak_rss_mb": False,
+    "startup_s": False,
+}
+
+
+def workload(total: int, distinct: int, skew: float, seed: int) -> List[Tuple[str, dict]]:
+    """Séquence de requêtes (route, corps) tirée selon une loi de Zipf de paramètre `skew`"""
+    rng = random.Random(seed)
+    queries = []
+    for index in range(distinct):
+        path, body = ROUTES[index % len(ROUTES)]
+        search = SEARCHES[index % len(SEARCHES)]
+        queries.append((path, body(f"{search} {index // len(SEARCHES)}" if index >= len(SEARCHES) else search)))
+    weights = [1 / (rank + 1) ** skew for rank in range(distinct)]
+    return rng.choices(queries, weights, k=total)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile par rang le plus proche d'une liste triée"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q * len(values))) - 1))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as source:
+            for child in source.read().split():
+                pids.extend(_process_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def memory_mb(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Mémoire résidente du serveur et de ses workers (lue dans /proc, Linux uniquement)
+    :return: {"rss_mb": actuelle, "peak_rss_mb": maximale} ou None
+    """
+    totals = {"VmRSS": 0, "VmHWM": 0}
+    found = False
+    for process in _process_tree(pid):
+        try:
+            with open(f"/proc/{process}/status") as source:
+                for line in source:
+                    name, _, value = line.partition(":")
+                    if name in totals:
+                        totals[name] += int(value.split()[0])
+                        found = True
+        except OSError:
+            continue
+    if not found:
+        return None
+    return {"rss_mb": round(totals["VmRSS"] / 1024, 1), "peak_rss_mb": round(totals["VmHWM"] / 1024, 1)}
+
+
+def start_app(stub_url: str, port: int, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LEGIFRANCE_CLIENT_ID": os.environ.get("LEGIFRANCE_CLIENT_ID", "bench"),
+        "LEGIFRANCE_CLIENT_SECRET": os.environ.get("LEGIFRANCE_CLIENT_SECRET", "bench"),
+        "LEGIFRANCE_API_ENDPOINT": stub_url,
+        "LEGIFRANCE_TOKEN_URL": f"{stub_url}/api/oauth/token",
+        "LEGIFRANCE_WARMUP": os.environ.get("LEGIFRANCE_WARMUP", "false"),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "src.server.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30.0) -> float:
+    """
+    Attend que la sonde de préparation réponde 200
+    :return: Durée (s) entre le lancement du processus et sa préparation
+    """
+    start = time.monotonic()
+    while time.monotonic() < start + timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté au démarrage (code {process.returncode})")
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return time.monotonic() - start
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.02)
+    raise RuntimeError(f"Serveur non prêt après {timeout}s")
+
+
+async def drive(client: httpx.AsyncClient, requests: List[Tuple[str, dict]], concurrency: int) -> Dict[str, Any]:
+    """Envoie les requêtes en boucle fermée, `concurrency` à la fois"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    pending = iter(requests)
+
+    async def user() -> None:
+        for path, body in pending:
+            start = time.perf_counter()
+            try:
+                status = str((await client.post(path, json=body)).status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "duration_s": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "statuses": statuses,
+    }
+
+
+async def bench(args: argparse.Namespace, stub: StubUpstream, stub_url: str) -> Dict[str, Any]:
+    port = args.port or _free_port()
+    launched = time.monotonic()
+    process = start_app(stub_url, port, args.workers)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", headers={"X-API-Key": "bench"}, limits=limits, timeout=60
+        ) as client:
+            await wait_ready(client, process)
+            startup_s = round(time.monotonic() - launched, 3)
+            if args.warmup:
+                await drive(client, workload(args.warmup, args.distinct, args.skew, args.seed + 1), args.concurrency)
+            calls_before = dict(stub.calls)
+            metrics = await drive(client, workload(args.requests, args.distinct, args.skew, args.seed), args.concurrency)
+            upstream = {name: count - calls_before[name] for name, count in stub.calls.items()}
+            metrics["startup_s"] = startup_s
+            metrics["upstream"] = upstream
+            metrics["upstream_calls"] = sum(count for name, count in upstream.items() if name != "errors")
+            metrics.update(memory_mb(process.pid) or {})
+            # Statistiques du cache d'un des workers
+            metrics["cache"] = {
+                name: value for name, value in (await client.get("/stats")).json()["cache"].items()
+                if name in ("hits", "shared_hits", "disk_hits", "stale_hits", "misses", "evictions")
+            }
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return metrics
+
+
+def run_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Paramètres qui rendent deux mesures comparables"""
+    config = {
+        name: getattr(args, name)
+        for name in (
+            "requests", "concurrency", "distinct", "skew", "seed", "warmup", "workers",
+            "latency", "distribution", "jitter", "error_rate", "error_status", "total_results", "content_size",
+        )
+    }
+    # Configuration de l'application passée par l'environnement
+    config["env"] = {
+        name: value for name, value in sorted(os.environ.items())
+        if name.startswith("LEGIFRANCE_") and name not in ("LEGIFRANCE_CLIENT_ID", "LEGIFRANCE_CLIENT_SECRET")
+    }
+    return config
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def find_baseline(
+    results: List[Dict[str, Any]], config: Dict[str, Any], label: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Dernière mesure de même configuration (et de même étiquette si `label` est donné)"""
+    for result in reversed(results):
+        if result["config"] == config and (label is None or result.get("label") == label):
+            return result
+    return None
+
+
+def compare(metrics: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    :param metrics: Indicateurs de la mesure courante
+    :param baseline: Indicateurs de la référence
+    :param tolerance: Écart relatif toléré (0.1 = 10 %)
+    :return: Description des régressions
+    """
+    regressions = []
+    for name, higher_is_better in COMPARED.items():
+        current, reference = metrics.get(name), baseline.get(name)
+        if current is None or not reference:
+            continue
+        change = (current - reference) / reference
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{name} : {reference} -> {current} ({change:+.1%})")
+    return regressions
+
+
+def report(metrics: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    reference = baseline["metrics"] if baseline else {}
+    for name in (
+        "startup_s", "throughput", "p50_ms", "p95_ms", "p99_ms", "max_ms", "errors", "upstream_calls", "rss_mb", "peak_rss_mb"
+    ):
+        if name not in metrics:
+            continue
+        line = f"{name:<16} {metrics[name]:>10}"
+        if name in reference:
+            line += f"   (référence {reference[name]})"
+        print(line)
+    print(f"{'upstream':<16} {metrics['upstream']}")
+    print(f"{'statuts':<16} {metrics['statuses']}")
+    print(f"{'cache':<16} {metrics['cache']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=200, help="recherches distinctes")
+    parser.add_argument("--skew", type=float, default=1.0, help="paramètre de la loi de Zipf")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--warmup", type=int, default=0, help="requêtes envoyées avant la mesure")
+    parser.add_argument("--workers", type=int, default=1, help="workers uvicorn")
+    parser.add_argument("--port", type=int, default=0, help="port de l'application (libre par défaut)")
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.02, help="latence amont moyenne (s)")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--total-results", type=int, default=250)
+    parser.add_argument("--content-size", type=int, default=280, help="caractères par champ de texte")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="fichier des mesures (JSON lines)")
+    parser.add_argument("--label", help="étiquette de la mesure (ex: nom de branche)")
+    parser.add_argument("--baseline", help="étiquette de la mesure de référence")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="écart relatif toléré")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    stub = StubUpstream(
+        latency=args.latency,
+        distribution=args.distribution,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        total_results=args.total_results,
+        content_size=args.content_size,
+        seed=args.seed,
+    )
+    with StubServer(stub, port=args.stub_port) as server:
+        metrics = asyncio.run(bench(args, stub, server.url))
+
+    config = run_config(args)
+    baseline = find_baseline(load_results(args.results), config, args.baseline)
+    report(metrics, baseline)
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as target:
+            target.write(json.dumps({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "label": args.label,
+                "config": config,
+                "metrics": metrics,
+            }, ensure_ascii=False) + "\n")
+
+    if baseline is None:
+        print("Aucune mesure de référence pour cette configuration")
+        return
+    regressions = compare(metrics, baseline["metrics"], args.tolerance)
+    for regression in regressions:
+        print(f"RÉGRESSION {regression}")
+    if not regressions:
+        print(f"Aucune régression par rapport à {baseline['commit'] or '?'} ({baseline['timestamp']})")
+    elif args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Serveur factice imitant l'API Légifrance (PISTE) pour les mesures hors ligne.
+Expose le point d'entrée OAuth, /code, /loda et /juri ainsi que /consult/getArticle et
+/consult/juri, avec une distribution de latence, un taux d'erreur et une taille de
+réponse réglables.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+TOTAL_RESULTS = 250
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+LOREM = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+
+
+def _text(size: int) -> str:
+    return (LOREM * (size // len(LOREM) + 1))[:size]
+
+
+def _fake_results(fond: str, page_number: int, page_size: int, total: int = TOTAL_RESULTS, content_size: int = 280) -> list:
+    start = (page_number - 1) * page_size
+    stop = min(start + page_size, total)
+    text = _text(content_size)
+    return [
+        {
+            "id": f"{fond}{index:012d}",
+            "numero": str(index),
+            "titre": f"{fond} n°{index}",
+            "contenu": text,
+            "texte_integral": text if fond == "JURITEXT" else None,
+            "date": "2024-01-01",
+        }
+        for index in range(start, stop)
+    ]
+
+
+class StubUpstream:
+    """
+    Application Starlette factice.
+    - `latency` : temps de traitement amont moyen (s), tiré selon `distribution` :
+      'fixed', 'uniform' (± `jitter` × latence) ou 'lognormal' (écart type `jitter` du
+      logarithme, moyenne conservée : queue de distribution réaliste)
+    - `error_rate` : part des recherches en échec, avec le statut `error_status`
+      (429 accompagné de Retry-After: 1)
+    - `failure_status` (ex: 503), s'il est défini, fait échouer toutes les recherches
+    - `total_results` et `content_size` : nombre de résultats et taille (caractères) des
+      champs de texte, pour régler la taille des réponses
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.005,
+        distribution: str = "fixed",
+        jitter: float = 0.5,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        total_results: int = TOTAL_RESULTS,
+        content_size: int = 280,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribution inconnue : {distribution} ({', '.join(LATENCY_DISTRIBUTIONS)})")
+        self.latency = latency
+        self.distribution = distribution
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.total_results = total_results
+        self.content_size = content_size
+        self.failure_status: Optional[int] = None
+        self.random = random.Random(seed)
+        self.calls = {"token": 0, "code": 0, "loda": 0, "juri": 0, "consult": 0, "errors": 0}
+        self.app = Starlette(routes=[
+            Route("/api/oauth/token", self.token, methods=["POST"]),
+            Route("/code", self.search("code", "LEGIARTI"), methods=["POST"]),
+            Route("/loda", self.search("loda", "JORFTEXT"), methods=["POST"]),
+            Route("/juri", self.search("juri", "JURITEXT"), methods=["POST"]),
+            Route("/consult/getArticle", self.consult_article, methods=["POST"]),
+            Route("/consult/juri", self.consult_decision, methods=["POST"]),
+        ])
+
+    def delay(self) -> float:
+        """Temps de traitement simulé d'une requête, selon la distribution configurée"""
+        if self.distribution == "uniform":
+            return max(0.0, self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+        if self.distribution == "lognormal" and self.jitter > 0:
+            return self.latency * self.random.lognormvariate(-self.jitter ** 2 / 2, self.jitter)
+        return self.latency
+
+    def _error(self) -> Optional[JSONResponse]:
+        status = self.failure_status
+        if status is None and self.error_rate and self.random.random() < self.error_rate:
+            status = self.error_status
+        if status is None:
+            return None
+        self.calls["errors"] += 1
+        headers = {"Retry-After": "1"} if status == 429 else None
+        return JSONResponse({"error": "panne simulée"}, status_code=status, headers=headers)
+
+    async def token(self, request: Request) -> JSONResponse:
+        self.calls["token"] += 1
+        await asyncio.sleep(self.delay())
+        return JSONResponse({"access_token": "stub-token", "expires_in": 3600})
+
+    async def consult_article(self, request: Request) -> JSONResponse:
+        self.calls["consult"] += 1
+        identifier = (await request.json()).get("id")
+        await asyncio.sleep(self.delay())
+        error = self._error()
+        if error is not None:
+            return error
+        return JSONResponse({"article": {
+            "id": identifier, "num": identifier[-4:], "texte": _text(self.content_size),
+            "etat": "VIGUEUR", "dateDebut": 1704067200000, "dateFin": 32472144000000,
+        }})
+
+    async def consult_decision(self, request: Request) -> JSONResponse:
+        self.calls["consult"] += 1
+        identifier = (await request.json()).get("textId")
+        await asyncio.sleep(self.delay())
+        error = self._error()
+        if error is not None:
+            return error
+        return JSONResponse({"text": {
+            "id": identifier, "num": identifier[-6:], "juridiction": "Cour de cassation",
+            "dateTexte": 1704067200000, "texte": _text(self.content_size),
+        }})
+
+    def search(self, name: str, prefix: str):
+        async def endpoint(request: Request) -> JSONResponse:
+            self.calls[name] += 1
+            payload = await request.json()
+            recherche = payload.get("recherche", {})
+            page_number = recherche.get("pageNumber", 1)
+            page_size = recherche.get("pageSize", 10)
+            await asyncio.sleep(self.delay())
+            error = self._error()
+            if error is not None:
+                return error
+            return JSONResponse({
+                "results": _fake_results(prefix, page_number, page_size, self.total_results, self.content_size),
+                "totalResultNumber": self.total_results,
+            })
+        return endpoint
+
+
+class StubServer:
+    """Lance un `StubUpstream` dans un thread uvicorn (utilisable comme context manager)"""
+
+    def __init__(
+        self,
+        stub: Optional[StubUpstream] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        ssl_certfile: Optional[str] = None,
+        ssl_keyfile: Optional[str] = None,
+    ):
+        self.stub = stub or StubUpstream()
+        scheme = "https" if ssl_certfile else "http"
+        self.url = f"{scheme}://{host}:{port}"
+        config = uvicorn.Config(
+            self.stub.app,
+            host=host,
+            port=port,
+            log_level="warning",
+            ssl_certfile=ssl_certfile,
+            ssl_keyfile=ssl_keyfile,
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
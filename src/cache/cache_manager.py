@@ -1,33 +1,223 @@
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
-import json
-from cachetools import TTLCache
+import struct
+import time
+from .codec import Codec
+from .disk_cache import DiskCache
+from .keys import make_key
+from .memory_cache import MemoryCache
+from .shared import get_or_compute
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+STALE_RETENTION = 7 * 24 * 3600
+# Valeur dans le magasin partagé : date de stockage (double) suivie du blob compressé
+_STORED_AT = struct.Struct(">d")
+
+# Durées de vie (souple, dure) en secondes par préfixe de clé. Passé le délai souple,
+# l'entrée est encore servie pendant qu'elle est rafraîchie en tâche de fond ;
+# passé le délai dur, elle n'est plus servie.
+DEFAULT_TTL_POLICIES: Dict[str, Tuple[int, int]] = {
+    "code": (24 * 3600, 7 * 24 * 3600),          # codes consolidés : changent rarement
+    "texte_legal": (24 * 3600, 7 * 24 * 3600),
+    "jurisprudence": (3600, 24 * 3600),          # nouvelles décisions chaque jour
+    # Documents consultés par identifiant
+    "article": (24 * 3600, 7 * 24 * 3600),
+    "decision": (7 * 24 * 3600, 30 * 24 * 3600),  # une décision publiée ne change plus
+}
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float
+    stale: bool
 
 class CacheManager:
-    def __init__(self, ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        disk_path: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        codec: str = "zlib",
+        ttl_policies: Optional[Dict[str, Tuple[int, int]]] = None,
+        shared: Optional[Any] = None,
+        shared_namespace: str = "legifrance",
+        lock_timeout: float = 30.0
+    ):
         """
-        Initialise le gestionnaire de cache
-        :param ttl_seconds: Durée de vie des entrées en secondes (par défaut 1 heure)
+        Initialise le gestionnaire de cache : un cache mémoire compressé borné en octets,
+        adossé à un magasin partagé optionnel (protocole Redis) et à un cache disque
+        persistant optionnel, tous deux partagés entre workers
+        :param ttl_seconds: Durée de vie des entrées sans politique dédiée (par défaut 1 heure)
+        :param disk_path: Chemin du fichier SQLite du second niveau (désactivé si None)
+        :param max_bytes: Budget mémoire du premier niveau en octets
+        :param codec: Compression des valeurs ('zlib' ou 'zstd')
+        :param ttl_policies: Durées de vie (souple, dure) par préfixe, fusionnées avec les valeurs par défaut
+        :param shared: Magasin partagé (`RespClient` ou `LocalStore`), désactivé si None
+        :param shared_namespace: Préfixe des clés dans le magasin partagé
+        :param lock_timeout: Durée maximale d'un calcul sous verrou partagé (voir `get_or_compute`)
         """
-        self.cache = TTLCache(maxsize=100, ttl=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.ttl_policies = {**DEFAULT_TTL_POLICIES, **(ttl_policies or {})}
+        self.codec = Codec(codec)
+        self.cache = MemoryCache(max_bytes)
+        # Le disque garde les entrées au-delà du délai dur pour servir pendant une panne
+        retention = max([ttl_seconds] + [hard for _, hard in self.ttl_policies.values()]) + STALE_RETENTION
+        self.disk = DiskCache(disk_path, retention, self.codec) if disk_path else None
+        self.shared = shared
+        self.shared_namespace = shared_namespace
+        self.lock_timeout = lock_timeout
+        self.hits = 0
+        self.stale_hits = 0
+        self.shared_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
 
     def get_key(self, prefix: str, params: dict) -> str:
         """
-        Génère une clé de cache unique basée sur les paramètres
+        Génère une clé de cache unique basée sur la forme canonique des paramètres :
+        deux requêtes équivalentes pour Légifrance partagent la même clé
         :param prefix: Préfixe pour la clé (ex: 'code', 'jurisprudence')
         :param params: Dictionnaire des paramètres de la requête
         :return: Clé unique pour le cache
         """
-        sorted_params = sorted(params.items())
-        return f"{prefix}:{json.dumps(sorted_params)}"
+        return make_key(prefix, params)
+
+    def get_ttl(self, key: str) -> Tuple[int, int]:
+        """
+        Durées de vie applicables à une clé, selon son préfixe
+        :param key: Clé de cache
+        :return: Tuple (durée souple, durée dure) en secondes
+        """
+        prefix = key.split(":", 1)[0]
+        return self.ttl_policies.get(prefix, (self.ttl_seconds, self.ttl_seconds))
+
+    def get_entry(self, key: str, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """
+        Récupère une entrée du cache (mémoire, magasin partagé puis disque), décompressée à la lecture
+        :param key: Clé de cache
+        :param allow_expired: Renvoie aussi une entrée au-delà de son délai dur (dernière
+                              valeur connue, pour servir pendant une indisponibilité)
+        :return: Entrée, marquée `stale` si son délai souple est dépassé, ou None
+                 si absente ou au-delà du délai dur
+        """
+        return self._get_entry(key, allow_expired, lambda: self._get_shared(key))
+
+    async def aget_entry(self, key: str, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """
+        Comme `get_entry`, depuis la boucle d'événements : le magasin partagé n'est lu
+        (hors de la boucle) qu'en l'absence d'entrée valide en mémoire
+        """
+        shared_entry = None
+        if self.shared is not None:
+            stored_at = self.cache.stored_at(key)
+            if stored_at is None or (not allow_expired and time.time() - stored_at >= self.get_ttl(key)[1]):
+                shared_entry = self._unpack_shared(await self.shared.aget(self._shared_key(key)))
+        return self._get_entry(key, allow_expired, lambda: shared_entry)
+
+    def _get_entry(
+        self,
+        key: str,
+        allow_expired: bool,
+        read_shared: Callable[[], Optional[Tuple[float, bytes]]]
+    ) -> Optional[CacheEntry]:
+        soft_ttl, hard_ttl = self.get_ttl(key)
+        if allow_expired:
+            hard_ttl = float("inf")
+        now = time.time()
+
+        # Une entrée expirée reste en mémoire jusqu'à son éviction ou son remplacement
+        entry = self.cache.get(key)
+        if entry is not None and now - entry[0] >= hard_ttl:
+            entry = None
+
+        if entry is None and self.shared is not None:
+            entry = read_shared()
+            if entry is not None and now - entry[0] < hard_ttl:
+                self.cache.set(key, entry[1], entry[0])
+                self.shared_hits += 1
+            else:
+                entry = None
+
+        if entry is None and self.disk is not None:
+            entry = self.disk.get_blob(key)
+            if entry is not None and now - entry[0] < hard_ttl:
+                # Promotion en mémoire en conservant la date de stockage d'origine
+                self.cache.set(key, entry[1], entry[0])
+                self.disk_hits += 1
+            else:
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, blob = entry
+        stale = now - stored_at >= soft_ttl
+        self.hits += 1
+        if stale:
+            self.stale_hits += 1
+        return CacheEntry(self.codec.decode(blob), stored_at, stale)
+
+    def get_rendered(self, key: str) -> Optional[CacheEntry]:
+        """
+        Récupère la forme déjà sérialisée d'une entrée du cache mémoire, sans décompression
+        ni désérialisation
+        :param key: Clé de cache
+        :return: Entrée dont la valeur est le tuple (octets, métadonnées), ou None si absente, non sérialisée
+                 ou périmée (le rafraîchissement passe alors par `get_entry`)
+        """
+        entry = self.cache.get_rendered(key)
+        if entry is None:
+            return None
+        soft_ttl, _ = self.get_ttl(key)
+        if time.time() - entry[0] >= soft_ttl:
+            return None
+        self.hits += 1
+        return CacheEntry(entry[1:], entry[0], False)
+
+    def set_rendered(self, key: str, data: bytes, meta: Any = None) -> None:
+        """
+        Conserve en mémoire la forme sérialisée d'une entrée existante
+        :param key: Clé de cache
+        :param data: Octets sérialisés
+        :param meta: Métadonnées servies avec (nombre total de résultats...)
+        """
+        self.cache.attach_rendered(key, data, meta)
 
     def get(self, key: str) -> Optional[Any]:
         """
-        Récupère une valeur du cache
+        Récupère une valeur du cache, y compris au-delà de son délai souple
         :param key: Clé de cache
         :return: Valeur stockée ou None si non trouvée
         """
-        return self.cache.get(key)
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def get_stored_at(self, key: str, shared: bool = True) -> Optional[float]:
+        """
+        Date de stockage d'une entrée (mémoire, magasin partagé puis disque), sans la lire
+        ni compter d'accès ; la plus récente des copies partagée et mémoire
+        :param key: Clé de cache
+        :param shared: False pour ne consulter que la mémoire et le disque
+        :return: Timestamp de stockage ou None si absente
+        """
+        shared_entry = self._get_shared(key) if shared and self.shared is not None else None
+        return self._latest_stored_at(key, shared_entry)
+
+    async def aget_stored_at(self, key: str) -> Optional[float]:
+        """Comme `get_stored_at`, depuis la boucle d'événements (magasin partagé lu hors de la boucle)"""
+        shared_entry = None
+        if self.shared is not None:
+            shared_entry = self._unpack_shared(await self.shared.aget(self._shared_key(key)))
+        return self._latest_stored_at(key, shared_entry)
+
+    def _latest_stored_at(self, key: str, shared_entry: Optional[Tuple[float, bytes]]) -> Optional[float]:
+        stored_at = self.cache.stored_at(key)
+        if shared_entry is not None and (stored_at is None or shared_entry[0] > stored_at):
+            stored_at = shared_entry[0]
+        if stored_at is None and self.disk is not None:
+            entry = self.disk.get_blob(key)
+            stored_at = entry[0] if entry is not None else None
+        return stored_at
 
     def set(self, key: str, value: Any) -> None:
         """
@@ -35,19 +225,121 @@ class CacheManager:
         :param key: Clé de cache
         :param value: Valeur à stocker
         """
-        self.cache[key] = value
+        entries = self._store_local({key: value})
+        if self.shared is not None:
+            self.shared.set_many(entries)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Comme `set`, depuis la boucle d'événements (écriture partagée hors de la boucle)"""
+        await self.aset_many({key: value})
+
+    def set_many(self, values: Dict[str, Any]) -> None:
+        """
+        Stocke plusieurs valeurs : une seule transaction sur disque et un seul aller-retour
+        vers le magasin partagé, quel que soit leur nombre
+        :param values: Valeur à stocker par clé
+        """
+        entries = self._store_local(values)
+        if self.shared is not None and entries:
+            self.shared.set_many(entries)
+
+    async def aset_many(self, values: Dict[str, Any]) -> None:
+        """Comme `set_many`, depuis la boucle d'événements (écriture partagée hors de la boucle)"""
+        entries = self._store_local(values)
+        if self.shared is not None and entries:
+            await self.shared.aset_many(entries)
+
+    def _store_local(self, values: Dict[str, Any]) -> List[Tuple[str, bytes, float]]:
+        """
+        Écrit les valeurs en mémoire et sur disque (une transaction)
+        :return: Entrées (clé, valeur, durée de vie) à publier dans le magasin partagé
+        """
+        stored_at = time.time()
+        blobs = [(key, self.codec.encode(value)) for key, value in values.items()]
+        for key, blob in blobs:
+            self.cache.set(key, blob, stored_at)
+        if self.disk is not None and blobs:
+            self.disk.set_blobs([(key, blob, stored_at) for key, blob in blobs])
+        packed = _STORED_AT.pack(stored_at)
+        return [(self._shared_key(key), packed + blob, self.get_ttl(key)[1]) for key, blob in blobs]
+
+    def _set_local(self, key: str, blob: bytes, stored_at: float) -> None:
+        self.cache.set(key, blob, stored_at)
+        if self.disk is not None:
+            self.disk.set_blob(key, blob, stored_at)
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.shared_namespace}:{key}"
+
+    def _get_shared(self, key: str) -> Optional[Tuple[float, bytes]]:
+        return self._unpack_shared(self.shared.get(self._shared_key(key)))
+
+    @staticmethod
+    def _unpack_shared(data: Optional[bytes]) -> Optional[Tuple[float, bytes]]:
+        if data is None or len(data) < _STORED_AT.size:
+            return None
+        return _STORED_AT.unpack_from(data)[0], data[_STORED_AT.size:]
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]], refresh: bool = False) -> Any:
+        """
+        Calcule et stocke une valeur. Avec un magasin partagé, un seul worker de l'hôte la
+        calcule : les autres attendent sa publication, ou reprennent une valeur publiée
+        depuis moins que le délai souple (rafraîchie entre-temps par un autre worker).
+        :param key: Clé de cache
+        :param compute: Calcul de la valeur (appel à Légifrance)
+        :param refresh: Rafraîchissement forcé : seule une valeur publiée après l'appel est reprise
+        :return: Valeur calculée ou publiée par un autre worker
+        """
+        if self.shared is None:
+            value = await compute()
+            self.set(key, value)
+            return value
+
+        soft_ttl, hard_ttl = self.get_ttl(key)
+        computed = []
+
+        async def produce() -> Tuple[bytes, float]:
+            value = await compute()
+            computed.append(value)
+            stored_at = time.time()
+            blob = self.codec.encode(value)
+            self._set_local(key, blob, stored_at)
+            return _STORED_AT.pack(stored_at) + blob, hard_ttl
+
+        requested_at = time.time()
+
+        def fresh(data: bytes) -> bool:
+            stored_at = _STORED_AT.unpack_from(data)[0]
+            if refresh:
+                return stored_at >= requested_at
+            return time.time() - stored_at < soft_ttl
+
+        data, _ = await get_or_compute(
+            self.shared, self._shared_key(key), produce, self.lock_timeout, accept=fresh
+        )
+        if computed:
+            return computed[0]
+        stored_at, blob = _STORED_AT.unpack_from(data)[0], data[_STORED_AT.size:]
+        self._set_local(key, blob, stored_at)
+        self.shared_hits += 1
+        return self.codec.decode(blob)
 
     def clear(self) -> None:
-        """Vide le cache"""
+        """Vide le cache local (mémoire et disque) ; le magasin partagé expire de lui-même"""
         self.cache.clear()
+        if self.disk is not None:
+            self.disk.clear()
 
     def remove(self, key: str) -> None:
         """
         Supprime une entrée spécifique du cache
         :param key: Clé à supprimer
         """
-        if key in self.cache:
-            del self.cache[key]
+        self.cache.remove(key)
+        if self.disk is not None:
+            self.disk.remove(key)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
 
     def get_stats(self) -> dict:
         """
@@ -56,8 +348,16 @@ class CacheManager:
         """
         return {
             "size": len(self.cache),
-            "maxsize": self.cache.maxsize,
-            "currsize": self.cache.currsize,
-            "hits": getattr(self.cache, "hits", 0),
-            "misses": getattr(self.cache, "misses", 0)
+            "maxsize": self.cache.max_bytes,
+            "currsize": self.cache.bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "shared_hits": self.shared_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.cache.evictions,
+            "rejected": self.cache.rejected,
+            "codec": self.codec.name,
+            "disk": self.disk.get_stats() if self.disk is not None else None,
+            "shared": self.shared.get_stats() if self.shared is not None else None
         }
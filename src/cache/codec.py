@@ -0,0 +1,57 @@
+import zlib
+from typing import Any, Optional
+
+from ..utils.serialization import dumps, loads
+
+try:
+    import zstandard
+except ImportError:  # dépendance optionnelle
+    zstandard = None
+
+# Premier octet de chaque blob : identifie l'algorithme utilisé pour le compresser
+ZLIB_HEADER = b"z"
+ZSTD_HEADER = b"s"
+
+
+def zstd_available() -> bool:
+    """Indique si le paquet optionnel `zstandard` est installé"""
+    return zstandard is not None
+
+
+class Codec:
+    """
+    Sérialise les valeurs du cache en JSON compressé. Les blobs portent l'algorithme
+    utilisé, ce qui permet de relire les entrées écrites avec un autre réglage.
+    """
+
+    def __init__(self, name: str = "zlib", level: Optional[int] = None):
+        """
+        :param name: Algorithme de compression ('zlib' ou 'zstd')
+        :param level: Niveau de compression (défaut de l'algorithme si None)
+        """
+        if name not in ("zlib", "zstd"):
+            raise ValueError(f"Codec de cache inconnu : {name}")
+        if name == "zstd" and not zstd_available():
+            raise ValueError("Le codec 'zstd' nécessite le paquet 'zstandard'")
+        self.name = name
+        if name == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level if level is not None else 3)
+        else:
+            self.level = level if level is not None else 6
+
+    def encode(self, value: Any) -> bytes:
+        data = dumps(value)
+        if self.name == "zstd":
+            return ZSTD_HEADER + self._compressor.compress(data)
+        return ZLIB_HEADER + zlib.compress(data, self.level)
+
+    @staticmethod
+    def decode(blob: bytes) -> Any:
+        header, body = blob[:1], blob[1:]
+        if header == ZSTD_HEADER:
+            if not zstd_available():
+                raise ValueError("Entrée compressée en zstd mais le paquet 'zstandard' est absent")
+            data = zstandard.ZstdDecompressor().decompress(body)
+        else:
+            data = zlib.decompress(body)
+        return loads(data)
@@ -0,0 +1,91 @@
+import sqlite3
+import time
+from typing import Any, Iterable, Optional, Tuple
+from .codec import Codec
+
+
+class DiskCache:
+    """
+    Cache persistant sur disque local (SQLite) : les réponses y sont stockées
+    compressées et survivent aux redémarrages. Le mode WAL permet à tous les
+    workers d'un même hôte de partager le même fichier.
+    """
+
+    def __init__(self, path: str, retention_seconds: int = 3600, codec: Optional[Codec] = None):
+        """
+        Initialise le cache disque
+        :param path: Chemin du fichier SQLite
+        :param retention_seconds: Âge au-delà duquel les entrées sont purgées
+        :param codec: Sérialisation/compression des valeurs (zlib par défaut)
+        """
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.codec = codec or Codec()
+        self.conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self.purge_expired()
+
+    def get_blob(self, key: str) -> Optional[Tuple[float, bytes]]:
+        """
+        Récupère une entrée encore compressée ; sa fraîcheur est laissée à l'appelant
+        :param key: Clé de cache
+        :return: Tuple (date de stockage, blob) ou None si absente
+        """
+        row = self.conn.execute(
+            "SELECT value, stored_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[1], row[0]
+
+    def set_blob(self, key: str, blob: bytes, stored_at: Optional[float] = None) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, blob, stored_at if stored_at is not None else time.time())
+        )
+
+    def set_blobs(self, entries: Iterable[Tuple[str, bytes, float]]) -> None:
+        """
+        Écrit plusieurs entrées en une seule transaction (un seul commit)
+        :param entries: Tuples (clé, blob, date de stockage)
+        """
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)", entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_blob(key)
+        return self.codec.decode(entry[1]) if entry else None
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        self.set_blob(key, self.codec.encode(value), stored_at)
+
+    def remove(self, key: str) -> None:
+        self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self.conn.execute("DELETE FROM cache")
+
+    def purge_expired(self) -> int:
+        """
+        Supprime les entrées plus anciennes que la durée de rétention
+        :return: Nombre d'entrées supprimées
+        """
+        cursor = self.conn.execute(
+            "DELETE FROM cache WHERE stored_at <= ?", (time.time() - self.retention_seconds,)
+        )
+        return cursor.rowcount
+
+    def get_stats(self) -> dict:
+        entries, size = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache"
+        ).fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any, Dict
+
+# Valeurs par défaut des modèles de recherche : un paramètre absent ou égal
+# à sa valeur par défaut produit la même clé
+DEFAULTS: Dict[str, Any] = {
+    "champ": "ALL",
+    "type_recherche": "TOUS_LES_MOTS_DANS_UN_CHAMP",
+    "page_size": 10,
+    "page_number": 1,
+    "fetch_all": False,
+}
+PREFIX_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "code": {**DEFAULTS, "sort": "PERTINENCE"},
+    "texte_legal": {**DEFAULTS, "sort": "PERTINENCE"},
+    "jurisprudence": {**DEFAULTS, "sort": "DATE_DESC"},
+}
+
+# Recherche plein texte Légifrance insensible à la casse ; les accents sont
+# conservés (seule la forme Unicode est normalisée)
+FULL_TEXT_FIELDS = {"search"}
+# Valeurs d'énumération et identifiants (LEGITEXT..., JORFTEXT...) : en majuscules
+UPPERCASE_FIELDS = {"champ", "sort", "type_recherche", "text_id"}
+
+# Paramètres de présentation appliqués après le cache : sans effet sur la clé
+PRESENTATION_FIELDS = {"fields", "snippet_length"}
+# Pagination : le curseur est remplacé par le numéro de page avant le calcul de la clé
+PAGINATION_FIELDS = {"cursor", "page_number"}
+
+_WHITESPACE = re.compile(r"\s+")
+KEY_DIGEST_SIZE = 16
+
+
+def _normalize_text(value: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", value)).strip()
+
+
+def _normalize_value(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = _normalize_text(value)
+        if name in FULL_TEXT_FIELDS:
+            return value.casefold()
+        if name in UPPERCASE_FIELDS:
+            return value.upper()
+        return value
+    if isinstance(value, (list, tuple, set)):
+        # Filtres à valeurs multiples : l'ordre et les doublons n'ont pas de sens
+        items = {_normalize_value(name, item) for item in value}
+        return sorted((item for item in items if item not in (None, "")), key=str)
+    return value
+
+
+def canonicalize(prefix: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Forme canonique des paramètres d'une recherche : espaces, casse et forme Unicode
+    normalisés, filtres triés, valeurs vides ou par défaut et paramètres de présentation retirés.
+    :param prefix: Préfixe de la clé (ex: 'code', 'jurisprudence')
+    :param params: Paramètres bruts de la requête
+    :return: Paramètres canoniques
+    """
+    defaults = PREFIX_DEFAULTS.get(prefix, {})
+    canonical = {}
+    for name, value in params.items():
+        if name in PRESENTATION_FIELDS:
+            continue
+        value = _normalize_value(name, value)
+        if value is None or value == "" or value == []:
+            continue
+        if name in defaults and value == _normalize_value(name, defaults[name]):
+            continue
+        canonical[name] = value
+    if canonical.get("fetch_all"):
+        # Toutes les pages sont récupérées : la pagination demandée n'influe pas sur le résultat
+        canonical.pop("page_size", None)
+        canonical.pop("page_number", None)
+    return canonical
+
+
+def fingerprint(prefix: str, params: Dict[str, Any]) -> str:
+    """
+    Empreinte d'une recherche indépendamment de la page demandée (identifie les curseurs)
+    :param prefix: Préfixe de la clé (ex: 'code', 'jurisprudence')
+    :param params: Paramètres bruts de la requête
+    """
+    search = {name: value for name, value in params.items() if name not in PAGINATION_FIELDS}
+    return make_key(prefix, search).split(":", 1)[1][:16]
+
+
+def make_key(prefix: str, params: Dict[str, Any]) -> str:
+    """
+    Clé de cache de taille fixe : préfixe suivi de l'empreinte des paramètres canoniques
+    :param prefix: Préfixe de la clé (ex: 'code', 'jurisprudence')
+    :param params: Paramètres bruts de la requête
+    :return: Clé `prefix:empreinte`
+    """
+    canonical = json.dumps(
+        canonicalize(prefix, params), sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=KEY_DIGEST_SIZE).hexdigest()
+    return f"{prefix}:{digest}"
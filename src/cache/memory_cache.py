@@ -0,0 +1,143 @@
+import heapq
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _Entry:
+    __slots__ = ("blob", "stored_at", "size", "frequency", "priority", "rendered")
+
+    def __init__(self, blob: bytes, stored_at: float, size: int):
+        self.blob = blob
+        self.stored_at = stored_at
+        self.size = size
+        self.frequency = 1
+        self.priority = 0.0
+        # Forme déjà sérialisée de la réponse, servie telle quelle, et ses métadonnées
+        self.rendered: Optional[Tuple[bytes, Any]] = None
+
+
+class MemoryCache:
+    """
+    Cache mémoire borné en octets : les valeurs y sont conservées compressées et
+    l'éviction suit GDSF (Greedy-Dual-Size-Frequency) : priorité = L + fréquence / taille.
+    Les petites entrées souvent lues restent, les grosses réponses rarement relues partent.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        :param max_bytes: Budget mémoire total (clés et blobs compressés)
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.rejected = 0
+        self._entries: Dict[str, _Entry] = {}
+        # Tas (priorité, ordre d'insertion, clé) ; les positions périmées sont ignorées à l'éviction
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        # Valeur d'inflation L : priorité de la dernière entrée évincée
+        self._clock = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _push(self, key: str, entry: _Entry) -> None:
+        entry.priority = self._clock + entry.frequency / entry.size
+        heapq.heappush(self._heap, (entry.priority, next(self._counter), key))
+        if len(self._heap) > 4 * len(self._entries) + 64:
+            self._compact()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        """
+        Récupère une entrée et augmente sa fréquence d'accès
+        :param key: Clé de cache
+        :return: Tuple (date de stockage, blob compressé) ou None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry.frequency += 1
+        self._push(key, entry)
+        return entry.stored_at, entry.blob
+
+    def get_rendered(self, key: str) -> Optional[Tuple[float, bytes, Any]]:
+        """
+        Récupère la forme sérialisée d'une entrée, si elle a été conservée
+        :param key: Clé de cache
+        :return: Tuple (date de stockage, octets sérialisés, métadonnées) ou None
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.rendered is None:
+            return None
+        entry.frequency += 1
+        self._push(key, entry)
+        return (entry.stored_at,) + entry.rendered
+
+    def attach_rendered(self, key: str, data: bytes, meta: Any = None) -> None:
+        """
+        Conserve avec une entrée sa forme sérialisée, comptée dans le budget ; elle
+        disparaît quand l'entrée est remplacée
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.rendered is not None or entry.size + len(data) > self.max_bytes:
+            return
+        entry.rendered = (data, meta)
+        entry.size += len(data)
+        self.bytes += len(data)
+        self._push(key, entry)
+        self._evict()
+
+    def stored_at(self, key: str) -> Optional[float]:
+        """Date de stockage d'une entrée, sans compter d'accès"""
+        entry = self._entries.get(key)
+        return entry.stored_at if entry is not None else None
+
+    def set(self, key: str, blob: bytes, stored_at: float) -> None:
+        size = len(blob) + len(key)
+        if size > self.max_bytes:
+            # Plus gros que tout le budget : inutile de vider le cache pour lui
+            self.rejected += 1
+            self.remove(key)
+            return
+
+        previous = self._entries.get(key)
+        entry = _Entry(blob, stored_at, size)
+        if previous is not None:
+            entry.frequency = previous.frequency
+            self.bytes -= previous.size
+        self._entries[key] = entry
+        self.bytes += size
+        self._push(key, entry)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes and self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.priority != priority:
+                continue
+            del self._entries[key]
+            self.bytes -= entry.size
+            self.evictions += 1
+            self._clock = priority
+
+    def _compact(self) -> None:
+        """Reconstruit le tas sans les positions périmées"""
+        self._heap = [
+            (entry.priority, next(self._counter), key) for key, entry in self._entries.items()
+        ]
+        heapq.heapify(self._heap)
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._heap.clear()
+        self.bytes = 0
+        self._clock = 0.0
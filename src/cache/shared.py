@@ -0,0 +1,354 @@
+import asyncio
+import logging
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 6379
+
+
+class SharedStoreError(ConnectionError):
+    """Magasin partagé injoignable ou réponse d'erreur du serveur"""
+
+
+class RespError(SharedStoreError):
+    """Réponse d'erreur du serveur (`-ERR ...`) : la connexion reste utilisable"""
+
+
+def encode_command(*args: Union[str, bytes, int, float]) -> bytes:
+    """Encode une commande au format RESP (tableau de chaînes binaires)"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(source: Any) -> Any:
+    """
+    Lit une réponse RESP depuis un flux binaire (méthodes `readline` et `read`)
+    :return: bytes, int, None (valeur absente) ou liste ; une réponse d'erreur est renvoyée
+             sous forme de `RespError`, sans être levée
+    """
+    line = source.readline()
+    if not line.endswith(b"\r\n"):
+        raise SharedStoreError("Connexion fermée par le magasin partagé")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        return RespError(payload.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = source.read(length + 2)
+        if len(data) != length + 2:
+            raise SharedStoreError("Connexion fermée par le magasin partagé")
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        return None if length < 0 else [read_reply(source) for _ in range(length)]
+    raise SharedStoreError(f"Réponse RESP invalide : {line[:40]!r}")
+
+
+def _set_command(key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> List[Any]:
+    args: List[Any] = ["SET", key, value]
+    if ttl is not None:
+        args += ["PX", max(1, int(ttl * 1000))]
+    if nx:
+        args.append("NX")
+    return args
+
+
+class RespClient:
+    """
+    Client minimal du protocole Redis (RESP), compatible avec Redis, Valkey, KeyDB ou
+    Dragonfly. Les méthodes synchrones bloquent jusqu'à la réponse ; le code asynchrone
+    utilise leurs variantes `aget`, `aset`, `aset_many` et `adelete`, exécutées sur un
+    fil dédié : un magasin lent ou injoignable ne bloque pas la boucle d'événements.
+    Un magasin injoignable n'interrompt pas le service : les lectures renvoient None, les
+    écritures False, et aucune connexion n'est retentée pendant `retry_delay` secondes.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.1, retry_delay: float = 1.0):
+        """
+        :param url: redis://[:mot_de_passe@]hôte[:port][/base] ou unix:///chemin/redis.sock
+        :param timeout: Délai maximal (s) d'une connexion ou d'une commande
+        :param retry_delay: Délai (s) avant de retenter la connexion après une erreur
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "unix"):
+            raise ValueError(f"URL de magasin partagé non prise en charge : {url}")
+        self.url = url
+        self.unix_path = parsed.path if parsed.scheme == "unix" else None
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or DEFAULT_PORT
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.strip("/") or 0) if parsed.scheme == "redis" else 0
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.errors = 0
+        self._sock: Optional[socket.socket] = None
+        self._file: Any = None
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        # Les commandes sont sérialisées par le verrou : un seul fil suffit
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resp")
+
+    @property
+    def available(self) -> bool:
+        """Faux pendant `retry_delay` secondes après une erreur de connexion"""
+        return time.monotonic() >= self._down_until
+
+    def _connect(self) -> None:
+        if self.unix_path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.unix_path)
+        else:
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        self._sock, self._file = sock, sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def _call(self, *args: Any) -> Any:
+        self._sock.sendall(encode_command(*args))
+        reply = read_reply(self._file)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def execute(self, *args: Any) -> Any:
+        """
+        Exécute une commande
+        :raises SharedStoreError: Magasin injoignable (ou en attente de reconnexion) ou réponse d'erreur
+        """
+        reply = self.execute_many([args])[0]
+        if isinstance(reply, RespError):
+            self.errors += 1
+            raise reply
+        return reply
+
+    def execute_many(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Exécute plusieurs commandes en un seul aller-retour (pipeline)
+        :return: Réponses dans l'ordre des commandes, les réponses d'erreur sous forme de `RespError`
+        :raises SharedStoreError: Magasin injoignable (ou en attente de reconnexion)
+        """
+        with self._lock:
+            if not self.available:
+                raise SharedStoreError(f"Magasin partagé indisponible : {self.url}")
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._sock.sendall(b"".join(encode_command(*command) for command in commands))
+                return [read_reply(self._file) for _ in commands]
+            except (OSError, SharedStoreError, ValueError) as e:
+                self.errors += 1
+                self._disconnect()
+                self._down_until = time.monotonic() + self.retry_delay
+                logger.warning(f"Magasin partagé {self.url} injoignable, cache local seul pendant {self.retry_delay}s : {e}")
+                raise SharedStoreError(str(e)) from e
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.execute("GET", key)
+        except SharedStoreError:
+            return None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        """
+        :param ttl: Durée de vie en secondes (aucune si None)
+        :param nx: N'écrit que si la clé est absente
+        :return: True si la valeur a été écrite
+        """
+        try:
+            return self.execute(*_set_command(key, value, ttl, nx)) is not None
+        except SharedStoreError:
+            return False
+
+    def set_many(self, entries: Sequence[Tuple[str, bytes, Optional[float]]]) -> None:
+        """
+        Écrit plusieurs valeurs en un seul aller-retour
+        :param entries: Tuples (clé, valeur, durée de vie en secondes)
+        """
+        if not entries:
+            return
+        try:
+            replies = self.execute_many([_set_command(key, value, ttl) for key, value, ttl in entries])
+        except SharedStoreError:
+            return
+        self.errors += sum(1 for reply in replies if isinstance(reply, RespError))
+
+    def delete(self, key: str) -> None:
+        try:
+            self.execute("DEL", key)
+        except SharedStoreError:
+            pass
+
+    async def _run(self, method: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_event_loop().run_in_executor(self._executor, partial(method, *args))
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await self._run(self.get, key)
+
+    async def aset(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        return await self._run(self.set, key, value, ttl, nx)
+
+    async def aset_many(self, entries: Sequence[Tuple[str, bytes, Optional[float]]]) -> None:
+        await self._run(self.set_many, entries)
+
+    async def adelete(self, key: str) -> None:
+        await self._run(self.delete, key)
+
+    def get_stats(self) -> dict:
+        return {"url": self.url, "available": self.available, "errors": self.errors}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            self._disconnect()
+
+
+class LocalStore:
+    """
+    Magasin en mémoire du processus, de même interface que `RespClient` : remplace le
+    serveur dans les tests, ou sert de magasin unique à plusieurs clients d'un même processus
+    """
+
+    def __init__(self):
+        self.available = True
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                return None
+            if item[1] is not None and time.monotonic() >= item[1]:
+                del self._values[key]
+                return None
+            return item[0]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        if nx and self.get(key) is not None:
+            return False
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        return True
+
+    def set_many(self, entries: Sequence[Tuple[str, bytes, Optional[float]]]) -> None:
+        for key, value, ttl in entries:
+            self.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+
+    # Variantes asynchrones de même interface que `RespClient` : en mémoire, sans attente
+    async def aget(self, key: str) -> Optional[bytes]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        return self.set(key, value, ttl, nx)
+
+    async def aset_many(self, entries: Sequence[Tuple[str, bytes, Optional[float]]]) -> None:
+        self.set_many(entries)
+
+    async def adelete(self, key: str) -> None:
+        self.delete(key)
+
+    def get_stats(self) -> dict:
+        return {"url": "memory://", "available": True, "errors": 0, "keys": len(self._values)}
+
+    def close(self) -> None:
+        pass
+
+
+def open_store(url: str, timeout: float = 0.1) -> Union[RespClient, LocalStore]:
+    """
+    :param url: redis://..., unix://... ou memory:// (magasin propre au processus)
+    :param timeout: Délai maximal (s) d'une commande
+    """
+    if url.startswith("memory://"):
+        return LocalStore()
+    return RespClient(url, timeout)
+
+
+async def get_or_compute(
+    store: Union[RespClient, LocalStore],
+    key: str,
+    compute: Callable[[], Awaitable[Tuple[bytes, float]]],
+    lock_timeout: float = 30.0,
+    accept: Optional[Callable[[bytes], bool]] = None,
+    poll_interval: float = 0.05
+) -> Tuple[bytes, bool]:
+    """
+    Lecture ou calcul d'une valeur partagée, un seul calcul à la fois pour tous les
+    processus : le premier pose un verrou (SET NX avec expiration), calcule et publie ;
+    les autres attendent la valeur publiée. Un verrou dont le détenteur a disparu expire
+    après `lock_timeout` ; un magasin injoignable fait calculer localement.
+    :param store: Magasin partagé
+    :param key: Clé de la valeur
+    :param compute: Calcul de la valeur, renvoyant (octets, durée de vie en secondes)
+    :param lock_timeout: Durée de vie du verrou, et attente maximale de la valeur d'un autre processus
+    :param accept: Valeur publiée utilisable telle quelle (par défaut : toute valeur présente)
+    :param poll_interval: Délai (s) entre deux lectures pendant l'attente
+    :return: Tuple (valeur, True si elle a été calculée par cet appel)
+    """
+    def usable(value: Optional[bytes]) -> bool:
+        return value is not None and (accept is None or accept(value))
+
+    value = await store.aget(key)
+    if usable(value):
+        return value, False
+
+    lock_key = f"{key}:lock"
+    owner = uuid.uuid4().hex.encode()
+    deadline = time.monotonic() + lock_timeout
+    while store.available and time.monotonic() < deadline:
+        if await store.aset(lock_key, owner, ttl=lock_timeout, nx=True):
+            try:
+                # La valeur a pu être publiée entre la lecture et la pose du verrou
+                value = await store.aget(key)
+                if usable(value):
+                    return value, False
+                value, ttl = await compute()
+                await store.aset(key, value, ttl=ttl)
+                return value, True
+            finally:
+                if await store.aget(lock_key) == owner:
+                    await store.adelete(lock_key)
+        await asyncio.sleep(poll_interval)
+        value = await store.aget(key)
+        if usable(value):
+            return value, False
+
+    value, ttl = await compute()
+    await store.aset(key, value, ttl=ttl)
+    return value, True
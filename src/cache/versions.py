@@ -0,0 +1,133 @@
+import bisect
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Date de fin des versions en vigueur dans Légifrance (« sans date de fin »)
+OPEN_END = "2999-01-01"
+
+
+def iso_date(value: Any) -> Optional[str]:
+    """Date ISO (AAAA-MM-JJ) d'une date ISO, d'un horodatage ISO ou en millisecondes ; None si absente"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).date().isoformat()
+    return str(value)[:10]
+
+
+def epoch_millis(day: str) -> int:
+    """Date ISO en millisecondes depuis l'epoch (minuit UTC), format des dates de l'API"""
+    return int(datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class Version(NamedTuple):
+    """
+    Version d'un article valable sur [start, end) : l'enregistrement de l'article s'il a
+    été consulté, sinon seulement l'identifiant de la version (liste `articleVersions`)
+    """
+    start: str
+    end: str
+    version_id: Optional[str]
+    record: Optional[Dict[str, Any]]
+    expires: Optional[float]
+
+
+class VersionIndex:
+    """
+    Index des versions d'articles par identifiant : pour chaque article, les intervalles
+    de validité [date_debut, date_fin) triés par début, trouvés par dichotomie. Une date
+    comprise dans un intervalle connu est servie sans appel à Légifrance.
+    Les versions closes ne changent plus et n'expirent pas ; une version encore en vigueur
+    (fin ouverte) peut être close par une modification de l'article : elle expire après
+    `open_ttl` secondes. Au-delà de `max_articles` articles, les moins récemment consultés
+    sont retirés.
+    """
+
+    def __init__(self, max_articles: int = 10000, open_ttl: float = 86400):
+        self.max_articles = max_articles
+        self.open_ttl = open_ttl
+        self._articles: "OrderedDict[str, List[Version]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def add(
+        self,
+        article_id: str,
+        start: Any,
+        end: Any,
+        record: Optional[Dict[str, Any]] = None,
+        version_id: Optional[str] = None
+    ) -> None:
+        """
+        Ajoute une version de l'article ; elle remplace les versions connues qu'elle chevauche,
+        sauf une version de même intervalle déjà consultée quand on n'apporte qu'un identifiant
+        :param article_id: Identifiant sous lequel l'article est consulté
+        :param start: Début de validité (date ISO)
+        :param end: Fin de validité exclue (date ISO, ouverte si absente)
+        :param record: Article tel qu'en vigueur sur l'intervalle
+        :param version_id: Identifiant Légifrance de la version
+        """
+        start, end = iso_date(start), iso_date(end) or OPEN_END
+        if start is None or end <= start:
+            return
+        expires = time.monotonic() + self.open_ttl if end >= OPEN_END else None
+        version = Version(start, end, version_id or (record or {}).get("id"), record, expires)
+
+        versions = self._articles.get(article_id)
+        if versions is None:
+            versions = self._articles[article_id] = []
+        kept = []
+        for known in versions:
+            if known.end <= start or known.start >= end:
+                kept.append(known)
+            elif record is None and known.record is not None and (known.start, known.end) == (start, end):
+                return
+        bisect.insort(kept, version)
+        versions[:] = kept
+        self._articles.move_to_end(article_id)
+        while len(self._articles) > self.max_articles:
+            self._articles.popitem(last=False)
+
+    def add_record(self, article_id: str, record: Dict[str, Any]) -> None:
+        """Ajoute la version décrite par un enregistrement d'article (`date_debut`, `date_fin`)"""
+        self.add(article_id, record.get("date_debut"), record.get("date_fin"), record=record)
+
+    def lookup(self, article_id: str, date: str) -> Optional[Version]:
+        """
+        :param date: Date ISO
+        :return: Version valable à `date` (éventuellement sans enregistrement), None si inconnue
+        """
+        versions = self._articles.get(article_id)
+        if not versions:
+            return None
+        index = bisect.bisect_right(versions, (date, "\uffff")) - 1
+        if index < 0 or date >= versions[index].end:
+            return None
+        version = versions[index]
+        if version.expires is not None and time.monotonic() >= version.expires:
+            del versions[index]
+            return None
+        self._articles.move_to_end(article_id)
+        return version
+
+    def find(self, article_id: str, date: str) -> Optional[Version]:
+        """`lookup` comptabilisé : succès seulement si l'enregistrement de la version est connu"""
+        version = self.lookup(article_id, date)
+        if version is None or version.record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return version
+
+    def get_stats(self) -> dict:
+        return {
+            "articles": len(self._articles),
+            "versions": sum(len(versions) for versions in self._articles.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.rate_limit import TokenBucket
+from .keys import make_key
+
+logger = logging.getLogger(__name__)
+
+Query = Tuple[str, dict]
+
+
+class HotQueries:
+    """
+    Compteur des recherches servies par clé de cache, avec leurs paramètres (les clés
+    étant hachées, ils ne peuvent pas en être déduits). Borné à `max_entries` : au-delà,
+    les moins demandées sont oubliées et les compteurs divisés par deux, pour que les
+    recherches populaires d'hier cèdent la place à celles d'aujourd'hui.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._queries: Dict[str, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def record(self, key: str, prefix: str, params: dict) -> None:
+        query = self._queries.get(key)
+        if query is not None:
+            query[2] += 1
+            return
+        self._queries[key] = [prefix, params, 1]
+        if len(self._queries) > self.max_entries * 1.25:
+            self._prune()
+
+    def _prune(self) -> None:
+        kept = heapq.nlargest(self.max_entries, self._queries.items(), key=lambda item: item[1][2])
+        self._queries = {key: [prefix, params, hits / 2] for key, (prefix, params, hits) in kept}
+
+    def top(self, n: int) -> List[Query]:
+        """
+        :param n: Nombre de recherches
+        :return: Les `n` recherches les plus demandées, (préfixe, paramètres), de la plus demandée à la moins demandée
+        """
+        hottest = heapq.nlargest(n, self._queries.values(), key=lambda query: query[2])
+        return [(prefix, params) for prefix, params, _ in hottest]
+
+
+def load_queries(path: str) -> List[Query]:
+    """
+    Lit une liste de recherches au format JSON lines : {"prefix": ..., "params": {...}}
+    :param path: Chemin du fichier
+    :return: Recherches (préfixe, paramètres) ; liste vide si le fichier est absent
+    """
+    if not os.path.exists(path):
+        return []
+    queries = []
+    with open(path, encoding="utf-8") as source:
+        for number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                query = json.loads(line)
+                queries.append((query["prefix"], query.get("params") or {}))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ligne {number} ignorée dans {path} : {e}")
+    return queries
+
+
+def save_queries(path: str, queries: List[Query]) -> None:
+    """Écrit une liste de recherches au format JSON lines (remplacement atomique)"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as target:
+        for prefix, params in queries:
+            target.write(json.dumps({"prefix": prefix, "params": params}, ensure_ascii=False) + "\n")
+    os.replace(temporary, path)
+
+
+class CacheWarmer:
+    """
+    Préchauffage du cache : au démarrage, les recherches d'un fichier de configuration et
+    les plus demandées lors de l'exécution précédente sont exécutées en tâche de fond, à
+    débit limité pour laisser le quota PISTE au trafic réel. Ensuite, les recherches les
+    plus demandées sont rafraîchies périodiquement avant l'expiration de leur entrée.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        queries_file: Optional[str] = None,
+        state_file: Optional[str] = None,
+        top_n: int = 200,
+        rate: float = 2.0,
+        interval: float = 600.0,
+        refresh_ahead: float = 0.8
+    ):
+        """
+        :param client: Client Légifrance (méthode `rechercher`, attributs `cache` et `hot_queries`)
+        :param queries_file: Recherches à préchauffer (JSON lines), maintenues à la main
+        :param state_file: Recherches les plus demandées, enregistrées à l'arrêt et relues au démarrage
+        :param top_n: Nombre de recherches les plus demandées à préchauffer et rafraîchir
+        :param rate: Recherches de préchauffage par seconde
+        :param interval: Délai (s) entre deux rafraîchissements
+        :param refresh_ahead: Fraction du délai souple au-delà de laquelle une entrée est rafraîchie
+        """
+        self.client = client
+        self.queries_file = queries_file
+        self.state_file = state_file
+        self.top_n = top_n
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.rate_limiter = TokenBucket(rate, 1)
+        # Positionné à la fin du premier passage de préchauffage
+        self.warmed = asyncio.Event()
+        self.stats = {"warmed": 0, "skipped": 0, "failures": 0, "passes": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def queries(self, include_state: bool = False) -> List[Query]:
+        """Recherches à maintenir au chaud, dédupliquées par clé de cache"""
+        queries: List[Query] = []
+        if self.queries_file:
+            queries.extend(load_queries(self.queries_file))
+        if include_state and self.state_file:
+            queries.extend(load_queries(self.state_file))
+        queries.extend(self.client.hot_queries.top(self.top_n))
+        unique = {}
+        for prefix, params in queries:
+            unique.setdefault(make_key(prefix, params), (prefix, params))
+        return list(unique.values())
+
+    async def needs_refresh(self, prefix: str, params: dict) -> bool:
+        key = make_key(prefix, params)
+        stored_at = await self.client.cache.aget_stored_at(key)
+        if stored_at is None:
+            return True
+        soft_ttl, _ = self.client.cache.get_ttl(key)
+        return time.time() - stored_at >= soft_ttl * self.refresh_ahead
+
+    async def warm(self, queries: List[Query]) -> int:
+        """
+        Exécute les recherches dont l'entrée est absente ou proche de l'expiration
+        :param queries: Recherches (préfixe, paramètres)
+        :return: Nombre de recherches envoyées à Légifrance
+        """
+        warmed = 0
+        for prefix, params in queries:
+            if not await self.needs_refresh(prefix, params):
+                self.stats["skipped"] += 1
+                continue
+            await self.rate_limiter.acquire()
+            try:
+                await self.client.rechercher(prefix, params, refresh=True)
+                warmed += 1
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.warning(f"Échec du préchauffage de {prefix} {params} : {e}")
+        self.stats["warmed"] += warmed
+        self.stats["passes"] += 1
+        return warmed
+
+    async def _run(self) -> None:
+        try:
+            queries = self.queries(include_state=True)
+            start = time.perf_counter()
+            warmed = await self.warm(queries)
+            logger.info(
+                f"Cache préchauffé : {warmed}/{len(queries)} recherches en {time.perf_counter() - start:.1f}s"
+            )
+        finally:
+            self.warmed.set()
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.warm(self.queries())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def wait_warmed(self, timeout: float) -> bool:
+        """
+        Attend la fin du premier passage, au plus `timeout` secondes ; le préchauffage
+        continue ensuite en tâche de fond
+        :return: True si le premier passage est terminé
+        """
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(self.warmed.wait()), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.warmed.is_set()
+
+    async def stop(self) -> None:
+        """Arrête le préchauffage et enregistre les recherches les plus demandées"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.state_file and len(self.client.hot_queries):
+            save_queries(self.state_file, self.client.hot_queries.top(self.top_n))
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "ready": self.warmed.is_set(), "tracked": len(self.client.hot_queries)}
@@ -1,33 +1,83 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, validator
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
+from ..utils.transformers import CODE_FIELDS, JURISPRUDENCE_FIELDS, TEXTE_LEGAL_FIELDS
 
-class CodeSearchParams(BaseModel):
+def check_iso_date(value: Optional[str]) -> Optional[str]:
+    """Date au format AAAA-MM-JJ"""
+    if value is not None:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Date invalide : {value} (attendu : AAAA-MM-JJ)")
+    return value
+
+class ResultShapeParams(BaseModel):
+    """
+    Présentation des résultats : `fields` limite les champs renvoyés (l'identifiant est
+    toujours inclus), `snippet_length` remplace les textes longs par un extrait surligné
+    """
+    fields: Optional[List[str]] = None
+    snippet_length: Optional[int] = Field(default=None, ge=20, le=5000)
+
+    # Champs disponibles, redéfinis par chaque modèle de recherche
+    _available_fields = ()
+
+    @validator("fields")
+    def check_fields(cls, fields):
+        unknown = [field for field in fields or [] if field not in cls._available_fields]
+        if unknown:
+            raise ValueError(f"Champs inconnus : {', '.join(unknown)} (disponibles : {', '.join(cls._available_fields)})")
+        return fields
+
+class CodeSearchParams(ResultShapeParams):
+    _available_fields = CODE_FIELDS
     search: Optional[str] = None
     code_name: Optional[str] = None
+    date: Optional[str] = None  # AAAA-MM-JJ : articles dans leur version en vigueur à cette date
     champ: Optional[str] = Field(default="ALL")
     sort: Optional[str] = Field(default="PERTINENCE")
     type_recherche: Optional[str] = Field(default="TOUS_LES_MOTS_DANS_UN_CHAMP")
     page_size: Optional[int] = Field(default=10)
+    cursor: Optional[str] = None  # `next_cursor` d'une réponse précédente, avec les mêmes paramètres
     fetch_all: Optional[bool] = Field(default=False)
 
-class TexteLegalSearchParams(BaseModel):
+    _date = validator("date", allow_reuse=True)(check_iso_date)
+
+class TexteLegalSearchParams(ResultShapeParams):
+    _available_fields = TEXTE_LEGAL_FIELDS
     text_id: Optional[str] = None
     search: Optional[str] = None
     champ: Optional[str] = Field(default="ALL")
     type_recherche: Optional[str] = Field(default="TOUS_LES_MOTS_DANS_UN_CHAMP")
     page_size: Optional[int] = Field(default=10)
+    cursor: Optional[str] = None  # `next_cursor` d'une réponse précédente, avec les mêmes paramètres
 
-class JurisprudenceSearchParams(BaseModel):
+class JurisprudenceSearchParams(ResultShapeParams):
+    _available_fields = JURISPRUDENCE_FIELDS
     search: Optional[str] = None
     publication_bulletin: Optional[List[str]] = None  # <-- Correction ici
     sort: Optional[str] = Field(default="DATE_DESC")
     champ: Optional[str] = Field(default="ALL")
     type_recherche: Optional[str] = Field(default="TOUS_LES_MOTS_DANS_UN_CHAMP")
     page_size: Optional[int] = Field(default=10)
+    cursor: Optional[str] = None  # `next_cursor` d'une réponse précédente, avec les mêmes paramètres
     fetch_all: Optional[bool] = Field(default=False)
     juridiction_judiciaire: Optional[List[str]] = None  # Ajoute si besoin d'autres listes
 
+class BatchItem(BaseModel):
+    type: Literal["code", "texte_legal", "jurisprudence"]
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchSearchParams(BaseModel):
+    items: List[BatchItem] = Field(..., max_items=500)
+
+class ArticleIdsParams(BaseModel):
+    ids: List[str] = Field(..., max_items=500)
+    date: Optional[str] = None  # AAAA-MM-JJ : articles dans leur version en vigueur à cette date
+
+    _date = validator("date", allow_reuse=True)(check_iso_date)
+
 class Article(BaseModel):
     id: str
     numero: str
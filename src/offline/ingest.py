@@ -0,0 +1,237 @@
+"""
+Ingestion des archives DILA (fonds LEGI, JORF, CASS, JURI) dans le miroir local.
+Les archives .tar.gz sont lues en flux, sans extraction sur disque, et chaque document
+XML est analysé avec un parseur incrémental : les documents non indexés (structures,
+sections...) sont écartés dès leur balise racine.
+
+    python -m src.offline.ingest --db legifrance.db Freemium_legi_global_*.tar.gz
+    python -m src.offline.ingest --db legifrance.db LEGI_20240105-*.tar.gz CASS_*.tar.gz
+"""
+import argparse
+import logging
+import os
+import re
+import tarfile
+import time
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.transformers import LEGIFRANCE_URL
+from .store import TABLES, OfflineStore
+
+logger = logging.getLogger(__name__)
+
+# Listes des documents retirés du fond, publiées avec chaque archive incrémentale
+SUPPRESSION_LIST = re.compile(r"liste_suppression.*\.dat$")
+
+Document = Tuple[str, Dict[str, Any]]
+
+
+def _text(element: Optional[ET.Element], path: Optional[str] = None) -> Optional[str]:
+    """Texte d'un élément et de ses descendants (balises HTML du contenu retirées), espaces normalisés"""
+    if element is not None and path is not None:
+        element = element.find(path)
+    if element is None:
+        return None
+    text = " ".join("".join(element.itertext()).split())
+    return text or None
+
+
+def _section(texte: Optional[ET.Element]) -> Optional[str]:
+    """Intitulé de la subdivision la plus fine (livre, titre, chapitre...) contenant l'article"""
+    section = None
+    node = texte.find("TM") if texte is not None else None
+    while node is not None:
+        section = _text(node, "TITRE_TM") or section
+        node = node.find("TM")
+    return section
+
+
+def parse_article(root: ET.Element) -> Document:
+    """Article de code (fond LEGI) ou de texte non codifié (LEGI, JORF)"""
+    identifier = _text(root, "META/META_COMMUN/ID")
+    origine = _text(root, "META/META_COMMUN/ORIGINE")
+    meta = root.find("META/META_SPEC/META_ARTICLE")
+    numero = _text(meta, "NUM")
+    texte = root.find("CONTEXTE/TEXTE")
+    titre_txt = texte.find("TITRE_TXT") if texte is not None else None
+    titre_texte = (titre_txt.get("c_titre_court") if titre_txt is not None else None) or _text(titre_txt)
+    date_debut = _text(meta, "DATE_DEBUT")
+
+    if texte is not None and texte.get("nature") == "CODE":
+        return "code", {
+            "id": identifier,
+            "numero": numero,
+            "titre": f"Article {numero}" if numero else None,
+            "contenu": _text(root, "BLOC_TEXTUEL/CONTENU"),
+            "etat": _text(meta, "ETAT"),
+            "date_debut": date_debut,
+            "date_fin": _text(meta, "DATE_FIN"),
+            "date_maj": date_debut,
+            "nature": _text(root, "META/META_COMMUN/NATURE"),
+            "section": _section(texte),
+            "lien_officiel": f"{LEGIFRANCE_URL}/codes/article_lc/{identifier}",
+            "code_name": titre_texte,
+            "text_id": texte.get("cid"),
+        }
+    lien = f"{LEGIFRANCE_URL}/jorf/article_jo/{identifier}" if origine == "JORF" else f"{LEGIFRANCE_URL}/loda/article_lc/{identifier}"
+    return "texte_legal", {
+        "id": identifier,
+        "titre": " - ".join(part for part in (titre_texte, f"Article {numero}" if numero else None) if part),
+        "contenu": _text(root, "BLOC_TEXTUEL/CONTENU"),
+        "date_maj": date_debut,
+        "nature": texte.get("nature") if texte is not None else None,
+        "lien_officiel": lien,
+        "text_id": texte.get("cid") if texte is not None else None,
+    }
+
+
+def parse_texte_version(root: ET.Element) -> Document:
+    """Version d'un texte (loi, décret, arrêté...) : titre complet, visas et notes"""
+    identifier = _text(root, "META/META_COMMUN/ID")
+    origine = _text(root, "META/META_COMMUN/ORIGINE")
+    chronicle = root.find("META/META_SPEC/META_TEXTE_CHRONICLE")
+    version = root.find("META/META_SPEC/META_TEXTE_VERSION")
+    cid = _text(chronicle, "CID") or identifier
+    contenu = " ".join(part for part in (_text(root, "VISAS/CONTENU"), _text(root, "NOTA/CONTENU")) if part)
+    return "texte_legal", {
+        "id": identifier,
+        "titre": _text(version, "TITREFULL") or _text(version, "TITRE"),
+        "contenu": contenu or None,
+        "date_maj": _text(chronicle, "DERNIERE_MODIFICATION") or _text(chronicle, "DATE_PUBLI"),
+        "nature": _text(root, "META/META_COMMUN/NATURE"),
+        "lien_officiel": f"{LEGIFRANCE_URL}/jorf/id/{identifier}" if origine == "JORF" else f"{LEGIFRANCE_URL}/loda/id/{cid}",
+        "text_id": cid,
+    }
+
+
+def parse_decision(root: ET.Element) -> Document:
+    """Décision de l'ordre judiciaire (fonds CASS, JURI, INCA)"""
+    identifier = _text(root, "META/META_COMMUN/ID")
+    meta = root.find("META/META_SPEC/META_JURI")
+    sommaire = root.find("TEXTE/SOMMAIRE")
+    resume = [_text(ana) for ana in sommaire.iter("ANA")] if sommaire is not None else []
+    publication = root.find("META/META_SPEC/META_JURI_JUDI/PUBLI_BULL")
+    return "jurisprudence", {
+        "id": identifier,
+        "date": _text(meta, "DATE_DEC"),
+        "juridiction": _text(meta, "JURIDICTION"),
+        "numero": _text(root, "META/META_SPEC/META_JURI_JUDI/NUMEROS_AFFAIRES/NUMERO_AFFAIRE") or _text(meta, "NUMERO"),
+        "theme_principal": _text(sommaire, "SCT"),
+        "resume": " ".join(part for part in resume if part) or None,
+        "texte_integral": _text(root, "TEXTE/BLOC_TEXTUEL/CONTENU"),
+        "lien_officiel": f"{LEGIFRANCE_URL}/juri/id/{identifier}",
+        "publie": "T" if publication is not None and publication.get("publie") == "oui" else "F",
+    }
+
+
+# Balise racine du document -> analyse ; les autres documents sont ignorés
+PARSERS: Dict[str, Callable[[ET.Element], Document]] = {
+    "ARTICLE": parse_article,
+    "TEXTE_VERSION": parse_texte_version,
+    "TEXTE_JURI_JUDI": parse_decision,
+}
+
+
+def parse_document(source: IO[bytes]) -> Optional[Document]:
+    """
+    Analyse un document XML DILA de manière incrémentale
+    :param source: Fichier XML ouvert en binaire
+    :return: Tuple (préfixe de recherche, document) ou None si le type n'est pas indexé
+    """
+    events = ET.iterparse(source, events=("start",))
+    _, root = next(events)
+    parser = PARSERS.get(root.tag)
+    if parser is None:
+        return None
+    for _ in events:
+        pass
+    return parser(root)
+
+
+def iter_sources(paths: Iterable[str]) -> Iterator[Tuple[str, IO[bytes]]]:
+    """
+    Parcourt les fichiers des archives (.tar, .tar.gz, .tgz), répertoires ou fichiers XML
+    :return: Tuples (nom du fichier, fichier ouvert)
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                for name in sorted(names):
+                    with open(os.path.join(directory, name), "rb") as source:
+                        yield os.path.join(directory, name), source
+        elif tarfile.is_tarfile(path):
+            # Lecture en flux : les membres sont traités dans l'ordre de l'archive
+            with tarfile.open(path, "r|*") as archive:
+                for member in archive:
+                    if member.isfile():
+                        yield member.name, archive.extractfile(member)
+        else:
+            with open(path, "rb") as source:
+                yield path, source
+
+
+def ingest(store: OfflineStore, paths: Iterable[str], batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Charge des archives DILA dans le miroir local ; les documents déjà présents sont
+    remplacés et les listes de suppression appliquées
+    :param store: Miroir local
+    :param paths: Archives, répertoires ou fichiers XML, dans l'ordre de publication
+    :param batch_size: Documents écrits par transaction
+    :return: Nombre de documents indexés par préfixe, ignorés, supprimés et en erreur
+    """
+    stats = {prefix: 0 for prefix in TABLES}
+    stats.update(skipped=0, deleted=0, errors=0)
+    batches: Dict[str, List[Dict[str, Any]]] = {prefix: [] for prefix in TABLES}
+
+    def flush() -> None:
+        for prefix, batch in batches.items():
+            if batch:
+                stats[prefix] += store.upsert(prefix, batch)
+                batch.clear()
+
+    for name, source in iter_sources(paths):
+        if SUPPRESSION_LIST.search(name):
+            # Chemins des documents retirés : l'identifiant est le dernier segment
+            flush()
+            ids = [os.path.basename(line.strip()) for line in source.read().decode("utf-8").splitlines() if line.strip()]
+            stats["deleted"] += store.delete(identifier.rsplit(".", 1)[0] for identifier in ids)
+            continue
+        if not name.endswith(".xml"):
+            continue
+        try:
+            document = parse_document(source)
+        except ET.ParseError as e:
+            stats["errors"] += 1
+            logger.warning(f"Document illisible ignoré {name} : {e}")
+            continue
+        if document is None or not document[1].get("id"):
+            stats["skipped"] += 1
+            continue
+        prefix, record = document
+        batches[prefix].append(record)
+        if len(batches[prefix]) >= batch_size:
+            flush()
+    flush()
+    store.optimize()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+", help="Archives DILA, répertoires ou fichiers XML")
+    parser.add_argument("--db", default=os.getenv("LEGIFRANCE_OFFLINE_DB", "legifrance.db"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    store = OfflineStore(args.db)
+    start = time.perf_counter()
+    stats = ingest(store, args.paths, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"{args.db} : {stats} en {elapsed:.1f}s ; contenu : {store.get_stats()}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
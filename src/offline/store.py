@@ -0,0 +1,285 @@
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.pagination import MAX_RESULTS
+from ..utils.transformers import CODE_FIELDS, JURISPRUDENCE_FIELDS, SOURCE, TEXTE_LEGAL_FIELDS
+
+# Tokenisation insensible à la casse et aux accents (« délai » trouve « delai »)
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Par préfixe de recherche : table, colonnes stockées, colonnes indexées en plein texte,
+# colonne de date pour le tri et champs des enregistrements renvoyés
+TABLES: Dict[str, Dict[str, Any]] = {
+    "code": {
+        "table": "code_articles",
+        "columns": (
+            "id", "numero", "titre", "contenu", "etat", "date_debut", "date_fin", "date_maj",
+            "nature", "section", "lien_officiel", "code_name", "text_id"
+        ),
+        "indexed": ("numero", "titre", "section", "contenu"),
+        "date": "date_debut",
+        "fields": CODE_FIELDS,
+    },
+    "texte_legal": {
+        "table": "textes",
+        "columns": ("id", "titre", "contenu", "date_maj", "nature", "lien_officiel", "text_id"),
+        "indexed": ("titre", "contenu"),
+        "date": "date_maj",
+        "fields": TEXTE_LEGAL_FIELDS,
+    },
+    "jurisprudence": {
+        "table": "decisions",
+        "columns": (
+            "id", "date", "juridiction", "numero", "theme_principal", "resume",
+            "texte_integral", "lien_officiel", "publie"
+        ),
+        "indexed": ("numero", "theme_principal", "resume", "texte_integral"),
+        "date": "date",
+        "fields": JURISPRUDENCE_FIELDS,
+    },
+}
+
+# Champ de recherche PISTE -> colonnes interrogées (toutes les colonnes indexées sinon)
+CHAMP_COLUMNS = {
+    "TITLE": ("titre",),
+    "NUM_ARTICLE": ("numero",),
+    "NUM_DEC": ("numero",),
+    "ARTICLE": ("contenu",),
+    "TEXTE": ("contenu", "texte_integral"),
+    "RESUMES": ("resume", "theme_principal"),
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def match_expression(text: str, type_recherche: str = "TOUS_LES_MOTS_DANS_UN_CHAMP", columns: Sequence[str] = ()) -> Optional[str]:
+    """
+    Traduit une recherche PISTE en expression FTS5 ; les mots sont mis entre guillemets,
+    la syntaxe FTS5 saisie par l'utilisateur n'est donc jamais interprétée
+    :param text: Texte recherché
+    :param type_recherche: 'EXACTE' (expression), 'UN_DES_MOTS' (l'un des mots) ou tous les mots
+    :param columns: Colonnes auxquelles restreindre la recherche
+    :return: Expression MATCH ou None si le texte ne contient aucun mot
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    if type_recherche == "EXACTE":
+        expression = '"' + " ".join(words) + '"'
+    elif type_recherche == "UN_DES_MOTS":
+        expression = " OR ".join(f'"{word}"' for word in words)
+    else:
+        expression = " AND ".join(f'"{word}"' for word in words)
+    if columns:
+        expression = "{" + " ".join(columns) + "} : (" + expression + ")"
+    return expression
+
+
+class OfflineStore:
+    """
+    Miroir local des fonds DILA (LEGI, JORF, CASS, JURI) dans SQLite, avec un index
+    plein texte FTS5 par type de document. Les recherches renvoient les mêmes
+    enregistrements que les transformations des réponses PISTE.
+    """
+
+    def __init__(self, path: str):
+        """
+        Ouvre (et crée au besoin) la base du miroir
+        :param path: Chemin du fichier SQLite
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for spec in TABLES.values():
+            self._create_table(spec)
+
+    def _create_table(self, spec: Dict[str, Any]) -> None:
+        table, indexed = spec["table"], ", ".join(spec["indexed"])
+        columns = ", ".join(f"{column} TEXT" for column in spec["columns"][1:])
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (rowid INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, {columns})"
+        )
+        self.conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5("
+            f"{indexed}, content='{table}', content_rowid='rowid', tokenize='{TOKENIZER}')"
+        )
+        # Index plein texte maintenu par déclencheurs (table de contenu externe)
+        new = ", ".join(f"new.{column}" for column in spec["indexed"])
+        old = ", ".join(f"old.{column}" for column in spec["indexed"])
+        self.conn.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts (rowid, {indexed}) VALUES (new.rowid, {new});
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {indexed}) VALUES ('delete', old.rowid, {old});
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON {table} BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {indexed}) VALUES ('delete', old.rowid, {old});
+                INSERT INTO {table}_fts (rowid, {indexed}) VALUES (new.rowid, {new});
+            END;
+        """)
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{spec['date']} ON {table} ({spec['date']})")
+
+    def upsert(self, prefix: str, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insère ou remplace des documents (même identifiant) dans une seule transaction
+        :param prefix: 'code', 'texte_legal' ou 'jurisprudence'
+        :param records: Documents, avec les colonnes de la table
+        :return: Nombre de documents écrits
+        """
+        spec = TABLES[prefix]
+        columns = spec["columns"]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        rows = [tuple(record.get(column) for column in columns) for record in records]
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                f"INSERT INTO {spec['table']} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                rows
+            )
+        return len(rows)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """
+        Supprime des documents retirés des fonds (listes de suppression DILA)
+        :param ids: Identifiants Légifrance
+        :return: Nombre de documents supprimés
+        """
+        ids = [(identifier,) for identifier in ids]
+        deleted = 0
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for spec in TABLES.values():
+                cursor = self.conn.executemany(f"DELETE FROM {spec['table']} WHERE id = ?", ids)
+                deleted += cursor.rowcount
+        return deleted
+
+    def optimize(self) -> None:
+        """Fusionne les segments des index plein texte après une ingestion"""
+        for spec in TABLES.values():
+            self.conn.execute(f"INSERT INTO {spec['table']}_fts ({spec['table']}_fts) VALUES ('optimize')")
+
+    def _filters(self, prefix: str, params: dict) -> Tuple[List[str], List[Any]]:
+        clauses: List[str] = []
+        values: List[Any] = []
+        if prefix == "code":
+            if params.get("date"):
+                # Versions en vigueur à la date demandée, comme le fond CODE_DATE à cette date
+                clauses.append("t.date_debut <= ? AND COALESCE(t.date_fin, '2999-01-01') > ?")
+                values.extend([params["date"], params["date"]])
+            else:
+                # Seuls les articles en vigueur, comme le fond CODE_DATE à la date du jour
+                clauses.append("t.etat LIKE 'VIGUEUR%'")
+            if params.get("code_name"):
+                clauses.append("t.code_name = ? COLLATE NOCASE")
+                values.append(params["code_name"].strip())
+        elif prefix == "texte_legal":
+            if params.get("text_id"):
+                clauses.append("t.text_id = ?")
+                values.append(params["text_id"].strip())
+        elif prefix == "jurisprudence":
+            bulletin = [value.upper() for value in params.get("publication_bulletin") or []]
+            if bulletin and not ("T" in bulletin and "F" in bulletin):
+                clauses.append("t.publie = ?")
+                values.append("T" if "T" in bulletin else "F")
+            juridictions = params.get("juridiction_judiciaire") or []
+            if juridictions:
+                clauses.append(f"t.juridiction COLLATE NOCASE IN ({', '.join('?' * len(juridictions))})")
+                values.extend(juridictions)
+        return clauses, values
+
+    def search(self, prefix: str, params: dict, max_results: int = MAX_RESULTS) -> Dict[str, Any]:
+        """
+        Recherche dans le miroir local avec la sémantique des paramètres PISTE
+        (search, champ, type_recherche, sort, page_size, page_number, fetch_all et filtres)
+        :param prefix: 'code', 'texte_legal' ou 'jurisprudence'
+        :param params: Paramètres de la recherche
+        :param max_results: Plafond de résultats avec `fetch_all`
+        :return: Enregistrements transformés (`results`) et nombre total de résultats
+        """
+        spec = TABLES[prefix]
+        table = spec["table"]
+        clauses, values = self._filters(prefix, params)
+
+        join = ""
+        order = f"t.{spec['date']} DESC"
+        if params.get("search"):
+            columns = tuple(
+                column for column in CHAMP_COLUMNS.get((params.get("champ") or "ALL").upper(), ())
+                if column in spec["indexed"]
+            )
+            expression = match_expression(
+                params["search"], (params.get("type_recherche") or "").upper(), columns
+            )
+            if expression is None:
+                return {"results": [], "totalResultNumber": 0}
+            join = f"JOIN {table}_fts f ON f.rowid = t.rowid"
+            clauses.insert(0, f"{table}_fts MATCH ?")
+            values.insert(0, expression)
+            order = "f.rank"
+
+        sort = (params.get("sort") or "").upper()
+        if sort.startswith("DATE"):
+            order = f"t.{spec['date']} {'ASC' if sort.endswith('ASC') else 'DESC'}"
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        total = self.conn.execute(f"SELECT COUNT(*) FROM {table} t {join} {where}", values).fetchone()[0]
+        offset = 0
+        if params.get("fetch_all"):
+            limit = max_results
+        else:
+            limit = params.get("page_size") or 10
+            offset = ((params.get("page_number") or 1) - 1) * limit
+
+        fields = spec["fields"]
+        selected = [field for field in fields if field != "source"]
+        cursor = self.conn.execute(
+            f"SELECT {', '.join('t.' + field for field in selected)} FROM {table} t {join} {where} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            values + [limit, offset]
+        )
+        results = []
+        for row in cursor:
+            record = dict(zip(selected, row))
+            results.append({field: SOURCE if field == "source" else record[field] for field in fields})
+        response = {"results": results, "totalResultNumber": total}
+        if params.get("fetch_all"):
+            response["truncated"] = total > len(results)
+        return response
+
+    def get_records(self, prefix: str, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Documents du miroir par identifiant
+        :param prefix: 'code', 'texte_legal' ou 'jurisprudence'
+        :param ids: Identifiants Légifrance
+        :return: Enregistrements transformés des identifiants présents, par identifiant
+        """
+        if not ids:
+            return {}
+        spec = TABLES[prefix]
+        fields = spec["fields"]
+        selected = [field for field in fields if field != "source"]
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(selected)} FROM {spec['table']} WHERE id IN ({', '.join('?' * len(ids))})",
+            list(ids)
+        )
+        records = {}
+        for row in cursor:
+            record = dict(zip(selected, row))
+            records[record["id"]] = {field: SOURCE if field == "source" else record[field] for field in fields}
+        return records
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            **{
+                prefix: self.conn.execute(f"SELECT COUNT(*) FROM {spec['table']}").fetchone()[0]
+                for prefix, spec in TABLES.items()
+            }
+        }
+
+    def close(self) -> None:
+        self.conn.close()
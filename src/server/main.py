@@ -1,94 +1,448 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security.api_key import APIKeyHeader
-from ..models.schemas import CodeSearchParams, TexteLegalSearchParams, JurisprudenceSearchParams
-from ..utils.legifrance_client import LegifranceClient
-from ..utils.transformers import (
-    transform_code_response,
-    transform_texte_legal_response,
-    transform_jurisprudence_response
+from pydantic import ValidationError
+from ..models.schemas import (
+    ArticleIdsParams,
+    BatchSearchParams,
+    CodeSearchParams,
+    TexteLegalSearchParams,
+    JurisprudenceSearchParams
 )
-from typing import Dict, Any
+from ..utils.legifrance_client import ID_TYPES, LegifranceClient, UpstreamError
+from ..utils.metrics import CONTENT_TYPE, REGISTRY
+from ..utils.rate_limit import TokenBucket
+from ..utils.scheduler import ANONYMOUS, CALLER, Caller, batch_priority
+from ..utils.serialization import orjson_available
+from ..utils.transformers import JURISPRUDENCE_FIELDS
+from .middleware import CompressionMiddleware, MetricsMiddleware, brotli_available
+from .responses import EXPORT_FORMATS, FastJSONResponse, export_response, response_metadata, results_response
+from .settings import ApiKeyPolicy, Settings, configure_logging, load_settings
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import hashlib
+import httpx
 import logging
+import math
+import time
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configuration de l'authentification
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key")
 
-app = FastAPI(
-    title="API Légifrance",
-    description="API pour accéder aux données juridiques françaises",
-    version="1.0.0",
-    openapi_tags=[
-        {"name": "legifrance", "description": "Opérations sur les données juridiques"}
-    ]
+API_KEY_REJECTED = REGISTRY.counter(
+    "legifrance_api_key_rejected_total", "Requêtes refusées (429) par le débit de leur clé d'API", ["key"]
 )
 
-# Configuration CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+STARTUP_DURATION = REGISTRY.gauge(
+    "legifrance_startup_duration_seconds",
+    "Durée du démarrage par phase (create_app : construction de l'application, startup : client, pool, préchauffage)",
+    ["phase"]
 )
 
-# Client Légifrance
-legifrance_client = LegifranceClient()
+# Recherches par lot : modèle de paramètres et clé de réponse par type
+BATCH_TYPES = {
+    "code": (CodeSearchParams, "articles"),
+    "texte_legal": (TexteLegalSearchParams, "textes"),
+    "jurisprudence": (JurisprudenceSearchParams, "decisions")
+}
 
-@app.post("/tools/rechercher_code", tags=["legifrance"])
+router = APIRouter()
+
+
+class Services:
+    """
+    Client Légifrance d'une application, construit au premier usage (démarrage du worker
+    ou première requête) et non à l'import : cache, magasins et pool de connexions suivent
+    """
+
+    def __init__(self, settings: Settings, http_client: Optional[httpx.AsyncClient] = None):
+        self.settings = settings
+        self.http_client = http_client
+        self.started = False
+        self.startup_seconds: Dict[str, float] = {}
+        self._client: Optional[LegifranceClient] = None
+        # Débit de chaque clé d'API déclarée, par nom
+        self.key_limits: Dict[str, TokenBucket] = {}
+        # Débit des clés non déclarées, par empreinte, pour les plus récemment vues
+        self.anonymous_limits: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    @property
+    def client(self) -> LegifranceClient:
+        if self._client is None:
+            self._client = LegifranceClient(
+                http_client=self.http_client,
+                client_id=self.settings.client_id,
+                client_secret=self.settings.client_secret,
+                base_url=self.settings.api_endpoint,
+                token_url=self.settings.token_url
+            )
+        return self._client
+
+    def identify(self, api_key: str) -> Tuple[Caller, TokenBucket]:
+        """
+        Appelant et limiteur de débit d'une clé d'API. Sans clés déclarées, toute clé est
+        acceptée : elle a son propre débit (parmi les `anonymous_keys_tracked` plus récentes),
+        mais partage l'appelant « anonyme » dans la file équitable, les statistiques et les
+        métriques, dont le nombre de séries reste ainsi borné.
+        :raises HTTPException: 401 si des clés sont déclarées et que celle-ci n'en fait pas partie
+        """
+        settings = self.settings
+        policy = settings.api_keys.get(api_key)
+        if policy is not None:
+            limit = self.key_limits.get(policy.name)
+            if limit is None:
+                limit = self.key_limits[policy.name] = self._limit(policy.rate, policy.burst)
+            return Caller(policy.name, policy.priority, policy.weight), limit
+        if settings.api_keys:
+            raise HTTPException(status_code=401, detail="Clé d'API inconnue")
+
+        digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        limit = self.anonymous_limits.get(digest)
+        if limit is None:
+            limit = self.anonymous_limits[digest] = self._limit(None, None)
+            while len(self.anonymous_limits) > settings.anonymous_keys_tracked:
+                self.anonymous_limits.popitem(last=False)
+        self.anonymous_limits.move_to_end(digest)
+        return Caller(ANONYMOUS, settings.default_priority), limit
+
+    def _limit(self, rate: Optional[float], burst: Optional[float]) -> TokenBucket:
+        """Limiteur d'une clé : son débit déclaré, à défaut celui par défaut"""
+        rate = rate if rate is not None else self.settings.api_key_rate
+        burst = burst if burst is not None else self.settings.api_key_burst
+        return TokenBucket(rate, burst or None)
+
+    def readiness(self) -> Dict[str, Any]:
+        """État de préparation : démarré et, si `ready_after_warmup`, cache préchauffé"""
+        warmed = self._client is not None and self._client.warmer.warmed.is_set()
+        ready = self.started and (warmed or not self.settings.ready_after_warmup or not self._client.warmup_enabled)
+        return {"ready": ready, "started": self.started, "warmed": warmed, "startup_seconds": self.startup_seconds}
+
+    async def startup(self) -> None:
+        start = time.perf_counter()
+        client = self.client
+        # Pool de connexions partagé vers PISTE (keep-alive, HTTP/2 optionnel)
+        await client.start()
+        # Premier passage du préchauffage attendu au plus `warmup_startup_timeout` secondes
+        await client.warmer.wait_warmed(self.settings.warmup_startup_timeout)
+        REGISTRY.add_collector(client.collect_metrics)
+        self.started = True
+        self.startup_seconds["startup"] = time.perf_counter() - start
+        STARTUP_DURATION.set(self.startup_seconds["startup"], "startup")
+        phases = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.startup_seconds.items())
+        logger.info(f"Worker prêt en {sum(self.startup_seconds.values()):.3f}s ({phases})")
+        # Accélérations optionnelles : sans elles, repli silencieux sur json et gzip
+        logger.info(
+            "Sérialisation : %s ; compression : %s",
+            "orjson" if orjson_available() else "json (module standard, installer orjson)",
+            "brotli, gzip" if brotli_available() else "gzip (installer brotli)"
+        )
+
+    async def shutdown(self) -> None:
+        self.started = False
+        if self._client is not None:
+            REGISTRY.remove_collector(self._client.collect_metrics)
+            await self._client.close()
+
+
+def get_services(request: Request) -> Services:
+    return request.app.state.services
+
+
+def get_client(request: Request) -> LegifranceClient:
+    return request.app.state.services.client
+
+
+async def get_caller(request: Request, api_key: str = Depends(API_KEY_HEADER)) -> Caller:
+    """
+    Identifie l'appelant par sa clé d'API, applique le débit de la clé (429 au-delà) et
+    rattache les appels amont de la requête à la clé (file équitable, attente par clé)
+    """
+    caller, limit = request.app.state.services.identify(api_key)
+    if not limit.try_acquire():
+        API_KEY_REJECTED.inc(caller.name)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Débit de la clé d'API « {caller.name} » dépassé ({limit.rate:g} requêtes/s)",
+            headers={"Retry-After": str(math.ceil(limit.retry_after()))}
+        )
+    CALLER.set(caller)
+    request.state.key_limit = limit
+    return caller
+
+
+def charge_items(request: Request, items: int) -> None:
+    """
+    Débite du débit de la clé les éléments d'une requête groupée au-delà du premier
+    (déjà compté par `get_caller`) : un lot de 500 recherches coûte 500 requêtes
+    """
+    if items > 1:
+        request.state.key_limit.charge(items - 1)
+
+
+def create_app(settings: Optional[Settings] = None, http_client: Optional[httpx.AsyncClient] = None) -> FastAPI:
+    """
+    Construit l'application. Rien n'est fait à l'import du module : le client Légifrance
+    (et avec lui cache, magasins et pool de connexions) est construit au démarrage du
+    worker ou à la première requête.
+    :param settings: Configuration (par défaut : `.env` et variables LEGIFRANCE_*)
+    :param http_client: Client HTTP vers PISTE (tests, intégration), créé au démarrage si None
+    :return: Application FastAPI
+    """
+    start = time.perf_counter()
+    settings = settings or load_settings()
+    configure_logging(settings.log_level)
+
+    app = FastAPI(
+        title="API Légifrance",
+        description="API pour accéder aux données juridiques françaises",
+        version="1.0.0",
+        default_response_class=FastJSONResponse,
+        openapi_tags=[
+            {"name": "legifrance", "description": "Opérations sur les données juridiques"}
+        ]
+    )
+
+    # Configuration CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    # Compression brotli/gzip négociée des réponses au-delà du seuil
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compress_min_size,
+        gzip_level=settings.compress_gzip_level,
+        brotli_quality=settings.compress_brotli_quality
+    )
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+
+    services = Services(settings, http_client)
+    app.state.services = services
+    app.add_event_handler("startup", services.startup)
+    app.add_event_handler("shutdown", services.shutdown)
+
+    services.startup_seconds["create_app"] = time.perf_counter() - start
+    STARTUP_DURATION.set(services.startup_seconds["create_app"], "create_app")
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    # `uvicorn src.server.main:app` : l'application est construite au premier accès, pas à
+    # l'import (équivalent : `uvicorn --factory src.server.main:create_app`)
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def http_error(e: Exception) -> HTTPException:
+    """
+    Traduit une erreur de recherche en réponse HTTP : paramètre invalide (curseur...) -> 400,
+    quota PISTE atteint -> 429 avec Retry-After, circuit ouvert -> 503, délai dépassé -> 504,
+    requête refusée -> 400, autre erreur amont -> 502
+    """
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    if not isinstance(e, UpstreamError):
+        return HTTPException(status_code=500, detail=str(e))
+    if e.status_code == 429:
+        headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after is not None else None
+        return HTTPException(status_code=429, detail="Quota Légifrance atteint, réessayez plus tard", headers=headers)
+    if e.reason == "circuit_open":
+        return HTTPException(status_code=503, detail=str(e))
+    if e.reason == "timeout":
+        return HTTPException(status_code=504, detail=str(e))
+    if e.status_code is not None and 400 <= e.status_code < 500 and e.status_code not in (401, 403):
+        return HTTPException(status_code=400, detail=str(e))
+    return HTTPException(status_code=502, detail=str(e))
+
+@router.get("/health", tags=["monitoring"])
+async def health() -> Dict[str, Any]:
+    """
+    Sonde de vivacité : le processus répond.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready", tags=["monitoring"])
+async def ready(services: Services = Depends(get_services)) -> Response:
+    """
+    Sonde de préparation : 200 une fois le worker démarré (client, pool de connexions et,
+    si LEGIFRANCE_READY_AFTER_WARMUP, premier passage du préchauffage), 503 avant.
+    """
+    readiness = services.readiness()
+    return FastJSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+@router.get("/stats", tags=["monitoring"])
+async def stats(legifrance_client: LegifranceClient = Depends(get_client)) -> Dict[str, Any]:
+    """
+    Statistiques du cache, des requêtes regroupées et des renouvellements du token OAuth.
+    """
+    return {
+        "cache": legifrance_client.cache.get_stats(),
+        "coalescing": legifrance_client.inflight.get_stats(),
+        "warmup": legifrance_client.warmer.get_stats(),
+        "prefetch": legifrance_client.prefetch_stats,
+        "versions": legifrance_client.versions.get_stats(),
+        "offline": legifrance_client.offline.get_stats() if legifrance_client.offline is not None else None,
+        "circuit_breakers": {
+            endpoint: breaker.get_stats() for endpoint, breaker in legifrance_client.breakers.items()
+        },
+        "token": legifrance_client.get_token_stats(),
+        "scheduler": legifrance_client.scheduler.get_stats()
+    }
+
+@router.get("/metrics", tags=["monitoring"])
+async def metrics() -> Response:
+    """
+    Métriques au format texte Prometheus.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@router.post("/tools/rechercher_code", tags=["legifrance"])
 async def rechercher_code(
     params: CodeSearchParams,
-    api_key: str = Depends(API_KEY_HEADER)
-) -> Dict[str, Any]:
+    caller: Caller = Depends(get_caller),
+    legifrance_client: LegifranceClient = Depends(get_client)
+) -> Response:
     """
     Recherche dans les codes juridiques français.
     """
     try:
-        logger.info(f"Recherche dans les codes avec paramètres: {params}")
-        api_response = await legifrance_client.rechercher_code(params.dict())
-        logger.info(f"Réponse brute API: {api_response}")  # <-- Ajout du log ici
-        articles = transform_code_response(api_response)
-        return {"articles": articles}
+        logger.debug("Recherche dans les codes avec paramètres: %s", params)
+        results, meta = await legifrance_client.rechercher_serialise("code", params.dict())
+        return results_response("articles", results, meta)
     except Exception as e:
         logger.error(f"Erreur lors de la recherche dans les codes: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
-@app.post("/tools/rechercher_texte_legal", tags=["legifrance"])
+@router.post("/tools/rechercher_texte_legal", tags=["legifrance"])
 async def rechercher_texte_legal(
     params: TexteLegalSearchParams,
-    api_key: str = Depends(API_KEY_HEADER)
-) -> Dict[str, Any]:
+    caller: Caller = Depends(get_caller),
+    legifrance_client: LegifranceClient = Depends(get_client)
+) -> Response:
     """
     Recherche dans les textes légaux.
     """
     try:
-        logger.info(f"Recherche de texte légal avec paramètres: {params}")
-        api_response = await legifrance_client.rechercher_texte_legal(params.dict())
-        logger.info(f"Réponse brute API: {api_response}")  # <-- Ajout du log ici
-        textes = transform_texte_legal_response(api_response)
-        return {"textes": textes}
+        logger.debug("Recherche de texte légal avec paramètres: %s", params)
+        results, meta = await legifrance_client.rechercher_serialise("texte_legal", params.dict())
+        return results_response("textes", results, meta)
     except Exception as e:
         logger.error(f"Erreur lors de la recherche de texte légal: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
-@app.post("/tools/rechercher_jurisprudence_judiciaire", tags=["legifrance"])
+@router.post("/tools/rechercher_jurisprudence_judiciaire", tags=["legifrance"])
 async def rechercher_jurisprudence_judiciaire(
     params: JurisprudenceSearchParams,
-    api_key: str = Depends(API_KEY_HEADER)
-) -> Dict[str, Any]:
+    caller: Caller = Depends(get_caller),
+    legifrance_client: LegifranceClient = Depends(get_client)
+) -> Response:
     """
     Recherche dans la jurisprudence judiciaire.
     """
     try:
-        logger.info(f"Recherche de jurisprudence avec paramètres: {params}")
-        api_response = await legifrance_client.rechercher_jurisprudence(params.dict())
-        logger.info(f"Réponse brute API: {api_response}")  # <-- Ajout du log ici
-        decisions = transform_jurisprudence_response(api_response)
-        return {"decisions": decisions}
+        logger.debug("Recherche de jurisprudence avec paramètres: %s", params)
+        results, meta = await legifrance_client.rechercher_serialise("jurisprudence", params.dict())
+        return results_response("decisions", results, meta)
     except Exception as e:
         logger.error(f"Erreur lors de la recherche de jurisprudence: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+@router.post("/tools/exporter_jurisprudence", tags=["legifrance"])
+async def exporter_jurisprudence(
+    params: JurisprudenceSearchParams,
+    export_format: str = Query("ndjson", alias="format", regex=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    caller: Caller = Depends(get_caller),
+    legifrance_client: LegifranceClient = Depends(get_client)
+) -> Response:
+    """
+    Exporte toutes les décisions d'une recherche de jurisprudence en NDJSON ou CSV
+    (`?format=csv`), en flux : les pages sont envoyées à mesure qu'elles arrivent de
+    Légifrance, la mémoire utilisée ne dépend pas du nombre de résultats. Le nombre total
+    de résultats est donné par l'en-tête `X-Total-Count` (`X-Truncated` au-delà de la limite).
+    """
+    logger.debug("Export de jurisprudence (%s) avec paramètres: %s", export_format, params)
+    pages = legifrance_client.exporter_jurisprudence(params.dict())
+    try:
+        # Première page attendue avant de répondre : une erreur amont donne encore un statut HTTP
+        first_page = await pages.__anext__()
+    except Exception as e:
+        await pages.aclose()
+        logger.error(f"Erreur lors de l'export de jurisprudence: {e}")
+        raise http_error(e)
+    columns = [field for field in JURISPRUDENCE_FIELDS if field == "id" or not params.fields or field in params.fields]
+    return export_response(first_page, pages, export_format, columns, "jurisprudence")
+
+@router.post("/tools/batch", tags=["legifrance"])
+async def batch(
+    params: BatchSearchParams,
+    request: Request,
+    caller: Caller = Depends(get_caller),
+    services: Services = Depends(get_services)
+) -> Dict[str, Any]:
+    """
+    Exécute un lot de recherches (codes, textes légaux, jurisprudence) en une seule requête.
+    Les résultats sont renvoyés dans l'ordre des éléments, avec une erreur par élément en échec.
+    """
+    results = [None] * len(params.items)
+    requests = []
+    positions = []
+    for position, item in enumerate(params.items):
+        model, _ = BATCH_TYPES[item.type]
+        try:
+            requests.append((item.type, model(**item.params).dict()))
+            positions.append(position)
+        except ValidationError as e:
+            results[position] = {"type": item.type, "error": str(e)}
+
+    charge_items(request, len(params.items))
+    # Jusqu'à 500 appels amont par requête : classe `batch` de la file équitable
+    with batch_priority():
+        responses = await services.client.rechercher_lot(requests, concurrency=services.settings.batch_concurrency)
+    for position, (prefix, _), response in zip(positions, requests, responses):
+        if isinstance(response, Exception):
+            logger.error(f"Erreur lors de la recherche par lot ({prefix}): {response}")
+            results[position] = {"type": prefix, "error": str(response)}
+        else:
+            results[position] = {
+                "type": prefix, BATCH_TYPES[prefix][1]: response["results"], **response_metadata(response)
+            }
+    return {"results": results}
+
+@router.post("/tools/get_articles", tags=["legifrance"])
+async def get_articles(
+    params: ArticleIdsParams,
+    request: Request,
+    caller: Caller = Depends(get_caller),
+    services: Services = Depends(get_services)
+) -> Dict[str, Any]:
+    """
+    Consulte des articles (LEGIARTI, JORFARTI) et des décisions (JURITEXT) par identifiant,
+    les articles dans leur version en vigueur à `date` si elle est donnée.
+    Les documents déjà vus dans une recherche sont servis depuis le cache ; les identifiants
+    en échec sont renvoyés dans `errors`.
+    """
+    logger.debug("Consultation de %d documents", len(params.ids))
+    charge_items(request, len(params.ids))
+    with batch_priority():
+        documents = await services.client.get_articles(
+            params.ids, concurrency=services.settings.batch_concurrency, date=params.date
+        )
+    response: Dict[str, Any] = {"articles": [], "decisions": [], "errors": {}}
+    for identifier, document in documents.items():
+        if isinstance(document, Exception):
+            logger.error(f"Erreur lors de la consultation de {identifier}: {document}")
+            response["errors"][identifier] = str(document)
+        elif ID_TYPES[identifier[:8]] == "article":
+            response["articles"].append(document)
+        else:
+            response["decisions"].append(document)
+    return response
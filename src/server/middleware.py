@@ -0,0 +1,189 @@
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..utils.metrics import REGISTRY
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "legifrance_http_requests_total", "Requêtes HTTP reçues", ["route", "method", "status"]
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "legifrance_http_request_duration_seconds", "Durée de traitement des requêtes HTTP", ["route"]
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "legifrance_http_requests_in_flight", "Requêtes HTTP en cours de traitement"
+)
+
+HTTP_COMPRESSED = REGISTRY.counter(
+    "legifrance_http_compressed_responses_total", "Réponses HTTP compressées par encodage", ["encoding"]
+)
+
+# Types de contenu compressés (les autres sont transmis tels quels)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def brotli_available() -> bool:
+    """Indique si le paquet optionnel `brotli` est installé"""
+    return brotli is not None
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Choisit l'encodage de la réponse selon l'en-tête Accept-Encoding : brotli s'il est
+    accepté et installé, sinon gzip
+    :return: 'br', 'gzip' ou None (réponse non compressée)
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, parameters = part.strip().partition(";")
+        quality = 1.0
+        parameters = parameters.strip()
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool = False) -> bytes:
+        """Compresse un morceau ; les morceaux intermédiaires sont vidés pour partir sans attendre"""
+        if self._brotli is not None:
+            chunk = self._brotli.process(data)
+            return chunk + (self._brotli.finish() if final else self._brotli.flush())
+        chunk = self._zlib.compress(data)
+        return chunk + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI compressant les réponses JSON et texte (brotli ou gzip, selon
+    Accept-Encoding) au-delà de `minimum_size` octets. Les réponses en flux sont
+    compressées morceau par morceau.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        """
+        :param minimum_size: Taille en dessous de laquelle une réponse n'est pas compressée
+        :param gzip_level: Niveau de compression gzip (1 à 9)
+        :param brotli_quality: Qualité brotli (0 à 11) ; 4 compresse mieux que gzip 6 pour un coût comparable
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            start = state["start"]
+            if start is not None:
+                state["start"] = None
+                headers = MutableHeaders(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                compressible = (
+                    "content-encoding" not in headers
+                    and content_type.startswith(COMPRESSIBLE_TYPES)
+                    and (more_body or len(body) >= self.minimum_size)
+                )
+                if not compressible:
+                    state["passthrough"] = True
+                    if content_type.startswith(COMPRESSIBLE_TYPES):
+                        headers.add_vary_header("Accept-Encoding")
+                    await send(start)
+                    await send(message)
+                    return
+                state["compressor"] = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                HTTP_COMPRESSED.inc(encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(start)
+                else:
+                    body = state["compressor"].compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+            await send({
+                "type": "http.response.body",
+                "body": state["compressor"].compress(body, final=not more_body),
+                "more_body": more_body
+            })
+
+        await self.app(scope, receive, send_compressed)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI mesurant la latence, le statut et le nombre de requêtes en cours
+    par route. Écrit directement en ASGI pour rester peu coûteux sur le chemin critique.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # Les chemins inconnus sont regroupés pour borner le nombre de séries
+            route = scope["path"] if status["code"] != 404 else "other"
+            HTTP_LATENCY.observe(duration, route)
+            HTTP_REQUESTS.inc(route, scope["method"], str(status["code"]))
@@ -0,0 +1,96 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from ..utils.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON sérialisée avec orjson quand il est installé"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def results_response(key: str, results: bytes, meta: Optional[Dict[str, Any]] = None) -> Response:
+    """
+    Réponse `{"<key>": [...]}` assemblée autour d'une liste d'enregistrements déjà
+    sérialisée, sans la relire
+    :param key: Clé de la liste ('articles', 'textes', 'decisions')
+    :param results: Enregistrements sérialisés en JSON
+    :param meta: Autres champs de la recherche ; seuls `next_cursor` (page suivante) et
+                 `stale` (réponse périmée servie pendant une panne) sont renvoyés
+    """
+    extra = response_metadata(meta or {})
+    body = b'{"' + key.encode() + b'":' + results
+    body += b"," + dumps(extra)[1:] if extra else b"}"
+    return Response(body, media_type="application/json")
+
+
+def response_metadata(api_response: Dict[str, Any]) -> Dict[str, Any]:
+    """Champs d'une recherche renvoyés avec les résultats : curseur de la page suivante, réponse périmée"""
+    extra: Dict[str, Any] = {}
+    if api_response.get("next_cursor"):
+        extra["next_cursor"] = api_response["next_cursor"]
+    if api_response.get("stale"):
+        extra["stale"] = True
+    return extra
+
+
+# Formats d'export : type de contenu
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def ndjson_chunk(records: List[Dict[str, Any]]) -> bytes:
+    """Un enregistrement JSON par ligne"""
+    return b"".join(dumps(record) + b"\n" for record in records)
+
+
+def csv_chunk(records: List[Dict[str, Any]], columns: Sequence[str], header: bool = False) -> bytes:
+    """Lignes CSV (RFC 4180) des enregistrements, précédées de l'en-tête si `header`"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(["" if record.get(column) is None else record[column] for column in columns] for record in records)
+    return buffer.getvalue().encode("utf-8")
+
+
+def export_response(
+    first_page: Dict[str, Any],
+    pages: AsyncIterator[Dict[str, Any]],
+    export_format: str,
+    columns: Sequence[str],
+    filename: str
+) -> StreamingResponse:
+    """
+    Réponse en flux d'un export : la première page (déjà reçue) part immédiatement, les
+    suivantes à mesure qu'elles arrivent ; une page n'est encodée qu'au moment de l'envoyer.
+    :param first_page: Première page (`results`, `totalResultNumber`, `truncated`)
+    :param pages: Pages suivantes
+    :param export_format: 'ndjson' ou 'csv'
+    :param columns: Colonnes du CSV, dans l'ordre
+    :param filename: Nom du fichier proposé, sans extension
+    """
+    def encode(records: List[Dict[str, Any]], header: bool = False) -> bytes:
+        if export_format == "csv":
+            return csv_chunk(records, columns, header)
+        return ndjson_chunk(records)
+
+    async def body():
+        try:
+            yield encode(first_page["results"], header=True)
+            async for page in pages:
+                yield encode(page["results"])
+        finally:
+            await pages.aclose()
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{export_format}"',
+        "X-Total-Count": str(first_page.get("totalResultNumber") or 0),
+    }
+    if first_page.get("truncated"):
+        headers["X-Truncated"] = "true"
+    return StreamingResponse(body(), media_type=EXPORT_FORMATS[export_format], headers=headers)
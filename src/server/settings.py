@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, BaseSettings, validator
+
+from ..utils.scheduler import PRIORITY_WEIGHTS
+
+
+def check_priority(value: str) -> str:
+    """Vérifie que la classe de priorité est connue de la file équitable"""
+    if value not in PRIORITY_WEIGHTS:
+        raise ValueError(f"Priorité inconnue : {value} (attendu : {', '.join(PRIORITY_WEIGHTS)})")
+    return value
+
+
+class ApiKeyPolicy(BaseModel):
+    """Règles d'une clé d'API déclarée dans LEGIFRANCE_API_KEYS"""
+    # Nom affiché dans les métriques et les statistiques (jamais la clé elle-même)
+    name: str
+    # 'interactive' ou 'batch' : classe de priorité des appels amont de la clé
+    priority: str = "interactive"
+    # Poids dans la file équitable, au sein de la classe
+    weight: float = 1.0
+    # Requêtes par seconde et rafale (par défaut : LEGIFRANCE_API_KEY_RATE / _BURST)
+    rate: Optional[float] = None
+    burst: Optional[float] = None
+
+    _priority = validator("priority", allow_reuse=True)(check_priority)
+
+
+class Settings(BaseSettings):
+    """
+    Configuration de l'application, lue dans les variables LEGIFRANCE_* (ex: LEGIFRANCE_CLIENT_ID).
+    Les réglages fins du client (cache, débit, disjoncteur...) restent lus par `LegifranceClient`
+    à sa construction.
+    """
+
+    # Identifiants PISTE : vérifiés à la construction du client, pas à celle de l'application
+    client_id: Optional[str] = None
+    client_secret: Optional[str] = None
+    api_endpoint: Optional[str] = None
+    token_url: str = "https://oauth.piste.gouv.fr/api/oauth/token"
+
+    # Compression brotli/gzip négociée des réponses au-delà du seuil (octets)
+    compress_min_size: int = 1024
+    compress_gzip_level: int = 6
+    compress_brotli_quality: int = 4
+
+    # Appels amont simultanés d'une recherche par lot ou d'une consultation
+    batch_concurrency: int = 10
+    # Attente (s) du premier passage de préchauffage au démarrage
+    warmup_startup_timeout: float = 0
+    # /ready ne répond 200 qu'une fois le premier passage de préchauffage terminé
+    ready_after_warmup: bool = False
+    log_level: str = "INFO"
+
+    # Clés d'API acceptées (JSON : {"clé": {"name": ..., "priority": ..., ...}}) ; si vide,
+    # toute clé est acceptée, avec la priorité et le débit par défaut
+    api_keys: Dict[str, ApiKeyPolicy] = {}
+    default_priority: str = "interactive"
+    # Requêtes par seconde et par clé (0 : illimité), et rafale (par défaut : le débit)
+    api_key_rate: float = 0
+    api_key_burst: float = 0
+    # Clés non déclarées dont le débit est suivi (les moins récemment vues sont oubliées)
+    anonymous_keys_tracked: int = 1024
+
+    _default_priority = validator("default_priority", allow_reuse=True)(check_priority)
+
+    class Config:
+        env_prefix = "LEGIFRANCE_"
+
+
+def load_settings(env_file: Optional[str] = ".env") -> Settings:
+    """
+    Charge le fichier `.env` dans l'environnement (sans écraser les variables déjà définies,
+    et pour les réglages lus par le client) puis la configuration de l'application
+    :param env_file: Fichier d'environnement (ignoré si None ou absent)
+    """
+    if env_file:
+        load_dotenv(env_file)
+    return Settings()
+
+
+def configure_logging(level: str) -> None:
+    """Configuration minimale des logs, sans effet si l'hôte (uvicorn, tests) les a déjà configurés"""
+    logging.basicConfig(level=level.upper())
@@ -0,0 +1,76 @@
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur par endpoint amont : après `failure_threshold` échecs consécutifs il
+    s'ouvre et les appels échouent immédiatement ; après `recovery_timeout` secondes,
+    il laisse passer quelques appels de test (semi-ouvert) et se referme s'ils réussissent.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        """
+        :param failure_threshold: Échecs consécutifs avant ouverture
+        :param recovery_timeout: Durée (s) d'ouverture avant un appel de test
+        :param half_open_max_calls: Appels de test simultanés en état semi-ouvert
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.rejected = 0
+        self.openings = 0
+
+    def allow(self) -> bool:
+        """
+        Indique si un appel peut partir ; en état semi-ouvert, réserve une place de test
+        :return: False si le disjoncteur est ouvert
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self.half_open_calls = 0
+        if self.state == HALF_OPEN:
+            if time.monotonic() - self.opened_at >= 2 * self.recovery_timeout:
+                # Place de test jamais libérée : on en autorise un nouveau
+                self.half_open_calls = 0
+                self.opened_at = time.monotonic() - self.recovery_timeout
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def release(self) -> None:
+        """Libère la place de test réservée par `allow` pour un appel terminé sans verdict"""
+        if self.state == HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.openings += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "openings": self.openings
+        }
@@ -0,0 +1,21 @@
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Lit un entier dans l'environnement, `default` si la variable est absente ou vide"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """Lit un flottant dans l'environnement, `default` si la variable est absente ou vide"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Lit un booléen (1/true/yes/on) dans l'environnement, `default` si la variable est absente ou vide"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,76 @@
+import logging
+from typing import Optional
+
+import httpx
+
+from .config import env_bool, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut du pool de connexions vers PISTE
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+
+
+def http2_available() -> bool:
+    """Indique si le paquet optionnel `h2` est installé"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+    timeout: Optional[float] = None,
+    connect_timeout: Optional[float] = None,
+    http2: Optional[bool] = None,
+    verify: bool = True,
+) -> httpx.AsyncClient:
+    """
+    Construit le client HTTP partagé (keep-alive, pool de connexions, HTTP/2 optionnel).
+    Les paramètres non fournis sont lus dans les variables d'environnement LEGIFRANCE_HTTP_*.
+    :param max_connections: Nombre maximal de connexions simultanées
+    :param max_keepalive_connections: Nombre de connexions gardées ouvertes au repos
+    :param keepalive_expiry: Durée (s) avant fermeture d'une connexion inactive
+    :param timeout: Délai global (s) de lecture/écriture/attente du pool
+    :param connect_timeout: Délai (s) d'établissement de la connexion
+    :param http2: Active le multiplexage HTTP/2 (nécessite le paquet `h2`)
+    :param verify: Vérification des certificats TLS
+    :return: Client httpx à fermer avec `aclose()`
+    """
+    if max_connections is None:
+        max_connections = env_int("LEGIFRANCE_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)
+    if max_keepalive_connections is None:
+        max_keepalive_connections = env_int(
+            "LEGIFRANCE_HTTP_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+        )
+    if keepalive_expiry is None:
+        keepalive_expiry = env_float("LEGIFRANCE_HTTP_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY)
+    if timeout is None:
+        timeout = env_float("LEGIFRANCE_HTTP_TIMEOUT", DEFAULT_TIMEOUT)
+    if connect_timeout is None:
+        connect_timeout = env_float("LEGIFRANCE_HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+    if http2 is None:
+        http2 = env_bool("LEGIFRANCE_HTTP2", False)
+
+    if http2 and not http2_available():
+        logger.warning("HTTP/2 demandé mais le paquet 'h2' est absent : repli sur HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        http2=http2,
+        verify=verify,
+    )
@@ -1,34 +1,374 @@
+import asyncio
+import contextvars
+import hashlib
 import httpx
-from typing import Dict, Any, Optional
+import logging
+import time
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Sequence, Set, Tuple
 import os
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from ..cache.cache_manager import CacheManager
+from ..cache.cache_manager import CacheManager, DEFAULT_MAX_BYTES, DEFAULT_TTL_POLICIES
+from ..cache.keys import PRESENTATION_FIELDS, fingerprint
+from ..cache.shared import get_or_compute, open_store
+from ..cache.versions import VersionIndex, epoch_millis
+from ..cache.warmup import CacheWarmer, HotQueries
+from ..offline.store import OfflineStore
+from .circuit_breaker import CircuitBreaker
+from .config import env_bool, env_float, env_int
+from .http_pool import create_http_client
+from .metrics import Counter, Gauge, REGISTRY
+from .pagination import (
+    MAX_PAGE_SIZE,
+    MAX_RESULTS,
+    decode_cursor,
+    encode_cursor,
+    fetch_all_pages,
+    has_next_page,
+    iter_pages,
+    with_page
+)
+from .rate_limit import AdaptiveConcurrencyLimiter, TokenBucket, backoff_delay, parse_retry_after
+from .scheduler import CALLER, FairScheduler, batch_priority
+from .serialization import dumps, loads
+from .singleflight import SingleFlight
+from .transformers import (
+    CODE_FIELDS,
+    JURISPRUDENCE_FIELDS,
+    TEXTE_LEGAL_FIELDS,
+    compact_records,
+    expand_records,
+    shape_records,
+    transform_article_consult,
+    transform_article_versions,
+    transform_code_response,
+    transform_decision_consult,
+    transform_jurisprudence_response,
+    transform_texte_legal_response
+)
 
-# Charger les variables d'environnement
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Le renouvellement en tâche de fond intervient avant l'échéance calculée dans get_token
+TOKEN_RENEWAL_MARGIN = 60
+TOKEN_RETRY_DELAY = 5
+
+TOKEN_ENDPOINT = "/oauth/token"
+# Méthode de recherche par préfixe de cache
+SEARCH_METHODS = {
+    "code": "rechercher_code",
+    "texte_legal": "rechercher_texte_legal",
+    "jurisprudence": "rechercher_jurisprudence"
+}
+
+# Consultation par identifiant : type de document -> (préfixe de recherche dont les
+# résultats contiennent ce type, endpoint, champ de l'identifiant, transformation, champs)
+CONSULT_TYPES = {
+    "article": ("code", "/consult/getArticle", "id", transform_article_consult, CODE_FIELDS),
+    "decision": ("jurisprudence", "/consult/juri", "textId", transform_decision_consult, JURISPRUDENCE_FIELDS)
+}
+# Préfixe de l'identifiant Légifrance -> type de document consultable
+ID_TYPES = {"LEGIARTI": "article", "JORFARTI": "article", "JURITEXT": "decision"}
+
+# Positionné dans les tâches de préchargement de la page suivante : elles n'en déclenchent pas d'autres
+_PREFETCHING = contextvars.ContextVar("legifrance_prefetching", default=False)
+
+# Réponses amont justifiant une nouvelle tentative (quota atteint, indisponibilité)
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "legifrance_upstream_request_duration_seconds", "Latence des appels à PISTE par endpoint", ["endpoint"]
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "legifrance_upstream_responses_total", "Réponses de PISTE par endpoint et statut HTTP", ["endpoint", "status"]
+)
+UPSTREAM_QUEUE_WAIT = REGISTRY.histogram(
+    "legifrance_upstream_queue_wait_seconds",
+    "Attente avant un appel à PISTE (file équitable, débit, concurrence) par clé d'API et priorité",
+    ["key", "priority"]
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "legifrance_upstream_retries_total", "Nouvelles tentatives vers PISTE par endpoint et motif", ["endpoint", "reason"]
+)
+
+class UpstreamError(RuntimeError):
+    """
+    Erreur renvoyée par l'API Légifrance (statut HTTP) ou survenue en l'appelant
+    (délai dépassé, erreur réseau : `status_code` vaut alors None). `endpoint` désigne
+    l'endpoint en cause quand ce n'est pas celui appelé (obtention du token OAuth).
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        reason: Optional[str] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+        endpoint: Optional[str] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason or str(status_code)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.endpoint = endpoint
 
 class LegifranceClient:
-    def __init__(self):
-        self.client_id = os.getenv("LEGIFRANCE_CLIENT_ID")
-        self.client_secret = os.getenv("LEGIFRANCE_CLIENT_SECRET")
-        self.base_url = os.getenv("LEGIFRANCE_API_ENDPOINT")
-        self.token_url = "https://oauth.piste.gouv.fr/api/oauth/token"
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        base_url: Optional[str] = None,
+        token_url: Optional[str] = None
+    ):
+        """
+        Les identifiants PISTE sont pris en paramètre ou, à défaut, dans l'environnement
+        (LEGIFRANCE_CLIENT_ID, LEGIFRANCE_CLIENT_SECRET, LEGIFRANCE_API_ENDPOINT), de même
+        que tous les réglages ; le fichier `.env` est chargé par `load_settings`.
+        :param http_client: Client HTTP partagé (créé au démarrage si None)
+        """
+        self.client_id = client_id or os.getenv("LEGIFRANCE_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("LEGIFRANCE_CLIENT_SECRET")
+        self.base_url = base_url or os.getenv("LEGIFRANCE_API_ENDPOINT")
+        self.token_url = token_url or os.getenv("LEGIFRANCE_TOKEN_URL", "https://oauth.piste.gouv.fr/api/oauth/token")
 
         if not all([self.client_id, self.client_secret, self.base_url]):
             raise ValueError("Variables d'environnement manquantes. Vérifiez votre fichier .env")
 
         self.access_token = None
         self.token_expires = None
-        self.cache = CacheManager()
+        # Token refusé par PISTE (401) : à ne pas reprendre du magasin partagé
+        self._rejected_token: Optional[str] = None
+
+        # Magasin partagé par les workers de l'hôte (protocole Redis) : cache et token communs
+        shared_url = os.getenv("LEGIFRANCE_SHARED_CACHE_URL")
+        self.shared = open_store(shared_url, env_float("LEGIFRANCE_SHARED_CACHE_TIMEOUT", 0.1)) if shared_url else None
+        self.shared_namespace = os.getenv("LEGIFRANCE_SHARED_NAMESPACE", "legifrance")
+        self.shared_lock_timeout = env_float("LEGIFRANCE_SHARED_LOCK_TIMEOUT", 30.0)
+        # Un token par compte PISTE, sans exposer l'identifiant dans le magasin
+        account = hashlib.blake2b(f"{self.token_url}|{self.client_id}".encode("utf-8"), digest_size=8).hexdigest()
+        self._shared_token_key = f"{self.shared_namespace}:token:{account}"
+
+        # Cache mémoire compressé, adossé au magasin partagé et à un cache disque persistant
+        # si LEGIFRANCE_SHARED_CACHE_URL et LEGIFRANCE_CACHE_PATH sont définis
+        self.cache = CacheManager(
+            disk_path=os.getenv("LEGIFRANCE_CACHE_PATH"),
+            max_bytes=env_int("LEGIFRANCE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+            codec=os.getenv("LEGIFRANCE_CACHE_CODEC", "zlib"),
+            ttl_policies=self._ttl_policies_from_env(),
+            shared=self.shared,
+            shared_namespace=self.shared_namespace,
+            lock_timeout=self.shared_lock_timeout
+        )
+        # Conserve en mémoire la forme sérialisée des résultats servis (succès sans désérialisation)
+        self.keep_rendered = env_bool("LEGIFRANCE_CACHE_RENDERED", True)
+        # Rafraîchissements en tâche de fond des entrées servies périmées
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        # Renouvellement du token : une seule requête OAuth en vol, partagée par tous les appelants
+        self._token_flight = SingleFlight()
+        self._token_renewal_task: Optional[asyncio.Task] = None
+        self.token_stats = {
+            "refreshes": 0,
+            "failures": 0,
+            "shared": 0,
+            "last_latency": None,
+            "total_latency": 0.0
+        }
+
+        # Récupération de toutes les pages (fetch_all)
+        self.fetch_all_page_size = env_int("LEGIFRANCE_FETCH_ALL_PAGE_SIZE", MAX_PAGE_SIZE)
+        self.fetch_all_concurrency = env_int("LEGIFRANCE_FETCH_ALL_CONCURRENCY", 5)
+        self.fetch_all_max_results = env_int("LEGIFRANCE_FETCH_ALL_MAX_RESULTS", MAX_RESULTS)
+        # Export en flux : pages demandées par avance (et seules en mémoire)
+        self.export_concurrency = env_int("LEGIFRANCE_EXPORT_CONCURRENCY", 4)
+        self.export_max_results = env_int("LEGIFRANCE_EXPORT_MAX_RESULTS", MAX_RESULTS)
+
+        # Débit vers PISTE (quota), nouvelles tentatives et concurrence adaptative
+        self.rate_limiter = TokenBucket(
+            env_float("LEGIFRANCE_RATE_LIMIT", 20),
+            env_float("LEGIFRANCE_RATE_BURST", 0) or None
+        )
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial=env_int("LEGIFRANCE_CONCURRENCY_INITIAL", 16),
+            minimum=env_int("LEGIFRANCE_CONCURRENCY_MIN", 2),
+            maximum=env_int("LEGIFRANCE_CONCURRENCY_MAX", 64),
+            latency_target=env_float("LEGIFRANCE_LATENCY_TARGET", 1.0)
+        )
+        # File équitable entre clés d'API devant le débit et la concurrence
+        self.scheduler = FairScheduler()
+        self.max_retries = env_int("LEGIFRANCE_MAX_RETRIES", 3)
+        self.retry_base_delay = env_float("LEGIFRANCE_RETRY_BASE_DELAY", 0.2)
+        self.retry_max_delay = env_float("LEGIFRANCE_RETRY_MAX_DELAY", 10.0)
+
+        # Disjoncteur par endpoint : échec immédiat pendant une panne de Légifrance
+        self.breaker_failure_threshold = env_int("LEGIFRANCE_BREAKER_FAILURES", 5)
+        self.breaker_recovery_timeout = env_float("LEGIFRANCE_BREAKER_RECOVERY", 30.0)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stale_fallbacks = 0
+
+        # Miroir local des fonds DILA interrogé avant PISTE ('prefer' : repli sur PISTE
+        # sans résultat local, 'only' : jamais de repli)
+        offline_path = os.getenv("LEGIFRANCE_OFFLINE_DB")
+        self.offline = OfflineStore(offline_path) if offline_path else None
+        self.offline_mode = os.getenv("LEGIFRANCE_OFFLINE_MODE", "prefer")
+        self.offline_prefixes = {
+            prefix.strip() for prefix in os.getenv("LEGIFRANCE_OFFLINE_FONDS", "code,texte_legal").split(",")
+        }
+        self.offline_hits = 0
+
+        # Recherches les plus demandées et préchauffage du cache au démarrage
+        self.hot_queries = HotQueries(env_int("LEGIFRANCE_WARMUP_TRACKED", 10000))
+        self.warmer = CacheWarmer(
+            self,
+            queries_file=os.getenv("LEGIFRANCE_WARMUP_FILE"),
+            state_file=os.getenv("LEGIFRANCE_WARMUP_STATE"),
+            top_n=env_int("LEGIFRANCE_WARMUP_TOP_N", 200),
+            rate=env_float("LEGIFRANCE_WARMUP_RATE", 2.0),
+            interval=env_float("LEGIFRANCE_WARMUP_INTERVAL", 600.0)
+        )
+        self.warmup_enabled = env_bool("LEGIFRANCE_WARMUP", True)
+
+        # Préchargement de la page suivante, dans la limite d'un budget d'appels par seconde
+        self.prefetch_enabled = env_bool("LEGIFRANCE_PREFETCH", True)
+        self.prefetch_budget = TokenBucket(
+            env_float("LEGIFRANCE_PREFETCH_RATE", 1.0), env_float("LEGIFRANCE_PREFETCH_BURST", 5)
+        )
+        self.prefetch_stats = {"prefetched": 0, "skipped": 0, "failures": 0}
+
+        # Versions d'articles par intervalle de validité (consultation à une date)
+        self.versions = VersionIndex(
+            env_int("LEGIFRANCE_VERSION_CACHE_SIZE", 10000), env_float("LEGIFRANCE_VERSION_OPEN_TTL", 86400)
+        )
+
+        # Recherches identiques en vol : un seul appel amont, résultat (ou erreur) partagé
+        self.inflight = SingleFlight()
+
+        # Client HTTP partagé : fourni par l'appelant ou créé au démarrage
+        self._http_client = http_client
+        self._owns_http_client = http_client is None
+
+    @staticmethod
+    def _ttl_policies_from_env() -> Dict[str, Tuple[int, int]]:
+        """Lit LEGIFRANCE_CACHE_TTL_<PRÉFIXE>=souple[,dure] (ex: LEGIFRANCE_CACHE_TTL_JURISPRUDENCE=3600,86400)"""
+        policies = {}
+        for prefix in DEFAULT_TTL_POLICIES:
+            value = os.getenv(f"LEGIFRANCE_CACHE_TTL_{prefix.upper()}")
+            if value:
+                soft, _, hard = value.partition(",")
+                policies[prefix] = (int(soft), int(hard or soft))
+        return policies
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Client HTTP partagé, créé à la demande si `start()` n'a pas été appelé"""
+        if self._http_client is None:
+            self._http_client = create_http_client()
+        return self._http_client
+
+    async def start(self) -> None:
+        """
+        Ouvre le pool de connexions et lance le renouvellement du token en tâche de fond
+        (appelé au démarrage de l'application)
+        """
+        if self._http_client is None:
+            self._http_client = create_http_client()
+        if self._token_renewal_task is None:
+            self._token_renewal_task = asyncio.ensure_future(self._renew_token_loop())
+        if self.warmup_enabled:
+            self.warmer.start()
+
+    async def close(self) -> None:
+        """
+        Arrête le préchauffage (en enregistrant les recherches les plus demandées), le
+        renouvellement du token et les rafraîchissements en cours, puis ferme le pool de
+        connexions s'il appartient au client et la connexion au magasin partagé
+        """
+        await self.warmer.stop()
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._token_renewal_task is not None:
+            self._token_renewal_task.cancel()
+            try:
+                await self._token_renewal_task
+            except asyncio.CancelledError:
+                pass
+            self._token_renewal_task = None
+        if self._http_client is not None and self._owns_http_client:
+            await self._http_client.aclose()
+            self._http_client = None
+        if self.shared is not None:
+            self.shared.close()
 
     async def get_token(self) -> str:
         if self.is_token_valid():
             return self.access_token
+        return await self.refresh_token()
+
+    async def refresh_token(self) -> str:
+        """
+        Renouvelle le token OAuth. Les appels concurrents attendent la même requête
+        au lieu d'en émettre chacun une.
+        :return: Nouveau token d'accès
+        """
+        return await self._token_flight.do("token", self._fetch_token)
 
-        async with httpx.AsyncClient() as client:
+    async def _fetch_token(self) -> str:
+        """
+        Sans magasin partagé, demande un token à PISTE. Sinon, reprend le token publié par
+        un autre worker s'il est plus récent que le sien ; à défaut, un seul worker de
+        l'hôte le renouvelle et le publie pour les autres.
+        """
+        if self.shared is None:
+            return await self._request_token()
+        data, computed = await get_or_compute(
+            self.shared,
+            self._shared_token_key,
+            self._publish_token,
+            self.shared_lock_timeout,
+            accept=self._is_shared_token_usable
+        )
+        if not computed:
+            token = loads(data)
+            self.access_token = token["access_token"]
+            self.token_expires = datetime.fromtimestamp(token["expires_at"])
+            self.token_stats["shared"] += 1
+        return self.access_token
+
+    def _is_shared_token_usable(self, data: bytes) -> bool:
+        token = loads(data)
+        if token["access_token"] == self._rejected_token:
+            return False
+        if token["expires_at"] - time.time() <= TOKEN_RENEWAL_MARGIN:
+            return False
+        # Le token courant est en cours de renouvellement : seul un plus récent convient
+        return self.token_expires is None or token["expires_at"] > self.token_expires.timestamp()
+
+    async def _publish_token(self) -> Tuple[bytes, float]:
+        token = await self._request_token()
+        expires_at = self.token_expires.timestamp()
+        return dumps({"access_token": token, "expires_at": expires_at}), max(1.0, expires_at - time.time())
+
+    async def _request_token(self) -> str:
+        """
+        Demande un token à PISTE, derrière le disjoncteur de l'endpoint OAuth : pendant une
+        panne, les requêtes échouent aussitôt (et servent leur réponse périmée) au lieu
+        d'attendre chacune le délai maximal
+        :raises UpstreamError: Endpoint OAuth indisponible ou réponse refusée
+        """
+        breaker = self.get_breaker(TOKEN_ENDPOINT)
+        if not breaker.allow():
+            self.token_stats["failures"] += 1
+            raise UpstreamError(
+                "Circuit ouvert pour l'obtention du token : PISTE indisponible",
+                reason="circuit_open",
+                endpoint=TOKEN_ENDPOINT
+            )
+        start = time.perf_counter()
+        try:
             try:
-                response = await client.post(
+                response = await self.http_client.post(
                     self.token_url,
                     data={
                         "grant_type": "client_credentials",
@@ -40,13 +380,87 @@ class LegifranceClient:
                         "Content-Type": "application/x-www-form-urlencoded"
                     }
                 )
-                response.raise_for_status()
+            except httpx.TimeoutException as e:
+                UPSTREAM_RESPONSES.inc(TOKEN_ENDPOINT, "timeout")
+                raise UpstreamError(
+                    "Délai dépassé lors de l'obtention du token", reason="timeout", retryable=True, endpoint=TOKEN_ENDPOINT
+                ) from e
+            except httpx.TransportError as e:
+                UPSTREAM_RESPONSES.inc(TOKEN_ENDPOINT, "error")
+                raise UpstreamError(
+                    f"Erreur réseau lors de l'obtention du token : {e}", reason="network", retryable=True, endpoint=TOKEN_ENDPOINT
+                ) from e
+            status = response.status_code
+            UPSTREAM_RESPONSES.inc(TOKEN_ENDPOINT, str(status))
+            if status in RETRYABLE_STATUSES:
+                raise UpstreamError(
+                    f"PISTE a répondu {status} lors de l'obtention du token",
+                    status_code=status,
+                    retryable=True,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                    endpoint=TOKEN_ENDPOINT
+                )
+            if response.is_error:
+                # Identifiants refusés : l'endpoint répond normalement, un nouvel essai n'y changerait rien
+                breaker.record_success()
+                raise UpstreamError(
+                    f"PISTE a refusé l'obtention du token ({status}) : {response.text[:200]}",
+                    status_code=status,
+                    endpoint=TOKEN_ENDPOINT
+                )
+            try:
                 data = response.json()
                 self.access_token = data["access_token"]
-                self.token_expires = datetime.now() + timedelta(seconds=data["expires_in"] - 300)
-                return self.access_token
+                expires_in = data["expires_in"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise UpstreamError(
+                    f"Réponse invalide de l'endpoint OAuth : {e}", reason="invalid_response", endpoint=TOKEN_ENDPOINT
+                ) from e
+            self.token_expires = datetime.now() + timedelta(seconds=expires_in - 300)
+            self.token_stats["refreshes"] += 1
+            breaker.record_success()
+            return self.access_token
+        except UpstreamError as e:
+            self.token_stats["failures"] += 1
+            if e.retryable or e.reason == "invalid_response":
+                breaker.record_failure()
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            self.token_stats["last_latency"] = latency
+            self.token_stats["total_latency"] += latency
+            UPSTREAM_LATENCY.observe(latency, TOKEN_ENDPOINT)
+
+    def _seconds_until_renewal(self) -> float:
+        if not self.is_token_valid():
+            return 0
+        remaining = (self.token_expires - datetime.now()).total_seconds()
+        return max(remaining - TOKEN_RENEWAL_MARGIN, remaining / 2)
+
+    async def _renew_token_loop(self) -> None:
+        """Renouvelle le token avant son échéance pour qu'aucune requête n'attende l'OAuth"""
+        while True:
+            await asyncio.sleep(self._seconds_until_renewal())
+            try:
+                await self.refresh_token()
+                if not self.is_token_valid():
+                    # Durée de vie trop courte pour anticiper : on évite de boucler sur l'OAuth
+                    await asyncio.sleep(TOKEN_RETRY_DELAY)
             except Exception as e:
-                raise RuntimeError(f"Erreur lors de l'obtention du token : {str(e)}")
+                logger.warning(f"Échec du renouvellement du token, nouvel essai dans {TOKEN_RETRY_DELAY}s : {e}")
+                await asyncio.sleep(TOKEN_RETRY_DELAY)
+
+    def get_token_stats(self) -> dict:
+        """
+        Retourne des statistiques sur les renouvellements du token OAuth
+        :return: Dictionnaire avec les statistiques
+        """
+        refreshes = self.token_stats["refreshes"] + self.token_stats["failures"]
+        return {
+            **self.token_stats,
+            "average_latency": self.token_stats["total_latency"] / refreshes if refreshes else None,
+            "expires_at": self.token_expires.isoformat() if self.token_expires else None
+        }
 
     def is_token_valid(self) -> bool:
         if not self.access_token or not self.token_expires:
@@ -61,12 +475,529 @@ class LegifranceClient:
             "Content-Type": "application/json"
         }
 
-    async def rechercher_code(self, params: dict) -> Dict[str, Any]:
+    async def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Appel à l'API Légifrance, avec nouvelles tentatives (backoff exponentiel avec gigue,
+        respect de Retry-After) sur 429/5xx, délais dépassés et erreurs réseau
+        :param endpoint: Chemin de l'API (ex: '/juri')
+        :param payload: Corps de la requête
+        :return: Réponse JSON
+        """
+        breaker = self.get_breaker(endpoint)
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise UpstreamError(f"Circuit ouvert pour {endpoint} : Légifrance indisponible", reason="circuit_open")
+            settled = False
+            try:
+                result = await self._post_once(endpoint, payload)
+                breaker.record_success()
+                settled = True
+                return result
+            except UpstreamError as e:
+                # Une erreur du token OAuth (`e.endpoint`) est comptée par son propre disjoncteur
+                if e.endpoint is not None:
+                    breaker.release()
+                elif e.retryable and e.status_code != 401:
+                    breaker.record_failure()
+                else:
+                    # Réponse applicative (requête refusée...) : l'amont répond normalement
+                    breaker.record_success()
+                settled = True
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay, e.retry_after)
+                UPSTREAM_RETRIES.inc(endpoint, e.reason)
+                logger.warning(f"{e} ; nouvel essai dans {delay:.2f}s ({attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+            finally:
+                if not settled:
+                    # Annulation ou erreur inattendue : l'appel de test éventuel n'a rien prouvé
+                    breaker.release()
+
+    async def _post_batch(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Appel d'un traitement de masse (toutes les pages, export) : classe de priorité `batch`"""
+        with batch_priority():
+            return await self._post(endpoint, payload)
+
+    def get_breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker(
+                self.breaker_failure_threshold, self.breaker_recovery_timeout
+            )
+        return breaker
+
+    async def _post_once(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = await self.get_headers()
+        caller = CALLER.get()
+        queued = time.perf_counter()
+        async with self.scheduler.turn(caller):
+            await self.rate_limiter.acquire()
+            await self.concurrency_limiter.acquire()
+        start = time.perf_counter()
+        UPSTREAM_QUEUE_WAIT.observe(start - queued, caller.name, caller.priority)
+        self.scheduler.record(caller, start - queued)
+        overloaded = True
+        try:
+            try:
+                response = await self.http_client.post(
+                    f"{self.base_url}{endpoint}",
+                    headers=headers,
+                    json=payload
+                )
+            except httpx.TimeoutException as e:
+                UPSTREAM_RESPONSES.inc(endpoint, "timeout")
+                raise UpstreamError(f"Délai dépassé pour {endpoint}", reason="timeout", retryable=True) from e
+            except httpx.TransportError as e:
+                UPSTREAM_RESPONSES.inc(endpoint, "error")
+                raise UpstreamError(f"Erreur réseau pour {endpoint} : {e}", reason="network", retryable=True) from e
+
+            status = response.status_code
+            UPSTREAM_RESPONSES.inc(endpoint, str(status))
+            logger.debug("Réponse %s de %s", status, endpoint)
+            if status in RETRYABLE_STATUSES:
+                raise UpstreamError(
+                    f"Légifrance a répondu {status} pour {endpoint}",
+                    status_code=status,
+                    retryable=True,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                )
+            overloaded = False
+            if status == 401:
+                # Token révoqué ou expiré côté PISTE : le prochain essai en redemande un
+                self._rejected_token = headers["Authorization"][len("Bearer "):]
+                self.access_token = None
+                raise UpstreamError(f"Token refusé par Légifrance pour {endpoint}", status_code=status, retryable=True)
+            if response.is_error:
+                raise UpstreamError(f"Légifrance a répondu {status} pour {endpoint} : {response.text[:200]}", status_code=status)
+            try:
+                return response.json()
+            except ValueError as e:
+                # Page de maintenance servie en 200 : panne de l'amont, pas erreur de la requête
+                raise UpstreamError(
+                    f"Réponse invalide de Légifrance pour {endpoint} : {e}", reason="invalid_response", retryable=True
+                ) from e
+        finally:
+            latency = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(latency, endpoint)
+            self.concurrency_limiter.release(latency, success=not overloaded)
+
+    def collect_metrics(self) -> List[Any]:
+        """
+        Métriques calculées à la lecture de /metrics : cache, requêtes regroupées, token
+        :return: Liste de métriques au format Prometheus
+        """
+        cache_stats = self.cache.get_stats()
+        cache_events = Counter("legifrance_cache_events_total", "Événements du cache", ["event"])
+        for event in ("hits", "shared_hits", "disk_hits", "stale_hits", "misses", "evictions", "rejected"):
+            cache_events.inc(event, amount=cache_stats[event])
+        cache_bytes = Gauge("legifrance_cache_bytes", "Octets occupés par le cache mémoire")
+        cache_bytes.set(cache_stats["currsize"])
+        cache_entries = Gauge("legifrance_cache_entries", "Entrées du cache mémoire")
+        cache_entries.set(cache_stats["size"])
+
+        inflight_stats = self.inflight.get_stats()
+        upstream_searches = Counter(
+            "legifrance_search_upstream_calls_total", "Recherches envoyées à PISTE après regroupement"
+        )
+        upstream_searches.inc(amount=inflight_stats["calls"])
+        coalesced = Counter(
+            "legifrance_search_coalesced_total", "Recherches servies par un appel déjà en vol"
+        )
+        coalesced.inc(amount=inflight_stats["coalesced"])
+
+        token_refreshes = Counter(
+            "legifrance_token_refreshes_total", "Renouvellements du token OAuth", ["result"]
+        )
+        token_refreshes.inc("success", amount=self.token_stats["refreshes"])
+        token_refreshes.inc("failure", amount=self.token_stats["failures"])
+
+        concurrency_limit = Gauge(
+            "legifrance_upstream_concurrency_limit", "Limite adaptative d'appels simultanés vers PISTE"
+        )
+        concurrency_limit.set(int(self.concurrency_limiter.limit))
+        upstream_inflight = Gauge("legifrance_upstream_inflight", "Appels en cours vers PISTE")
+        upstream_inflight.set(self.concurrency_limiter.inflight)
+        rate_limit_wait = Counter(
+            "legifrance_rate_limit_wait_seconds_total", "Temps d'attente cumulé imposé par le limiteur de débit"
+        )
+        rate_limit_wait.inc(amount=self.rate_limiter.waited)
+        upstream_queued = Gauge("legifrance_upstream_queued", "Appels vers PISTE en attente dans la file équitable")
+        upstream_queued.set(self.scheduler.queued)
+
+        breaker_state = Gauge(
+            "legifrance_circuit_breaker_open", "Disjoncteur par endpoint (0 fermé, 0.5 semi-ouvert, 1 ouvert)", ["endpoint"]
+        )
+        for endpoint, breaker in self.breakers.items():
+            breaker_state.set({"closed": 0, "half_open": 0.5, "open": 1}[breaker.state], endpoint)
+        stale_fallbacks = Counter(
+            "legifrance_stale_fallbacks_total", "Réponses périmées servies pendant une indisponibilité"
+        )
+        stale_fallbacks.inc(amount=self.stale_fallbacks)
+        offline_hits = Counter(
+            "legifrance_offline_hits_total", "Recherches servies par le miroir local des fonds DILA"
+        )
+        offline_hits.inc(amount=self.offline_hits)
+        prefetched = Counter(
+            "legifrance_prefetch_total", "Préchargements de la page suivante", ["result"]
+        )
+        for result, count in self.prefetch_stats.items():
+            prefetched.inc(result, amount=count)
+        warmed = Counter("legifrance_cache_warmed_total", "Recherches exécutées par le préchauffage du cache")
+        warmed.inc(amount=self.warmer.stats["warmed"])
+
+        return [
+            breaker_state, stale_fallbacks, offline_hits, warmed, prefetched,
+            cache_events, cache_bytes, cache_entries, upstream_searches, coalesced, token_refreshes,
+            concurrency_limit, upstream_inflight, rate_limit_wait, upstream_queued
+        ]
+
+    async def _search(
+        self,
+        prefix: str,
+        endpoint: str,
+        params: dict,
+        payload: Dict[str, Any],
+        transform: Callable[[Dict[str, Any]], List[Dict[str, Any]]],
+        fields: Sequence[str],
+        limiter: Optional[asyncio.Semaphore] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Recherche servie par le miroir local des fonds DILA s'il est configuré pour ce
+        préfixe, sinon avec cache : en cas d'absence, les requêtes identiques concurrentes
+        partagent un unique appel amont. Une entrée périmée (délai souple dépassé) est
+        servie immédiatement et rafraîchie en tâche de fond. Avec `fetch_all`, toutes
+        les pages sont récupérées.
+        Le cache conserve les enregistrements déjà transformés, sous forme compacte.
+        :param prefix: Préfixe de la clé de cache (ex: 'code', 'jurisprudence')
+        :param endpoint: Chemin de l'API Légifrance (ex: '/code')
+        :param params: Paramètres de la requête, servant à calculer la clé
+        :param payload: Corps de la requête envoyée à Légifrance
+        :param transform: Transformation de la réponse brute en enregistrements
+        :param fields: Champs des enregistrements, dans l'ordre de la réponse
+        :param limiter: Sémaphore borné autour de l'appel amont uniquement (les succès du cache n'attendent pas)
+        :param refresh: Ignore l'entrée en cache et la remplace par la réponse de Légifrance (préchauffage)
+        :return: Enregistrements transformés (`results`) et nombre total de résultats,
+                 avec `stale: True` si Légifrance est indisponible et qu'une ancienne valeur est servie
+        """
+        if self.offline is not None and prefix in self.offline_prefixes:
+            response = self.offline.search(prefix, params, self.fetch_all_max_results)
+            if response["totalResultNumber"] or self.offline_mode == "only":
+                self.offline_hits += 1
+                return response
+
+        cache_key = self.cache.get_key(prefix, params)
+        if not refresh and not _PREFETCHING.get():
+            self.hot_queries.record(cache_key, prefix, params)
+        entry = await self.cache.aget_entry(cache_key) if not refresh else None
+
+        async def fetch() -> Dict[str, Any]:
+            # Avec un magasin partagé, un seul worker de l'hôte interroge Légifrance
+            return await self.cache.get_or_compute(cache_key, fetch_limited, refresh=refresh)
+
+        async def fetch_limited() -> Dict[str, Any]:
+            if limiter is None:
+                return await fetch_upstream()
+            async with limiter:
+                return await fetch_upstream()
+
+        async def fetch_upstream() -> Dict[str, Any]:
+            if params.get("fetch_all"):
+                result = await fetch_all_pages(
+                    lambda number, size: self._post_batch(endpoint, with_page(payload, number, size)),
+                    page_size=self.fetch_all_page_size,
+                    concurrency=self.fetch_all_concurrency,
+                    max_results=self.fetch_all_max_results
+                )
+            else:
+                result = await self._post(endpoint, payload)
+            records = transform(result)
+            await self._cache_documents(prefix, records)
+            compact = compact_records(records, fields)
+            compact["totalResultNumber"] = result.get("totalResultNumber")
+            if "truncated" in result:
+                compact["truncated"] = result["truncated"]
+            return compact
+
+        if entry is not None:
+            if entry.stale:
+                self._revalidate(cache_key, fetch)
+            return self._expand(entry.value, fields)
+        if refresh:
+            return self._expand(await self.inflight.do(cache_key, fetch), fields)
+        try:
+            return self._expand(await self.inflight.do(cache_key, fetch), fields)
+        except UpstreamError:
+            # Légifrance indisponible : dernière valeur connue, même au-delà de sa durée de vie
+            entry = await self.cache.aget_entry(cache_key, allow_expired=True)
+            if entry is None:
+                raise
+            self.stale_fallbacks += 1
+            logger.warning(f"Légifrance indisponible, réponse périmée servie pour {cache_key}")
+            response = self._expand(entry.value, fields)
+            response["stale"] = True
+            return response
+
+    @staticmethod
+    def _expand(compact: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+        response = {
+            "results": expand_records(compact, fields),
+            "totalResultNumber": compact.get("totalResultNumber")
+        }
+        if "truncated" in compact:
+            response["truncated"] = compact["truncated"]
+        return response
+
+    def _resolve_cursor(self, prefix: str, params: dict) -> dict:
+        """
+        Remplace le curseur reçu par le numéro de page qu'il désigne
+        :raises ValueError: Curseur invalide ou émis pour une autre recherche
+        """
+        resolved = {name: value for name, value in params.items() if name != "cursor"}
+        if params.get("cursor"):
+            resolved["page_number"] = decode_cursor(params["cursor"], fingerprint(prefix, resolved))
+        return resolved
+
+    def _paginate(self, prefix: str, params: dict, response: Dict[str, Any], prefetch: bool = True) -> Dict[str, Any]:
+        """
+        Ajoute à la réponse le curseur de la page suivante, s'il en reste une, et la
+        précharge en tâche de fond
+        :param prefetch: False pour un rafraîchissement (préchauffage) : le budget de
+                         préchargement reste aux recherches des utilisateurs
+        """
+        if params.get("fetch_all"):
+            return response
+        page_number = params.get("page_number") or 1
+        if not has_next_page(page_number, params.get("page_size") or 10, response.get("totalResultNumber") or 0):
+            return response
+        next_params = {
+            name: value for name, value in params.items() if name not in PRESENTATION_FIELDS
+        }
+        next_params["page_number"] = page_number + 1
+        if prefetch:
+            self._prefetch(prefix, next_params)
+        return {**response, "next_cursor": encode_cursor(fingerprint(prefix, params), page_number + 1)}
+
+    def _prefetch(self, prefix: str, params: dict) -> None:
+        """
+        Précharge une page dans le cache si elle n'y est pas, que Légifrance n'est pas
+        saturé et qu'il reste du budget de préchargement
+        """
+        if not self.prefetch_enabled or _PREFETCHING.get():
+            return
+        cache_key = self.cache.get_key(prefix, params)
+        # Lecture locale seulement (synchrone) : une page déjà dans le magasin partagé est
+        # reprise par la tâche de préchargement sans appel à Légifrance
+        if cache_key in self.inflight or self.cache.get_stored_at(cache_key, shared=False) is not None:
+            return
+        if (
+            self.concurrency_limiter.inflight >= int(self.concurrency_limiter.limit)
+            or not self.prefetch_budget.try_acquire()
+        ):
+            self.prefetch_stats["skipped"] += 1
+            return
+
+        async def prefetch() -> None:
+            _PREFETCHING.set(True)
+            CALLER.set(CALLER.get()._replace(priority="batch"))
+            try:
+                await self.rechercher(prefix, params)
+                self.prefetch_stats["prefetched"] += 1
+            except Exception as e:
+                self.prefetch_stats["failures"] += 1
+                logger.debug(f"Échec du préchargement de {cache_key} : {e}")
+
+        task = asyncio.ensure_future(prefetch())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    @staticmethod
+    def _shape(response: Dict[str, Any], params: dict) -> Dict[str, Any]:
+        """Applique la projection `fields` et le mode `snippet_length` aux résultats d'une recherche"""
+        if not params.get("fields") and not params.get("snippet_length"):
+            return response
+        return {
+            **response,
+            "results": shape_records(
+                response["results"], params.get("fields"), params.get("snippet_length"), params.get("search")
+            )
+        }
+
+    def _revalidate(self, cache_key: str, fetch) -> None:
+        """Rafraîchit une entrée en tâche de fond, sauf si un appel est déjà en vol pour elle"""
+        if cache_key in self.inflight:
+            return
+
+        async def refresh() -> None:
+            try:
+                await self.inflight.do(cache_key, fetch)
+            except Exception as e:
+                logger.warning(f"Échec du rafraîchissement en tâche de fond de {cache_key} : {e}")
+
+        task = asyncio.ensure_future(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _cache_documents(self, prefix: str, records: List[Dict[str, Any]]) -> None:
+        """
+        Alimente le cache par identifiant avec les documents d'un résultat de recherche,
+        en une seule écriture groupée (jusqu'à 10 000 documents avec `fetch_all`)
+        """
+        documents = {}
+        for kind, (search_prefix, _, _, _, fields) in CONSULT_TYPES.items():
+            if search_prefix != prefix:
+                continue
+            for record in records:
+                identifier = record.get("id")
+                if identifier and ID_TYPES.get(identifier[:8]) == kind:
+                    documents[f"{kind}:{identifier}"] = compact_records([record], fields)
+                    if kind == "article":
+                        self.versions.add_record(identifier, record)
+        await self.cache.aset_many(documents)
+
+    async def _consult(self, kind: str, identifier: str, limiter: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+        _, endpoint, id_field, transform, fields = CONSULT_TYPES[kind]
+        if limiter is None:
+            result = await self._post(endpoint, {id_field: identifier})
+        else:
+            async with limiter:
+                result = await self._post(endpoint, {id_field: identifier})
+        record = transform(result)
+        if record is None:
+            raise UpstreamError(f"Document introuvable : {identifier}", status_code=404)
+        await self.cache.aset(f"{kind}:{identifier}", compact_records([record], fields))
+        return record
+
+    async def get_article_version(
+        self, article_id: str, date: str, limiter: Optional[asyncio.Semaphore] = None
+    ) -> Dict[str, Any]:
+        """
+        Article tel qu'en vigueur à une date. Une date comprise dans l'intervalle de
+        validité d'une version déjà vue (consultation ou recherche) est servie par l'index
+        des versions ; sinon la liste des versions de l'article est demandée une fois
+        (/consult/getArticle), puis seule la version valable à la date.
+        :param article_id: Identifiant de l'article (n'importe laquelle de ses versions)
+        :param date: Date ISO (AAAA-MM-JJ)
+        :param limiter: Sémaphore borné autour des appels amont
+        :return: Article de la version en vigueur à `date`
+        """
+        version = self.versions.find(article_id, date)
+        if version is not None and version.record is not None:
+            return version.record
+
+        async def consult(identifier: str) -> Dict[str, Any]:
+            if limiter is None:
+                return await self._post("/consult/getArticle", {"id": identifier})
+            async with limiter:
+                return await self._post("/consult/getArticle", {"id": identifier})
+
+        if version is None:
+            result = await consult(article_id)
+            record = transform_article_consult(result)
+            if record is None:
+                raise UpstreamError(f"Document introuvable : {article_id}", status_code=404)
+            for known in transform_article_versions(result):
+                self.versions.add(article_id, known["date_debut"], known["date_fin"], version_id=known["id"])
+            self.versions.add_record(article_id, record)
+            version = self.versions.lookup(article_id, date)
+            if version is None:
+                raise UpstreamError(f"Aucune version de {article_id} en vigueur le {date}", status_code=404)
+            if version.record is not None:
+                return version.record
+
+        record = transform_article_consult(await consult(version.version_id))
+        if record is None:
+            raise UpstreamError(f"Document introuvable : {version.version_id}", status_code=404)
+        # Intervalle de la version consultée, à défaut celui de la liste des versions
+        self.versions.add(
+            article_id, record.get("date_debut") or version.start, record.get("date_fin") or version.end, record=record
+        )
+        return record
+
+    async def get_articles(self, ids: List[str], concurrency: int = 10, date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Consulte des articles (LEGIARTI, JORFARTI) et décisions (JURITEXT) par identifiant.
+        Chaque document est servi par le cache par identifiant, alimenté aussi par les
+        résultats de recherche, puis par le miroir local ; seuls les absents sont demandés
+        à Légifrance, en parallèle avec au plus `concurrency` appels simultanés.
+        :param ids: Identifiants Légifrance
+        :param concurrency: Nombre maximal d'appels amont simultanés
+        :param date: Date ISO : articles dans leur version en vigueur à cette date
+                     (voir `get_article_version`), décisions inchangées
+        :return: Par identifiant (dédupliqué, dans l'ordre), le document ou l'exception levée
+        """
+        unique = list(dict.fromkeys(identifier.strip().upper() for identifier in ids))
+        results: Dict[str, Any] = {}
+        if date is not None:
+            articles = [identifier for identifier in unique if ID_TYPES.get(identifier[:8]) == "article"]
+            limiter = asyncio.Semaphore(max(1, concurrency))
+            fetched = await asyncio.gather(
+                *(
+                    self.inflight.do(
+                        f"version:{identifier}:{date}",
+                        lambda identifier=identifier: self.get_article_version(identifier, date, limiter)
+                    )
+                    for identifier in articles
+                ),
+                return_exceptions=True
+            )
+            results.update(zip(articles, fetched))
+            others = [identifier for identifier in unique if identifier not in results]
+            if others:
+                results.update(await self.get_articles(others, concurrency))
+            return {identifier: results[identifier] for identifier in unique}
+
+        misses: List[Tuple[str, str]] = []
+        for identifier in unique:
+            kind = ID_TYPES.get(identifier[:8])
+            if kind is None:
+                results[identifier] = ValueError(f"Identifiant non pris en charge : {identifier}")
+                continue
+            key = f"{kind}:{identifier}"
+            entry = await self.cache.aget_entry(key)
+            if entry is None:
+                misses.append((kind, identifier))
+                continue
+            if entry.stale:
+                self._revalidate(key, lambda kind=kind, identifier=identifier: self._consult(kind, identifier))
+            results[identifier] = expand_records(entry.value, CONSULT_TYPES[kind][4])[0]
+
+        if misses and self.offline is not None:
+            for kind, (search_prefix, *_) in CONSULT_TYPES.items():
+                if search_prefix in self.offline_prefixes:
+                    wanted = [identifier for miss_kind, identifier in misses if miss_kind == kind]
+                    found = self.offline.get_records(search_prefix, wanted)
+                    self.offline_hits += len(found)
+                    results.update(found)
+            misses = [(kind, identifier) for kind, identifier in misses if identifier not in results]
+
+        limiter = asyncio.Semaphore(max(1, concurrency))
+        fetched = await asyncio.gather(
+            *(
+                self.inflight.do(
+                    f"{kind}:{identifier}",
+                    lambda kind=kind, identifier=identifier: self._consult(kind, identifier, limiter)
+                )
+                for kind, identifier in misses
+            ),
+            return_exceptions=True
+        )
+        results.update((identifier, result) for (_, identifier), result in zip(misses, fetched))
+        return {identifier: results[identifier] for identifier in unique}
+
+    async def rechercher_code(
+        self,
+        params: dict,
+        limiter: Optional[asyncio.Semaphore] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        params = self._resolve_cursor("code", params)
         payload = {
             "recherche": {
                 "champs": [],
                 "filtres": [],
-                "pageNumber": 1,
+                "pageNumber": params.get("page_number", 1),
                 "pageSize": params.get("page_size", 10),
                 "operateur": "ET",
                 "sort": params.get("sort", "PERTINENCE"),
@@ -88,30 +1019,30 @@ class LegifranceClient:
                 "text": params["code_name"]
             })
 
-        cache_key = self.cache.get_key("code", params)
-        cached_result = self.cache.get(cache_key)
-        if cached_result:
-            return cached_result
+        if params.get("date"):
+            # Fond CODE_DATE : articles dans leur version en vigueur à cette date (aujourd'hui par défaut)
+            payload["recherche"]["filtres"].append({
+                "facette": "DATE_VERSION",
+                "singleDate": epoch_millis(params["date"])
+            })
 
-        headers = await self.get_headers()
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/code",
-                headers=headers,
-                json=payload
-            )
-            print("Status code:", response.status_code)
-            print("Response text:", response.text)
-            result = response.json()
-            self.cache.set(cache_key, result)
-            return result
+        response = await self._search(
+            "code", "/code", params, payload, transform_code_response, CODE_FIELDS, limiter, refresh
+        )
+        return self._shape(self._paginate("code", params, response, prefetch=not refresh), params)
 
-    async def rechercher_texte_legal(self, params: dict) -> Dict[str, Any]:
+    async def rechercher_texte_legal(
+        self,
+        params: dict,
+        limiter: Optional[asyncio.Semaphore] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        params = self._resolve_cursor("texte_legal", params)
         payload = {
             "recherche": {
                 "champs": [],
                 "filtres": [],
-                "pageNumber": 1,
+                "pageNumber": params.get("page_number", 1),
                 "pageSize": params.get("page_size", 10),
                 "operateur": "ET",
                 "sort": params.get("sort", "PERTINENCE"),
@@ -133,30 +1064,32 @@ class LegifranceClient:
                 "text": params["text_id"]
             })
 
-        cache_key = self.cache.get_key("texte_legal", params)
-        cached_result = self.cache.get(cache_key)
-        if cached_result:
-            return cached_result
+        response = await self._search(
+            "texte_legal", "/loda", params, payload, transform_texte_legal_response, TEXTE_LEGAL_FIELDS, limiter, refresh
+        )
+        return self._shape(self._paginate("texte_legal", params, response, prefetch=not refresh), params)
 
-        headers = await self.get_headers()
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/loda",
-                headers=headers,
-                json=payload
-            )
-            print("Status code:", response.status_code)
-            print("Response text:", response.text)
-            result = response.json()
-            self.cache.set(cache_key, result)
-            return result
+    async def rechercher_jurisprudence(
+        self,
+        params: dict,
+        limiter: Optional[asyncio.Semaphore] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        params = self._resolve_cursor("jurisprudence", params)
+        payload = self._jurisprudence_payload(params)
+        response = await self._search(
+            "jurisprudence", "/juri", params, payload, transform_jurisprudence_response, JURISPRUDENCE_FIELDS, limiter, refresh
+        )
+        return self._shape(self._paginate("jurisprudence", params, response, prefetch=not refresh), params)
 
-    async def rechercher_jurisprudence(self, params: dict) -> Dict[str, Any]:
+    @staticmethod
+    def _jurisprudence_payload(params: dict) -> Dict[str, Any]:
+        """Corps d'une recherche de jurisprudence judiciaire (/juri)"""
         payload = {
             "recherche": {
                 "champs": [],
                 "filtres": [],
-                "pageNumber": 1,
+                "pageNumber": params.get("page_number", 1),
                 "pageSize": params.get("page_size", 10),
                 "operateur": "ET",
                 "sort": params.get("sort", "DATE_DESC"),
@@ -183,21 +1116,125 @@ class LegifranceClient:
                 "type": "JURIDICTION",
                 "values": params["juridiction_judiciaire"]
             })
+        return payload
 
-        cache_key = self.cache.get_key("jurisprudence", params)
-        cached_result = self.cache.get(cache_key)
-        if cached_result:
-            return cached_result
+    async def exporter_jurisprudence(self, params: dict) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Export d'une recherche de jurisprudence, page par page au fil des réponses de
+        Légifrance : au plus `export_concurrency` pages sont demandées par avance et en
+        mémoire, quel que soit le nombre de résultats. Les pages ne passent pas par le cache.
+        :param params: Paramètres de la recherche (`fields` et `snippet_length` appliqués,
+                       pagination ignorée)
+        :return: Itérateur asynchrone des pages : enregistrements transformés (`results`),
+                 nombre total de résultats et `truncated` s'il dépasse la limite d'export
+        """
+        payload = self._jurisprudence_payload(params)
+        pages = iter_pages(
+            lambda number, size: self._post_batch("/juri", with_page(payload, number, size)),
+            page_size=self.fetch_all_page_size,
+            concurrency=self.export_concurrency,
+            max_results=self.export_max_results
+        )
+        limit = min(self.export_max_results, MAX_RESULTS)
+        try:
+            async for page in pages:
+                total = page.get("totalResultNumber") or 0
+                yield self._shape({
+                    "results": transform_jurisprudence_response(page),
+                    "totalResultNumber": total,
+                    "truncated": total > limit
+                }, params)
+        finally:
+            # Export abandonné (client déconnecté) : les pages demandées par avance sont annulées
+            await pages.aclose()
 
-        headers = await self.get_headers()
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/juri",
-                headers=headers,
-                json=payload
+    async def rechercher(
+        self,
+        prefix: str,
+        params: dict,
+        limiter: Optional[asyncio.Semaphore] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Recherche générique : aiguille vers `rechercher_code`, `rechercher_texte_legal`
+        ou `rechercher_jurisprudence` selon le préfixe
+        :param prefix: 'code', 'texte_legal' ou 'jurisprudence'
+        :param params: Paramètres de la recherche
+        :param limiter: Sémaphore borné autour de l'appel amont
+        :param refresh: Ignore le cache et le met à jour avec la réponse de Légifrance
+        :return: Enregistrements transformés et nombre total de résultats
+        """
+        if prefix not in SEARCH_METHODS:
+            raise ValueError(f"Type de recherche inconnu : {prefix}")
+        return await getattr(self, SEARCH_METHODS[prefix])(params, limiter, refresh)
+
+    async def rechercher_serialise(
+        self,
+        prefix: str,
+        params: dict,
+        limiter: Optional[asyncio.Semaphore] = None
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        """
+        Comme `rechercher`, mais renvoie les enregistrements déjà sérialisés en JSON. La
+        forme sérialisée est conservée avec l'entrée du cache mémoire : un succès du cache
+        renvoie ces octets tels quels, sans décompression, désérialisation ni sérialisation.
+        :param prefix: 'code', 'texte_legal' ou 'jurisprudence'
+        :param params: Paramètres de la recherche
+        :param limiter: Sémaphore borné autour de l'appel amont
+        :return: Tuple (liste des enregistrements en JSON, autres champs de la réponse :
+                 totalResultNumber, next_cursor, stale...)
+        """
+        if prefix not in SEARCH_METHODS:
+            raise ValueError(f"Type de recherche inconnu : {prefix}")
+        params = self._resolve_cursor(prefix, params)
+        cacheable = (
+            self.keep_rendered
+            and not (self.offline is not None and prefix in self.offline_prefixes)
+            and not params.get("fields") and not params.get("snippet_length")
+        )
+        cache_key = self.cache.get_key(prefix, params)
+        if cacheable:
+            entry = self.cache.get_rendered(cache_key)
+            if entry is not None:
+                self.hot_queries.record(cache_key, prefix, params)
+                data, meta = entry.value
+                return data, self._paginate(prefix, params, dict(meta))
+
+        response = await self.rechercher(prefix, params, limiter)
+        data = dumps(response["results"])
+        meta = {name: value for name, value in response.items() if name != "results"}
+        if cacheable and not meta.get("stale"):
+            # Le curseur suivant est recalculé (et la page suivante préchargée) à chaque succès
+            self.cache.set_rendered(
+                cache_key, data, {name: value for name, value in meta.items() if name != "next_cursor"}
             )
-            print("Status code:", response.status_code)
-            print("Response text:", response.text)
-            result = response.json()
-            self.cache.set(cache_key, result)
-            return result
+        return data, meta
+
+    async def rechercher_lot(
+        self,
+        requests: List[Tuple[str, dict]],
+        concurrency: int = 10
+    ) -> List[Any]:
+        """
+        Exécute un lot de recherches : les doublons sont dédupliqués, les succès du cache
+        répondent immédiatement et les autres partent en parallèle vers Légifrance,
+        avec au plus `concurrency` appels simultanés
+        :param requests: Liste de tuples (préfixe, paramètres)
+        :param concurrency: Nombre maximal d'appels amont simultanés
+        :return: Pour chaque requête, dans l'ordre, le résultat ou l'exception levée
+        """
+        limiter = asyncio.Semaphore(max(1, concurrency))
+        unique: Dict[str, asyncio.Future] = {}
+        futures = []
+        for prefix, params in requests:
+            key = self.cache.get_key(prefix, params)
+            if key not in unique:
+                # Présentation appliquée par requête : les doublons ne diffèrent parfois que par elle
+                search_params = {name: value for name, value in params.items() if name not in PRESENTATION_FIELDS}
+                unique[key] = asyncio.ensure_future(self.rechercher(prefix, search_params, limiter))
+            futures.append(unique[key])
+        await asyncio.gather(*unique.values(), return_exceptions=True)
+        return [
+            future.exception() or self._shape(future.result(), params)
+            for future, (_, params) in zip(futures, requests)
+        ]
@@ -0,0 +1,135 @@
+import asyncio
+import base64
+import binascii
+import json
+import math
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict
+
+# Limites imposées par l'API Légifrance
+MAX_PAGE_SIZE = 100
+MAX_RESULTS = 10000
+
+PageFetcher = Callable[[int, int], Awaitable[Dict[str, Any]]]
+
+
+def with_page(payload: Dict[str, Any], page_number: int, page_size: int) -> Dict[str, Any]:
+    """
+    Copie le corps d'une recherche en fixant la page demandée
+    :param payload: Corps de la requête Légifrance
+    :param page_number: Numéro de page (à partir de 1)
+    :param page_size: Nombre de résultats par page
+    :return: Nouveau corps de requête
+    """
+    return {
+        **payload,
+        "recherche": {**payload["recherche"], "pageNumber": page_number, "pageSize": page_size}
+    }
+
+
+def encode_cursor(fingerprint: str, page_number: int) -> str:
+    """
+    Curseur opaque vers une page d'une recherche
+    :param fingerprint: Empreinte de la recherche (paramètres hors pagination)
+    :param page_number: Numéro de la page désignée
+    """
+    data = json.dumps({"f": fingerprint, "p": page_number}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> int:
+    """
+    Lit un curseur émis par `encode_cursor`
+    :param cursor: Curseur reçu
+    :param fingerprint: Empreinte de la recherche en cours, qui doit être celle du curseur
+    :return: Numéro de page
+    :raises ValueError: Curseur illisible ou émis pour une autre recherche
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        page_number = int(data["p"])
+        cursor_fingerprint = data["f"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Curseur de pagination invalide")
+    if cursor_fingerprint != fingerprint or page_number < 1:
+        raise ValueError("Curseur de pagination émis pour une autre recherche")
+    return page_number
+
+
+def has_next_page(page_number: int, page_size: int, total: int) -> bool:
+    """Indique s'il reste des résultats accessibles après la page (dans la limite de l'API)"""
+    return page_number * page_size < min(total, MAX_RESULTS)
+
+
+async def iter_pages(
+    fetch_page: PageFetcher,
+    page_size: int = MAX_PAGE_SIZE,
+    concurrency: int = 5,
+    max_results: int = MAX_RESULTS,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Parcourt toutes les pages d'une recherche, dans l'ordre et au fil de leur arrivée : la
+    première page donne le nombre total de résultats, les suivantes sont demandées par
+    avance, au plus `concurrency` à la fois. Seules ces pages sont en mémoire : un
+    consommateur lent suspend les demandes, et les demandes en cours sont annulées si
+    l'itération est abandonnée.
+    :param fetch_page: Fonction asynchrone (numéro de page, taille de page) -> réponse
+    :param page_size: Taille de page, bornée par la limite de l'API
+    :param concurrency: Nombre maximal de pages demandées par avance
+    :param max_results: Nombre maximal de résultats parcourus (la dernière page est tronquée)
+    :return: Itérateur asynchrone des réponses de chaque page
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    max_results = max(1, min(max_results, MAX_RESULTS))
+
+    def trimmed(page: Dict[str, Any], page_number: int) -> Dict[str, Any]:
+        results = page.get("results") or []
+        room = wanted - (page_number - 1) * page_size
+        return page if len(results) <= room else {**page, "results": results[:room]}
+
+    first_page = await fetch_page(1, page_size)
+    total = first_page.get("totalResultNumber") or len(first_page.get("results") or [])
+    wanted = min(total, max_results)
+    last_page = math.ceil(wanted / page_size)
+    yield trimmed(first_page, 1)
+
+    pending: Deque[asyncio.Future] = deque()
+    next_page = 2
+    try:
+        while next_page <= last_page or pending:
+            while next_page <= last_page and len(pending) < max(1, concurrency):
+                pending.append(asyncio.ensure_future(fetch_page(next_page, page_size)))
+                next_page += 1
+            page_number = next_page - len(pending)
+            yield trimmed(await pending.popleft(), page_number)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def fetch_all_pages(
+    fetch_page: PageFetcher,
+    page_size: int = MAX_PAGE_SIZE,
+    concurrency: int = 5,
+    max_results: int = MAX_RESULTS,
+) -> Dict[str, Any]:
+    """
+    Récupère toutes les pages d'une recherche : la première page donne le nombre total
+    de résultats, les suivantes sont demandées en parallèle puis fusionnées dans l'ordre.
+    :param fetch_page: Fonction asynchrone (numéro de page, taille de page) -> réponse
+    :param page_size: Taille de page, bornée par la limite de l'API
+    :param concurrency: Nombre maximal de pages demandées simultanément
+    :param max_results: Nombre maximal de résultats récupérés
+    :return: Réponse de la première page dont `results` contient tous les résultats
+    """
+    merged: Dict[str, Any] = {}
+    results = []
+    async for page in iter_pages(fetch_page, page_size, concurrency, max_results):
+        if not merged:
+            merged = dict(page)
+        results.extend(page.get("results") or [])
+
+    total = merged.get("totalResultNumber") or len(results)
+    merged["results"] = results
+    merged["truncated"] = total > max(1, min(max_results, MAX_RESULTS))
+    return merged
@@ -0,0 +1,168 @@
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Deque, Optional
+
+
+class TokenBucket:
+    """
+    Limiteur de débit partagé (seau à jetons) : au plus `rate` appels par seconde en
+    régime établi, avec des rafales jusqu'à `burst`. Chaque appelant réserve son jeton
+    puis attend son tour, ce qui sert les appels dans l'ordre d'arrivée.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        :param rate: Débit autorisé en appels par seconde (désactivé si <= 0)
+        :param burst: Taille maximale d'une rafale (par défaut `rate`)
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.waited = 0.0
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            delay = -self.tokens / self.rate
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    def try_acquire(self) -> bool:
+        """
+        Prend un jeton s'il y en a un disponible, sans attendre
+        :return: False si le débit est épuisé
+        """
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def charge(self, amount: float) -> None:
+        """
+        Débite `amount` jetons sans attendre, quitte à rendre le solde négatif : les
+        appels suivants attendent (ou sont refusés) jusqu'à ce que le débit l'ait comblé
+        """
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - amount
+        self.updated = now
+
+    def retry_after(self) -> float:
+        """Délai (s) avant qu'un jeton soit disponible, après un `try_acquire` refusé"""
+        if self.rate <= 0:
+            return 0.0
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite adaptative du nombre d'appels amont simultanés (AIMD) : la limite augmente
+    d'environ 1 par « tour » d'appels réussis sous la latence cible, et est multipliée
+    par `decrease_factor` sur une erreur ou une latence excessive.
+    """
+
+    def __init__(
+        self,
+        initial: int = 16,
+        minimum: int = 2,
+        maximum: int = 64,
+        latency_target: float = 1.0,
+        decrease_factor: float = 0.7
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.inflight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # La place venait d'être attribuée : on la rend
+                self.inflight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: float, success: bool) -> None:
+        """
+        Libère une place et ajuste la limite selon le résultat de l'appel
+        :param latency: Durée de l'appel en secondes
+        :param success: False pour une erreur amont (429, 5xx, délai dépassé...)
+        """
+        self.inflight -= 1
+        if not success or latency > self.latency_target:
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            self.decreases += 1
+        elif self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.increases += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Lit l'en-tête Retry-After (nombre de secondes ou date HTTP)
+    :return: Délai en secondes ou None si absent ou illisible
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """
+    Délai avant la tentative suivante : exponentiel avec gigue complète, ou la valeur
+    de Retry-After quand l'amont l'indique (bornée par `cap`)
+    :param attempt: Numéro de la tentative échouée (à partir de 0)
+    :param base: Délai de base en secondes
+    :param cap: Délai maximal en secondes
+    :param retry_after: Délai demandé par l'amont
+    """
+    if retry_after is not None:
+        return min(retry_after, cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Tuple
+
+# Classes de priorité : poids multipliant celui de la clé dans la file équitable
+PRIORITY_WEIGHTS = {"interactive": 8.0, "batch": 1.0}
+
+
+class Caller(NamedTuple):
+    """Appelant à l'origine d'un appel amont : nom de la clé d'API, classe de priorité et poids"""
+    name: str
+    priority: str = "interactive"
+    weight: float = 1.0
+
+
+# Appels sans requête d'origine (préchauffage, tâches de fond)
+INTERNAL = Caller("interne", "batch")
+
+# Clés d'API non déclarées : un seul appelant, pour borner les séries de métriques
+ANONYMOUS = "anonyme"
+
+# Appelant courant, positionné par la dépendance d'authentification de chaque requête
+CALLER = contextvars.ContextVar("legifrance_caller", default=INTERNAL)
+
+
+@contextmanager
+def batch_priority() -> Iterator[None]:
+    """
+    Passe en classe `batch` les appels amont du bloc (et des tâches qu'il crée) :
+    récupération de toutes les pages, export, préchargement
+    """
+    token = CALLER.set(CALLER.get()._replace(priority="batch"))
+    try:
+        yield
+    finally:
+        CALLER.reset(token)
+
+
+class FairScheduler:
+    """
+    File d'attente équitable pondérée (WFQ) devant les appels amont : chaque flux (clé et
+    classe de priorité) donne à ses appels une étiquette de fin virtuelle
+    `max(temps virtuel, fin précédente du flux) + 1 / poids`, et les appels en attente
+    passent par étiquette croissante, un à la fois. Une clé qui envoie cent appels d'un
+    coup ne fait attendre les autres que de sa part de débit, et un appel interactif
+    (poids x8) passe devant un traitement de masse, y compris celui de sa propre clé.
+    Le passage (`turn`) couvre l'attente du limiteur de débit et de la limite de
+    concurrence : c'est l'ordre d'accès à ces ressources que la file rend équitable.
+    """
+
+    def __init__(self, priority_weights: Dict[str, float] = PRIORITY_WEIGHTS):
+        self.priority_weights = priority_weights
+        self.virtual_time = 0.0
+        self._finish: Dict[Tuple[str, str], float] = {}
+        self._queue: List[Tuple[float, int, float, asyncio.Future]] = []
+        self._busy = False
+        self._sequence = itertools.count()
+        self.keys: Dict[str, Dict[str, float]] = {}
+
+    def weight(self, caller: Caller) -> float:
+        return max(caller.weight, 1e-6) * self.priority_weights.get(caller.priority, 1.0)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, waiter in self._queue if not waiter.done())
+
+    @asynccontextmanager
+    async def turn(self, caller: Caller) -> AsyncIterator[None]:
+        """Attend le tour de `caller`, le garde pendant le bloc puis le passe à l'appel suivant"""
+        flow = (caller.name, caller.priority)
+        start_tag = max(self.virtual_time, self._finish.get(flow, 0.0))
+        finish_tag = start_tag + 1 / self.weight(caller)
+        self._finish[flow] = finish_tag
+        if self._busy:
+            waiter = asyncio.get_event_loop().create_future()
+            heapq.heappush(self._queue, (finish_tag, next(self._sequence), start_tag, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Le tour venait d'être attribué : on le passe
+                    self._next()
+                else:
+                    # Retiré de la file à son passage
+                    waiter.cancel()
+                raise
+        else:
+            self._busy = True
+            self.virtual_time = start_tag
+        try:
+            yield
+        finally:
+            self._next()
+
+    def record(self, caller: Caller, waited: float) -> None:
+        """Comptabilise un appel de `caller` et son attente (secondes)"""
+        stats = self.keys.setdefault(caller.name, {"calls": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0})
+        stats["calls"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+    def _next(self) -> None:
+        while self._queue:
+            _, _, start_tag, waiter = heapq.heappop(self._queue)
+            if waiter.done():
+                continue
+            self.virtual_time = start_tag
+            waiter.set_result(None)
+            return
+        # File vide : les étiquettes passées ne servent plus
+        self._busy = False
+        self._finish.clear()
+        self.virtual_time = 0.0
+
+    def get_stats(self) -> dict:
+        return {"queued": self.queued, "keys": self.keys}
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents portant sur la même clé : le premier appelant
+    exécute la fonction, les suivants attendent son résultat (ou son erreur).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Exécute `fn` une seule fois pour toutes les requêtes concurrentes sur `key`
+        :param key: Clé identifiant l'appel (ex: clé de cache)
+        :param fn: Fonction asynchrone sans argument à exécuter
+        :return: Résultat partagé de `fn`
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # shield : l'annulation d'un appelant n'interrompt pas l'appel partagé
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Évite l'avertissement "exception never retrieved" si plus personne n'attend
+            future.exception()
+
+    def get_stats(self) -> dict:
+        """
+        Retourne des statistiques sur les appels regroupés
+        :return: Dictionnaire avec les statistiques
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight)
+        }
@@ -1,4 +1,21 @@
-from typing import Dict, Any, List
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Sequence
+
+SOURCE = "Légifrance"
+LEGIFRANCE_URL = "https://www.legifrance.gouv.fr"
+
+# Champs des enregistrements renvoyés par les endpoints, dans l'ordre de la réponse
+CODE_FIELDS = (
+    "id", "numero", "titre", "contenu", "etat", "date_debut", "date_fin",
+    "date_maj", "nature", "section", "source", "lien_officiel"
+)
+TEXTE_LEGAL_FIELDS = ("id", "titre", "contenu", "date_maj", "nature", "source", "lien_officiel")
+JURISPRUDENCE_FIELDS = (
+    "id", "date", "juridiction", "numero", "theme_principal", "resume",
+    "texte_integral", "lien_officiel", "source"
+)
 
 def transform_code_response(api_response: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
@@ -18,7 +35,7 @@ def transform_code_response(api_response: Dict[str, Any]) -> List[Dict[str, Any]
             "date_maj": item.get("date_maj"),
             "nature": item.get("nature"),
             "section": item.get("section"),
-            "source": "Légifrance",
+            "source": SOURCE,
             "lien_officiel": item.get("lien_officiel")
         }
         articles.append(article)
@@ -36,7 +53,7 @@ def transform_texte_legal_response(api_response: Dict[str, Any]) -> List[Dict[st
             "contenu": item.get("contenu"),
             "date_maj": item.get("date_maj"),
             "nature": item.get("nature"),
-            "source": "Légifrance",
+            "source": SOURCE,
             "lien_officiel": item.get("lien_officiel")
         }
         textes.append(texte)
@@ -57,7 +74,182 @@ def transform_jurisprudence_response(api_response: Dict[str, Any]) -> List[Dict[
             "resume": item.get("resume"),
             "texte_integral": item.get("texte_integral"),
             "lien_officiel": item.get("lien_officiel"),
-            "source": "Légifrance"
+            "source": SOURCE
         }
         decisions.append(decision)
     return decisions
+
+# Champs longs remplacés par un extrait en mode `snippet_length`
+SNIPPET_FIELDS = ("contenu", "texte_integral", "resume")
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+ELLIPSIS = "…"
+
+def _fold(text: str) -> str:
+    """Minuscules sans accents, caractère par caractère : les positions restent celles du texte d'origine"""
+    return "".join(unicodedata.normalize("NFD", char)[:1].lower()[:1] or char for char in text)
+
+def search_terms(search: Optional[str]) -> List[str]:
+    """Mots significatifs d'une recherche, sous forme repliée (sans casse ni accents)"""
+    if not search:
+        return []
+    return [word for word in re.findall(r"\w+", _fold(search)) if len(word) > 2 or word.isdigit()]
+
+def snippet(text: Optional[str], terms: Sequence[str], length: int) -> Optional[str]:
+    """
+    Extrait d'environ `length` caractères autour de la première occurrence des termes
+    recherchés, avec les occurrences surlignées (<mark>) ; début du texte si aucun terme
+    n'y figure
+    :param text: Texte complet
+    :param terms: Termes repliés (voir `search_terms`)
+    :param length: Longueur visée de l'extrait, hors marques
+    """
+    if not text:
+        return text
+    folded = _fold(text)
+    pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, terms)) + r")\w*") if terms else None
+    first = pattern.search(folded) if pattern else None
+
+    start = max(0, first.start() - length // 3) if first else 0
+    end = min(len(text), start + length)
+    start = max(0, end - length)
+    # Coupures sur des espaces pour ne pas tronquer de mots
+    if start > 0:
+        space = text.find(" ", start, first.start() if first else end)
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(" ", first.end() if first and first.end() < end else start, end)
+        end = space if space != -1 else end
+
+    parts = [ELLIPSIS] if start > 0 else []
+    position = start
+    if pattern:
+        for match in pattern.finditer(folded, start, end):
+            parts.append(text[position:match.start()])
+            parts.append(HIGHLIGHT_START + text[match.start():min(match.end(), end)] + HIGHLIGHT_END)
+            position = min(match.end(), end)
+    parts.append(text[position:end])
+    if end < len(text):
+        parts.append(ELLIPSIS)
+    return "".join(parts)
+
+def shape_records(
+    records: List[Dict[str, Any]],
+    fields: Optional[Sequence[str]] = None,
+    snippet_length: Optional[int] = None,
+    search: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Réduit les enregistrements pour une liste de résultats : projection sur `fields`
+    (l'identifiant est toujours conservé pour consulter le texte complet ensuite) et
+    remplacement des champs longs par un extrait surligné de `snippet_length` caractères.
+    """
+    if not fields and not snippet_length:
+        return records
+    terms = search_terms(search) if snippet_length else []
+    shaped = []
+    for record in records:
+        if fields:
+            record = {field: value for field, value in record.items() if field == "id" or field in fields}
+        else:
+            record = dict(record)
+        if snippet_length:
+            for field in SNIPPET_FIELDS:
+                if record.get(field):
+                    record[field] = snippet(record[field], terms, snippet_length)
+        shaped.append(record)
+    return shaped
+
+def _consult_date(value: Any) -> Optional[str]:
+    """Les endpoints de consultation datent en millisecondes depuis l'epoch : date ISO"""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).date().isoformat()
+    return value
+
+def transform_article_consult(api_response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Transforme la réponse de /consult/getArticle en article, avec les champs
+    d'un résultat de recherche de codes ; None si l'article est introuvable.
+    """
+    item = api_response.get("article")
+    if not item:
+        return None
+    numero = item.get("num")
+    return {
+        "id": item.get("id"),
+        "numero": numero,
+        "titre": f"Article {numero}" if numero else None,
+        "contenu": item.get("texte"),
+        "etat": item.get("etat"),
+        "date_debut": _consult_date(item.get("dateDebut")),
+        "date_fin": _consult_date(item.get("dateFin")),
+        "date_maj": _consult_date(item.get("dateDebut")),
+        "nature": item.get("nature"),
+        "section": item.get("sectionParentTitre"),
+        "source": SOURCE,
+        "lien_officiel": f"{LEGIFRANCE_URL}/codes/article_lc/{item.get('id')}"
+    }
+
+def transform_article_versions(api_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Versions d'un article listées par /consult/getArticle (`articleVersions`) :
+    identifiant de chaque version et intervalle de validité en dates ISO.
+    """
+    item = api_response.get("article") or {}
+    return [
+        {
+            "id": version.get("id"),
+            "date_debut": _consult_date(version.get("dateDebut")),
+            "date_fin": _consult_date(version.get("dateFin"))
+        }
+        for version in item.get("articleVersions") or []
+        if version.get("id")
+    ]
+
+def transform_decision_consult(api_response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Transforme la réponse de /consult/juri en décision, avec les champs
+    d'un résultat de recherche de jurisprudence ; None si la décision est introuvable.
+    """
+    item = api_response.get("text")
+    if not item:
+        return None
+    sommaires = item.get("sommaire") or []
+    resumes = [sommaire.get("resumePrincipal") for sommaire in sommaires if sommaire.get("resumePrincipal")]
+    return {
+        "id": item.get("id"),
+        "date": _consult_date(item.get("dateTexte")),
+        "juridiction": item.get("juridiction"),
+        "numero": item.get("num"),
+        "theme_principal": item.get("titre"),
+        "resume": " ".join(resumes) or None,
+        "texte_integral": item.get("texte"),
+        "lien_officiel": f"{LEGIFRANCE_URL}/juri/id/{item.get('id')}",
+        "source": SOURCE
+    }
+
+def compact_records(records: List[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Forme compacte d'une liste d'enregistrements transformés pour le cache : les noms
+    de champs ne sont stockés qu'une fois, chaque enregistrement devient une ligne
+    de valeurs, et la constante `source` est omise.
+    """
+    stored = [field for field in fields if field != "source"]
+    return {
+        "fields": stored,
+        "rows": [[record.get(field) for field in stored] for record in records]
+    }
+
+def expand_records(compact: Dict[str, Any], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Reconstruit les enregistrements transformés à partir de leur forme compacte,
+    dans l'ordre des champs de la réponse.
+    """
+    index = {field: position for position, field in enumerate(compact["fields"])}
+    records = []
+    for row in compact["rows"]:
+        records.append({
+            field: SOURCE if field == "source" else (row[index[field]] if field in index else None)
+            for field in fields
+        })
+    return records
@@ -0,0 +1,27 @@
+import httpx
+import pytest
+
+
+@pytest.fixture
+def legifrance_env(monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_CLIENT_ID", "client-id")
+    monkeypatch.setenv("LEGIFRANCE_CLIENT_SECRET", "client-secret")
+    monkeypatch.setenv("LEGIFRANCE_API_ENDPOINT", "https://api.test/lf-engine-app")
+
+
+@pytest.fixture
+def upstream_calls():
+    """Journal des requêtes reçues par l'amont simulé"""
+    return []
+
+
+@pytest.fixture
+def mock_http_client(upstream_calls):
+    """Client httpx dont les réponses sont simulées localement (token OAuth + recherches)"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        upstream_calls.append(request)
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        return httpx.Response(200, json={"results": [{"id": "LEGIARTI000006419280"}], "totalResultNumber": 1})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
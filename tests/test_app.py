@@ -0,0 +1,174 @@
+import csv
+import io
+import importlib
+import json
+
+import httpx
+import pytest
+
+from src.server.settings import Settings
+
+
+def test_import_sans_configuration(monkeypatch):
+    for name in ("LEGIFRANCE_CLIENT_ID", "LEGIFRANCE_CLIENT_SECRET", "LEGIFRANCE_API_ENDPOINT"):
+        monkeypatch.delenv(name, raising=False)
+    main = importlib.import_module("src.server.main")
+    app = main.create_app(Settings(), http_client=httpx.AsyncClient())
+    # Le client n'est construit (et les identifiants vérifiés) qu'au premier usage
+    assert app.state.services._client is None
+    with pytest.raises(ValueError):
+        app.state.services.client
+
+
+@pytest.mark.asyncio
+async def test_demarrage_et_preparation(mock_http_client, upstream_calls):
+    from src.server.main import create_app
+
+    settings = Settings(client_id="id", client_secret="secret", api_endpoint="https://api.test/lf-engine-app")
+    app = create_app(settings, http_client=mock_http_client)
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.get("/health")).status_code == 200
+        response = await client.get("/ready")
+        assert response.status_code == 503 and not response.json()["started"]
+
+        await app.router.startup()
+        response = await client.get("/ready")
+        assert response.status_code == 200
+        assert set(response.json()["startup_seconds"]) == {"create_app", "startup"}
+        assert "legifrance_startup_duration_seconds" in (await client.get("/metrics")).text
+
+        response = await client.post("/tools/rechercher_code", json={"search": "bail"}, headers={"X-API-Key": "cle"})
+        assert response.json()["articles"][0]["id"] == "LEGIARTI000006419280"
+        await app.router.shutdown()
+    await mock_http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_export_jurisprudence_en_flux():
+    from src.server.main import create_app
+
+    total = 230
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        recherche = json.loads(request.content)["recherche"]
+        start = (recherche["pageNumber"] - 1) * recherche["pageSize"]
+        ids = range(start, min(start + recherche["pageSize"], total))
+        results = [{"id": f"JURITEXT{i:012d}", "date": "2024-01-01", "resume": "Bail, \"résiliation\""} for i in ids]
+        return httpx.Response(200, json={"results": results, "totalResultNumber": total})
+
+    settings = Settings(client_id="id", client_secret="secret", api_endpoint="https://api.test/lf-engine-app")
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app = create_app(settings, http_client=mock)
+    headers = {"X-API-Key": "cle"}
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/tools/exporter_jurisprudence", json={"search": "bail"}, headers=headers)
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["x-total-count"] == "230" and "x-truncated" not in response.headers
+        lines = response.content.splitlines()
+        assert len(lines) == total and json.loads(lines[-1])["id"] == "JURITEXT000000000229"
+
+        response = await client.post(
+            "/tools/exporter_jurisprudence?format=csv", json={"search": "bail", "fields": ["date", "resume"]}, headers=headers
+        )
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert response.headers["content-type"].startswith("text/csv")
+        assert rows[0] == ["id", "date", "resume"] and len(rows) == total + 1
+        assert rows[1] == ["JURITEXT000000000000", "2024-01-01", "Bail, \"résiliation\""]
+
+        response = await client.post("/tools/exporter_jurisprudence?format=xml", json={"search": "bail"}, headers=headers)
+        assert response.status_code == 422
+    await mock.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reponse_amont_invalide(monkeypatch):
+    from src.server.main import create_app
+
+    monkeypatch.setenv("LEGIFRANCE_MAX_RETRIES", "0")
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        return httpx.Response(200, text="<html>maintenance</html>")
+
+    settings = Settings(client_id="id", client_secret="secret", api_endpoint="https://api.test/lf-engine-app")
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app = create_app(settings, http_client=mock)
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post(
+            "/tools/rechercher_jurisprudence_judiciaire", json={"search": "bail"}, headers={"X-API-Key": "cle"}
+        )
+        assert response.status_code == 502
+    await mock.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cles_d_api_et_debit(mock_http_client):
+    from src.server.main import create_app
+
+    settings = Settings(
+        client_id="id",
+        client_secret="secret",
+        api_endpoint="https://api.test/lf-engine-app",
+        api_keys={
+            "secret-portail": {"name": "portail", "rate": 1},
+            "secret-index": {"name": "indexeur", "priority": "batch"},
+            "secret-lot": {"name": "lot", "rate": 2}
+        }
+    )
+    app = create_app(settings, http_client=mock_http_client)
+    search = {"search": "bail"}
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/tools/rechercher_code", json=search, headers={"X-API-Key": "inconnue"})
+        assert response.status_code == 401
+
+        response = await client.post("/tools/rechercher_code", json=search, headers={"X-API-Key": "secret-portail"})
+        assert response.status_code == 200
+        response = await client.post("/tools/rechercher_code", json=search, headers={"X-API-Key": "secret-portail"})
+        assert response.status_code == 429 and response.headers["retry-after"] == "1"
+
+        # Sans débit déclaré, la clé n'est pas limitée ; ses appels amont lui sont rattachés
+        for term in ("congé", "préavis", "loyer"):
+            response = await client.post("/tools/rechercher_code", json={"search": term}, headers={"X-API-Key": "secret-index"})
+            assert response.status_code == 200
+        keys = app.state.services.client.scheduler.get_stats()["keys"]
+        assert keys["indexeur"]["calls"] == 3 and "portail" in keys
+        # Une recherche par lot compte un jeton par élément et passe en classe `batch`
+        items = [{"type": "code", "params": {"search": term}} for term in ("usufruit", "servitude", "mitoyenneté")]
+        response = await client.post("/tools/batch", json={"items": items}, headers={"X-API-Key": "secret-lot"})
+        assert response.status_code == 200 and keys["lot"]["calls"] == 3
+        response = await client.post("/tools/get_articles", json={"ids": ["LEGIARTI000006419280"]}, headers={"X-API-Key": "secret-lot"})
+        assert response.status_code == 429 and int(response.headers["retry-after"]) >= 1
+        metrics = (await client.get("/metrics")).text
+        assert 'legifrance_api_key_rejected_total{key="portail"} 1' in metrics
+        assert 'legifrance_upstream_queue_wait_seconds_count{key="indexeur",priority="batch"} 3' in metrics
+        assert 'legifrance_upstream_queue_wait_seconds_count{key="lot",priority="batch"} 3' in metrics
+        assert "secret-" not in metrics
+    await mock_http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cles_non_declarees_bornees(mock_http_client):
+    from src.server.main import create_app
+
+    settings = Settings(
+        client_id="id", client_secret="secret", api_endpoint="https://api.test/lf-engine-app",
+        api_key_rate=1, anonymous_keys_tracked=50
+    )
+    app = create_app(settings, http_client=mock_http_client)
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        for number in range(200):
+            response = await client.post("/tools/rechercher_code", json={"search": "bail"}, headers={"X-API-Key": f"cle-{number}"})
+            assert response.status_code == 200
+        # Débit propre à chaque clé, même regroupée sous l'appelant anonyme
+        response = await client.post("/tools/rechercher_code", json={"search": "bail"}, headers={"X-API-Key": "cle-199"})
+        assert response.status_code == 429
+
+        services = app.state.services
+        assert len(services.anonymous_limits) == 50 and not services.key_limits
+        assert list(services.client.scheduler.get_stats()["keys"]) == ["anonyme"]
+        metrics = (await client.get("/metrics")).text
+        assert "cle-" not in metrics
+    await mock_http_client.aclose()
@@ -0,0 +1,39 @@
+from src.cache.keys import canonicalize, make_key
+from src.models.schemas import CodeSearchParams, JurisprudenceSearchParams
+
+
+def test_cles_equivalentes():
+    base = make_key("code", CodeSearchParams(search="Code civil", code_name="Code civil").dict())
+    assert make_key("code", {"search": "  code   CIVIL ", "code_name": "Code civil"}) == base
+    # Forme décomposée (e + accent combinant) et forme composée
+    assert make_key("code", {"search": "propriété"}) == make_key("code", {"search": "propriété"})
+
+
+def test_filtres_tries_et_defauts_retires():
+    params = JurisprudenceSearchParams(
+        search="bail commercial", publication_bulletin=["T", "F"], juridiction_judiciaire=["Cour de cassation"]
+    ).dict()
+    reordered = {
+        "search": "bail commercial",
+        "publication_bulletin": ["F", "T", "F"],
+        "juridiction_judiciaire": ["Cour de cassation"],
+        "sort": "date_desc",
+    }
+    assert make_key("jurisprudence", params) == make_key("jurisprudence", reordered)
+    assert canonicalize("jurisprudence", params) == {
+        "search": "bail commercial",
+        "publication_bulletin": ["F", "T"],
+        "juridiction_judiciaire": ["Cour de cassation"],
+    }
+
+
+def test_parametres_significatifs_conserves():
+    assert make_key("code", {"search": "bail"}) != make_key("texte_legal", {"search": "bail"})
+    assert make_key("code", {"search": "bail"}) != make_key("code", {"search": "bail", "page_size": 20})
+    assert make_key("code", {"search": "bail"}) != make_key("code", {"search": "bail", "fetch_all": True})
+    # Accents conservés
+    assert make_key("code", {"search": "côte"}) != make_key("code", {"search": "cote"})
+    # Avec fetch_all, la taille de page est ignorée ; la clé reste de taille fixe
+    key = make_key("code", {"search": "bail", "fetch_all": True, "page_size": 50})
+    assert key == make_key("code", {"search": "bail", "fetch_all": True})
+    assert len(key) == len(make_key("code", {"search": "x" * 1000}))
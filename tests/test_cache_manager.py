@@ -0,0 +1,99 @@
+import random
+import time
+import string
+from src.cache.cache_manager import CacheManager
+
+RESPONSE = {"results": [{"id": "LEGIARTI000006419280", "titre": "Article 544"}], "totalResultNumber": 1}
+
+
+def test_cache_disque_survit_au_redemarrage(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = CacheManager(disk_path=path)
+    key = cache.get_key("code", {"search": "propriété"})
+    cache.set(key, RESPONSE)
+
+    # Nouveau processus : mémoire vide, l'entrée est relue sur disque puis promue en mémoire
+    restarted = CacheManager(disk_path=path)
+    assert len(restarted.cache) == 0
+    assert restarted.get(key) == RESPONSE
+    assert key in restarted.cache
+    assert restarted.get_stats()["disk"]["entries"] == 1
+
+
+def test_cache_disque_expiration(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = CacheManager(disk_path=path, ttl_policies={"jurisprudence": (0, 0)})
+    key = cache.get_key("jurisprudence", {"search": "bail commercial"})
+    cache.set(key, RESPONSE)
+    assert cache.get(key) is None
+
+
+def test_cache_memoire_seul():
+    cache = CacheManager()
+    key = cache.get_key("texte_legal", {"text_id": "JORFTEXT000000504704"})
+    assert cache.get(key) is None
+    cache.set(key, RESPONSE)
+    assert cache.get(key) == RESPONSE
+    cache.remove(key)
+    assert cache.get(key) is None
+    assert cache.get_stats()["disk"] is None
+
+
+def test_cache_borne_en_octets():
+    cache = CacheManager(max_bytes=2000)
+    small = cache.get_key("code", {"search": "petit"})
+    cache.set(small, RESPONSE)
+    for _ in range(5):
+        assert cache.get(small) == RESPONSE
+
+    # Les grosses réponses peu lues sont évincées avant la petite entrée fréquemment lue
+    for index in range(10):
+        texte = "".join(random.Random(index).choices(string.ascii_letters, k=1500))
+        large = {"results": [{"texte_integral": texte}]}
+        cache.set(cache.get_key("jurisprudence", {"search": str(index)}), large)
+
+    stats = cache.get_stats()
+    assert stats["currsize"] <= 2000
+    assert stats["evictions"] > 0
+    assert cache.get(small) == RESPONSE
+    assert cache.get(cache.get_key("code", {"search": "absent"})) is None
+    stats = cache.get_stats()
+    assert stats["hits"] == 6
+    assert stats["misses"] == 1
+
+
+def test_cache_rejette_une_entree_plus_grosse_que_le_budget():
+    cache = CacheManager(max_bytes=100)
+    key = cache.get_key("jurisprudence", {"search": "énorme"})
+    texte = "".join(random.Random(0).choices(string.ascii_letters, k=500))
+    cache.set(key, {"results": [{"texte_integral": texte}]})
+    assert cache.get(key) is None
+    assert cache.get_stats()["rejected"] == 1
+
+
+def test_cache_perime_servi_jusqu_au_delai_dur(monkeypatch):
+    cache = CacheManager(ttl_policies={"jurisprudence": (60, 600)})
+    key = cache.get_key("jurisprudence", {"search": "bail commercial"})
+    cache.set(key, RESPONSE)
+    now = time.time()
+
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    assert cache.get_entry(key).stale is False
+
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    entry = cache.get_entry(key)
+    assert entry.stale is True
+    assert entry.value == RESPONSE
+
+    monkeypatch.setattr(time, "time", lambda: now + 601)
+    assert cache.get_entry(key) is None
+
+
+def test_ecriture_groupee(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = CacheManager(disk_path=path)
+    values = {f"article:LEGIARTI{i:012d}": {"id": i} for i in range(100)}
+    cache.set_many(values)
+    restarted = CacheManager(disk_path=path)
+    assert restarted.get_stats()["disk"]["entries"] == 100
+    assert restarted.get("article:LEGIARTI000000000042") == {"id": 42}
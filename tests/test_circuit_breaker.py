@@ -0,0 +1,37 @@
+import time
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_ouverture_puis_retablissement():
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=0.05)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    # Semi-ouvert : un seul appel de test à la fois
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["openings"] == 2
+
+
+def test_place_de_test_liberee():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    breaker.allow()
+    breaker.record_failure()
+    time.sleep(0.06)
+    # Appel de test terminé sans verdict : un autre peut partir aussitôt
+    assert breaker.allow() and not breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
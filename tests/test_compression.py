@@ -0,0 +1,54 @@
+import gzip
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from src.server.middleware import CompressionMiddleware, negotiate_encoding
+
+
+def test_negociation():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+
+
+@pytest.mark.asyncio
+async def test_compression_selon_taille_et_flux():
+    records = [{"id": f"LEGIARTI{n:012d}", "contenu": "Tout fait quelconque de l'homme " * 5} for n in range(50)]
+
+    async def large(request):
+        return JSONResponse({"articles": records})
+
+    async def small(request):
+        return JSONResponse({"ok": True})
+
+    async def stream(request):
+        async def lines():
+            for record in records:
+                yield (str(record) + "\n").encode()
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app = CompressionMiddleware(
+        Starlette(routes=[Route("/large", large), Route("/small", small), Route("/stream", stream)]),
+        minimum_size=500
+    )
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(response.content) / 5
+        assert response.json() == {"articles": records}
+
+        response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        response = await client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text.count("\n") == len(records)
@@ -1,5 +1,9 @@
+import json
+import asyncio
+import httpx
 import pytest
-from src.utils.legifrance_client import LegifranceClient
+from src.utils.legifrance_client import LegifranceClient, UpstreamError
+from src.utils.transformers import CODE_FIELDS, compact_records, transform_jurisprudence_response
 from src.models.schemas import CodeSearchParams, TexteLegalSearchParams, JurisprudenceSearchParams
 
 @pytest.mark.asyncio
@@ -33,3 +37,510 @@ async def test_rechercher_jurisprudence():
     )
     result = await client.rechercher_jurisprudence(params)
     assert result is not None
+
+@pytest.mark.asyncio
+async def test_client_http_partage(legifrance_env, mock_http_client, upstream_calls):
+    client = LegifranceClient(http_client=mock_http_client)
+    await client.start()
+    assert client.http_client is mock_http_client
+
+    await client.rechercher_code({"search": "propriété", "page_size": 5})
+    await client.rechercher_jurisprudence({"search": "bail commercial", "page_size": 5})
+
+    # Un seul token pour les deux recherches, toutes les requêtes passent par le même pool
+    paths = [request.url.path for request in upstream_calls]
+    assert paths.count("/api/oauth/token") == 1
+    assert paths[1:] == ["/lf-engine-app/code", "/lf-engine-app/juri"]
+
+    # Le client fourni par l'appelant n'est pas fermé par `close()`
+    await client.close()
+    assert not mock_http_client.is_closed
+    await mock_http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_renouvellement_token_unique(legifrance_env, upstream_calls):
+    async def handler(request):
+        upstream_calls.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    # Cinquante appelants concurrents, une seule requête OAuth
+    tokens = await asyncio.gather(*(client.get_token() for _ in range(50)))
+    assert set(tokens) == {"token"}
+    assert len(upstream_calls) == 1
+
+    stats = client.get_token_stats()
+    assert stats["refreshes"] == 1
+    assert stats["failures"] == 0
+    assert stats["last_latency"] > 0
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_recherches_identiques_regroupees(legifrance_env, upstream_calls):
+    async def handler(request):
+        upstream_calls.append(request)
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"results": [{"id": "LEGIARTI000006419280"}]})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    params = {"search": "bail commercial", "page_size": 5}
+
+    results = await asyncio.gather(*(client.rechercher_code(dict(params)) for _ in range(20)))
+    assert all(result == results[0] for result in results)
+    assert [request.url.path for request in upstream_calls].count("/lf-engine-app/code") == 1
+    assert client.inflight.get_stats() == {"calls": 1, "coalesced": 19, "inflight": 0}
+
+    # L'erreur du premier appel est propagée à tous les appelants regroupés
+    async def failing_post(endpoint, payload):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Légifrance indisponible")
+
+    client._post = failing_post
+    errors = await asyncio.gather(
+        *(client.rechercher_jurisprudence(dict(params)) for _ in range(5)), return_exceptions=True
+    )
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert client.inflight.get_stats()["calls"] == 2
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_entree_perimee_servie_puis_rafraichie(legifrance_env, mock_http_client, upstream_calls):
+    client = LegifranceClient(http_client=mock_http_client)
+    client.cache.ttl_policies["code"] = (0, 3600)
+    params = {"search": "propriété", "page_size": 5}
+    stale = {**compact_records([], CODE_FIELDS), "totalResultNumber": 0}
+    client.cache.set(client.cache.get_key("code", params), stale)
+
+    # La valeur périmée est servie sans attendre l'amont...
+    assert await client.rechercher_code(params) == {"results": [], "totalResultNumber": 0}
+    assert upstream_calls == []
+
+    # ...puis remplacée par le rafraîchissement en tâche de fond
+    await asyncio.gather(*client._background_tasks)
+    assert client.cache.get(client.cache.get_key("code", params))["totalResultNumber"] == 1
+    await mock_http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_conserve_les_enregistrements_transformes(legifrance_env, upstream_calls):
+    item = {
+        "id": "JURITEXT000049000000", "date": "2024-01-10", "juridiction": "Cour de cassation",
+        "numero": "22-10.000", "resume": "Bail commercial", "texte_integral": "Attendu que...",
+        "champ_inutile": "x" * 1000
+    }
+
+    def handler(request):
+        upstream_calls.append(request)
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        return httpx.Response(200, json={"results": [item], "totalResultNumber": 1})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    params = {"search": "bail commercial"}
+    first = await client.rechercher_jurisprudence(params)
+    second = await client.rechercher_jurisprudence(params)
+
+    expected = transform_jurisprudence_response({"results": [item]})
+    assert first["results"] == second["results"] == expected
+    assert list(second["results"][0]) == list(expected[0])
+
+    # Forme compacte : ni la constante `source` ni les champs non exposés
+    cached = client.cache.get(client.cache.get_key("jurisprudence", params))
+    assert "source" not in cached["fields"]
+    assert "champ_inutile" not in str(cached)
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_recherche_par_lot(legifrance_env, upstream_calls):
+    running = {"now": 0, "max": 0}
+
+    async def handler(request):
+        upstream_calls.append(request)
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        search = json.loads(request.content)["recherche"]["champs"][0]["text"]
+        return httpx.Response(200, json={"results": [{"id": search}], "totalResultNumber": 1})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    cached_params = {"search": "déjà en cache"}
+    client.cache.set(
+        client.cache.get_key("code", cached_params),
+        {**compact_records([{"id": "cache"}], CODE_FIELDS), "totalResultNumber": 1}
+    )
+
+    requests = [("code", {"search": f"article {index}"}) for index in range(6)]
+    requests += [("code", {"search": "article 0"}), ("code", cached_params), ("inconnu", {})]
+    results = await client.rechercher_lot(requests, concurrency=2)
+
+    assert [result["results"][0]["id"] for result in results[:8]] == [
+        "article 0", "article 1", "article 2", "article 3", "article 4", "article 5", "article 0", "cache"
+    ]
+    assert isinstance(results[8], ValueError)
+    # Doublon et entrée en cache : six appels amont seulement, jamais plus de deux à la fois
+    assert [request.url.path for request in upstream_calls].count("/lf-engine-app/code") == 6
+    assert running["max"] <= 2
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_nouvelles_tentatives_sur_429(legifrance_env, upstream_calls, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_RETRY_BASE_DELAY", "0.001")
+    statuses = iter([429, 503, 200])
+
+    def handler(request):
+        upstream_calls.append(request)
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        status = next(statuses)
+        if status == 429:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(status, json={"results": [], "totalResultNumber": 0})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    result = await client.rechercher_jurisprudence({"search": "bail commercial"})
+    assert result["totalResultNumber"] == 0
+    assert [request.url.path for request in upstream_calls].count("/lf-engine-app/juri") == 3
+
+    # Erreur non récupérable : pas de nouvelle tentative, erreur typée
+    attempts = []
+
+    async def bad_request(endpoint, payload):
+        attempts.append(endpoint)
+        raise UpstreamError("requête invalide", status_code=400)
+
+    client._post_once = bad_request
+    with pytest.raises(UpstreamError) as error:
+        await client.rechercher_code({"search": "x"})
+    assert error.value.status_code == 400
+    assert attempts == ["/code"]
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_disjoncteur_et_reponse_perimee(legifrance_env, upstream_calls, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_MAX_RETRIES", "0")
+    monkeypatch.setenv("LEGIFRANCE_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("LEGIFRANCE_BREAKER_RECOVERY", "0.05")
+    upstream = {"status": 200}
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        upstream_calls.append(request)
+        return httpx.Response(upstream["status"], json={"results": [{"id": "JURITEXT1"}], "totalResultNumber": 1})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    client.cache.ttl_policies["jurisprudence"] = (0, 0)
+    known = {"search": "bail commercial"}
+    await client.rechercher_jurisprudence(known)
+
+    # Panne : la dernière valeur connue est servie, marquée périmée
+    upstream["status"] = 503
+    result = await client.rechercher_jurisprudence(known)
+    assert result["stale"] is True
+    assert result["results"][0]["id"] == "JURITEXT1"
+    with pytest.raises(UpstreamError):
+        await client.rechercher_jurisprudence({"search": "jamais vu"})
+    assert client.breakers["/juri"].state == "open"
+
+    # Circuit ouvert : échec immédiat, sans appel amont
+    calls = len(upstream_calls)
+    with pytest.raises(UpstreamError) as error:
+        await client.rechercher_jurisprudence({"search": "autre"})
+    assert error.value.reason == "circuit_open"
+    assert len(upstream_calls) == calls
+
+    # Semi-ouvert : l'appel de test réussit et referme le circuit
+    upstream["status"] = 200
+    await asyncio.sleep(0.06)
+    result = await client.rechercher_jurisprudence(known)
+    assert "stale" not in result
+    assert client.breakers["/juri"].state == "closed"
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_reponse_non_json(legifrance_env, upstream_calls, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_MAX_RETRIES", "1")
+    monkeypatch.setenv("LEGIFRANCE_RETRY_BASE_DELAY", "0.001")
+    upstream = {"maintenance": False}
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        upstream_calls.append(request)
+        if upstream["maintenance"]:
+            return httpx.Response(200, text="<html>maintenance</html>")
+        return httpx.Response(200, json={"results": [{"id": "JURITEXT1"}], "totalResultNumber": 1})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    client.cache.ttl_policies["jurisprudence"] = (0, 0)
+    known = {"search": "bail commercial"}
+    await client.rechercher_jurisprudence(known)
+
+    # Page de maintenance en 200 : nouvelle tentative, échec compté, réponse périmée servie
+    upstream["maintenance"] = True
+    upstream_calls.clear()
+    result = await client.rechercher_jurisprudence(known)
+    assert result["stale"] is True and result["results"][0]["id"] == "JURITEXT1"
+    assert len(upstream_calls) == 2
+    assert client.breakers["/juri"].failures == 2
+    with pytest.raises(UpstreamError) as error:
+        await client.rechercher_jurisprudence({"search": "jamais vu"})
+    assert error.value.reason == "invalid_response"
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_endpoint_oauth_indisponible(legifrance_env, upstream_calls, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_MAX_RETRIES", "1")
+    monkeypatch.setenv("LEGIFRANCE_RETRY_BASE_DELAY", "0.001")
+    monkeypatch.setenv("LEGIFRANCE_BREAKER_FAILURES", "2")
+    oauth = {"status": 200}
+
+    def handler(request):
+        upstream_calls.append(request.url.path)
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(oauth["status"], json={"access_token": "token", "expires_in": 3600})
+        return httpx.Response(200, json={"results": [{"id": "JURITEXT1"}], "totalResultNumber": 1})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    client.cache.ttl_policies["jurisprudence"] = (0, 0)
+    known = {"search": "bail commercial"}
+    await client.rechercher_jurisprudence(known)
+
+    # Token expiré, endpoint OAuth en panne : la réponse périmée est servie
+    oauth["status"] = 503
+    client.access_token = None
+    upstream_calls.clear()
+    result = await client.rechercher_jurisprudence(known)
+    assert result["stale"] is True and result["results"][0]["id"] == "JURITEXT1"
+    assert upstream_calls == ["/api/oauth/token", "/api/oauth/token"]
+    assert client.breakers["/oauth/token"].state == "open"
+    assert client.breakers["/juri"].state == "closed"
+
+    # Disjoncteur ouvert : échec immédiat et typé, sans solliciter l'endpoint OAuth
+    with pytest.raises(UpstreamError) as error:
+        await client.rechercher_jurisprudence({"search": "jamais vu"})
+    assert error.value.reason == "circuit_open"
+    assert len(upstream_calls) == 2
+    assert client.get_token_stats()["failures"] == 3
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_echec_du_token_pendant_l_appel_de_test(legifrance_env, upstream_calls, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_MAX_RETRIES", "0")
+    monkeypatch.setenv("LEGIFRANCE_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("LEGIFRANCE_BREAKER_RECOVERY", "0.05")
+    upstream = {"oauth": 200, "juri": 503}
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(upstream["oauth"], json={"access_token": "token", "expires_in": 3600})
+        upstream_calls.append(request)
+        return httpx.Response(upstream["juri"], json={"results": [{"id": "JURITEXT1"}], "totalResultNumber": 1})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    for search in ("a", "b"):
+        with pytest.raises(UpstreamError):
+            await client.rechercher_jurisprudence({"search": search})
+    assert client.breakers["/juri"].state == "open"
+
+    # L'appel de test échoue sur le token : il ne dit rien de /juri et libère sa place
+    await asyncio.sleep(0.06)
+    upstream["oauth"] = 503
+    client.access_token = None
+    with pytest.raises(UpstreamError) as error:
+        await client.rechercher_jurisprudence({"search": "c"})
+    assert error.value.endpoint == "/oauth/token"
+    assert client.breakers["/juri"].half_open_calls == 0
+
+    upstream["oauth"], upstream["juri"] = 200, 200
+    result = await client.rechercher_jurisprudence({"search": "c"})
+    assert result["results"][0]["id"] == "JURITEXT1"
+    assert client.breakers["/juri"].state == "closed"
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_get_articles_cache_par_identifiant(legifrance_env, upstream_calls):
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        upstream_calls.append(request)
+        body = json.loads(request.content)
+        if request.url.path.endswith("/code"):
+            return httpx.Response(200, json={"results": [{"id": "LEGIARTI000032041571", "numero": "1240"}], "totalResultNumber": 1})
+        if request.url.path.endswith("/consult/getArticle"):
+            if body["id"] == "LEGIARTI000000000000":
+                return httpx.Response(200, json={"article": None})
+            return httpx.Response(200, json={"article": {"id": body["id"], "num": "1241", "dateDebut": 1475280000000}})
+        return httpx.Response(200, json={"text": {"id": body["textId"], "num": "19-12.345"}})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    await client.rechercher_code({"search": "responsabilité"})
+    assert len(upstream_calls) == 1
+
+    documents = await client.get_articles([
+        "LEGIARTI000032041571", "legiarti000032041572", "JURITEXT000041746811",
+        "LEGIARTI000000000000", "KALIARTI000005781234", "LEGIARTI000032041571"
+    ])
+    assert list(documents) == [
+        "LEGIARTI000032041571", "LEGIARTI000032041572", "JURITEXT000041746811",
+        "LEGIARTI000000000000", "KALIARTI000005781234"
+    ]
+    # Article déjà présent dans un résultat de recherche : aucun appel amont
+    assert documents["LEGIARTI000032041571"]["numero"] == "1240"
+    assert documents["LEGIARTI000032041572"]["date_debut"] == "2016-10-01"
+    assert documents["JURITEXT000041746811"]["numero"] == "19-12.345"
+    assert isinstance(documents["LEGIARTI000000000000"], UpstreamError)
+    assert isinstance(documents["KALIARTI000005781234"], ValueError)
+    assert sorted(call.url.path.rsplit("/", 1)[1] for call in upstream_calls[1:]) == ["getArticle", "getArticle", "juri"]
+
+    # Seconde consultation entièrement servie par le cache
+    calls = len(upstream_calls)
+    await client.get_articles(["LEGIARTI000032041572", "JURITEXT000041746811"])
+    assert len(upstream_calls) == calls
+    await client.http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_consultation_a_date(legifrance_env, upstream_calls):
+    # Deux versions de l'article 1240 : [1985-01-01, 2016-10-01) puis en vigueur
+    versions = [
+        {"id": "LEGIARTI000006438819", "dateDebut": 473385600000, "dateFin": 1475280000000},
+        {"id": "LEGIARTI000032041571", "dateDebut": 1475280000000, "dateFin": 32503680000000}
+    ]
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        upstream_calls.append(request)
+        body = json.loads(request.content)
+        if request.url.path.endswith("/code"):
+            record = {"id": "LEGIARTI000006436298", "numero": "544", "date_debut": "2005-01-01", "date_fin": "2012-01-01"}
+            return httpx.Response(200, json={"results": [record], "totalResultNumber": 1})
+        version = next(version for version in versions if version["id"] == body["id"])
+        article = {**version, "num": "1240", "texte": f"Version {version['id']}", "articleVersions": versions}
+        return httpx.Response(200, json={"article": article})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    current = "LEGIARTI000032041571"
+    documents = await client.get_articles([current], date="2020-05-01")
+    assert documents[current]["contenu"] == f"Version {current}"
+    # Même intervalle de validité : servi par l'index des versions
+    await client.get_articles([current], date="2023-06-15")
+    assert len(upstream_calls) == 1
+
+    # Version antérieure : seule cette version est demandée, une fois
+    documents = await client.get_articles([current], date="2000-01-01")
+    assert documents[current]["contenu"] == "Version LEGIARTI000006438819"
+    assert documents[current]["date_fin"] == "2016-10-01"
+    await client.get_articles([current], date="1999-12-31")
+    assert [json.loads(call.content)["id"] for call in upstream_calls] == [current, "LEGIARTI000006438819"]
+
+    documents = await client.get_articles([current], date="1970-01-01")
+    assert isinstance(documents[current], UpstreamError) and documents[current].status_code == 404
+
+    # Recherche à une date : filtre DATE_VERSION, versions des résultats indexées
+    await client.rechercher_code({"search": "propriété", "date": "2010-01-01"})
+    filters = json.loads(upstream_calls[-1].content)["recherche"]["filtres"]
+    assert filters == [{"facette": "DATE_VERSION", "singleDate": 1262304000000}]
+    calls = len(upstream_calls)
+    documents = await client.get_articles(["LEGIARTI000006436298"], date="2008-03-03")
+    assert documents["LEGIARTI000006436298"]["numero"] == "544"
+    assert len(upstream_calls) == calls
+    assert client.versions.get_stats()["hits"] == 3
+    await client.http_client.aclose()
+
+    with pytest.raises(ValueError):
+        CodeSearchParams(search="bail", date="2020-13-01")
+
+@pytest.mark.asyncio
+async def test_resultats_preserialises(legifrance_env, mock_http_client, upstream_calls):
+    client = LegifranceClient(http_client=mock_http_client)
+    params = {"search": "bail"}
+    data, meta = await client.rechercher_serialise("code", params)
+    assert not meta.get("stale") and "next_cursor" not in meta
+    assert json.loads(data)[0]["id"] == "LEGIARTI000006419280"
+
+    # Succès du cache : les mêmes octets, sans repasser par la désérialisation
+    client.cache.codec.decode = None
+    cached, _ = await client.rechercher_serialise("code", params)
+    assert cached is data
+    assert len(upstream_calls) == 2
+    await mock_http_client.aclose()
+
+@pytest.mark.asyncio
+async def test_projection_et_extraits(legifrance_env, upstream_calls):
+    contenu = "Le bailleur est tenu de délivrer au preneur la chose louée. " * 20
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        upstream_calls.append(request)
+        return httpx.Response(200, json={"results": [{"id": "LEGIARTI000006442430", "titre": "Article 1719", "contenu": contenu}]})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    full, shaped = await client.rechercher_lot([
+        ("code", {"search": "chose louee"}),
+        ("code", {"search": "chose louee", "fields": ["titre", "contenu"], "snippet_length": 60})
+    ])
+    # Une seule recherche amont : la présentation n'entre pas dans la clé
+    assert len(upstream_calls) == 1
+    assert full["results"][0]["contenu"] == contenu
+    article = shaped["results"][0]
+    assert set(article) == {"id", "titre", "contenu"}
+    assert "<mark>chose</mark> <mark>louée</mark>" in article["contenu"]
+    assert len(article["contenu"]) < 100
+
+    data, _ = await client.rechercher_serialise("code", {"search": "chose louee", "fields": ["titre"]})
+    assert json.loads(data) == [{"id": "LEGIARTI000006442430", "titre": "Article 1719"}]
+    await client.http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_pagination_par_curseur(legifrance_env, upstream_calls, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_PREFETCH_BURST", "1")
+
+    def handler(request):
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        page = json.loads(request.content)["recherche"]["pageNumber"]
+        upstream_calls.append(page)
+        return httpx.Response(200, json={"results": [{"id": f"LEGIARTI{page:012d}"}], "totalResultNumber": 25})
+
+    client = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    params = {"search": "bail", "page_size": 10}
+    data, meta = await client.rechercher_serialise("code", params)
+    assert [article["id"] for article in json.loads(data)] == ["LEGIARTI000000000001"]
+    for _ in range(10):
+        await asyncio.sleep(0)
+    # La page 2 a été préchargée en tâche de fond ; la 3, hors budget, ne l'est pas
+    assert upstream_calls == [1, 2]
+
+    page_2, meta = await client.rechercher_serialise("code", {**params, "cursor": meta["next_cursor"]})
+    assert [article["id"] for article in json.loads(page_2)] == ["LEGIARTI000000000002"]
+    assert upstream_calls == [1, 2]
+    assert client.prefetch_stats == {"prefetched": 1, "skipped": 1, "failures": 0}
+
+    page_3 = await client.rechercher_code({**params, "cursor": meta["next_cursor"]})
+    assert "next_cursor" not in page_3
+    assert upstream_calls == [1, 2, 3]
+
+    # Un curseur n'est valable que pour la recherche qui l'a émis
+    with pytest.raises(ValueError):
+        await client.rechercher_code({"search": "vente", "page_size": 10, "cursor": meta["next_cursor"]})
+    with pytest.raises(ValueError):
+        await client.rechercher_code({**params, "cursor": "invalide"})
+
+    # Rafraîchissement (préchauffage) : curseur renvoyé, page suivante non préchargée
+    refreshed = await client.rechercher("code", {"search": "vente", "page_size": 10}, refresh=True)
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert "next_cursor" in refreshed
+    assert upstream_calls == [1, 2, 3, 1]
+    assert client.prefetch_stats == {"prefetched": 1, "skipped": 1, "failures": 0}
+    await client.http_client.aclose()
@@ -0,0 +1,45 @@
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from src.server.middleware import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, MetricsMiddleware
+from src.utils.metrics import Registry
+
+
+def test_format_prometheus():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requêtes", ["endpoint", "status"])
+    latency = registry.histogram("latency_seconds", "Latence", ["endpoint"], buckets=(0.1, 1.0))
+    requests.inc("/juri", "200")
+    requests.inc("/juri", "200")
+    latency.observe(0.05, "/juri")
+    latency.observe(0.5, "/juri")
+    latency.observe(3.0, "/juri")
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="/juri",status="200"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="/juri",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="/juri",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="/juri",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{endpoint="/juri"} 3' in text
+    assert 'latency_seconds_sum{endpoint="/juri"} 3.55' in text
+
+
+@pytest.mark.asyncio
+async def test_middleware_mesure_les_routes():
+    async def endpoint(request):
+        assert HTTP_IN_FLIGHT.get() == 1
+        return JSONResponse({"ok": True})
+
+    app = MetricsMiddleware(Starlette(routes=[Route("/tools/test", endpoint)]))
+    before = HTTP_LATENCY.count("/tools/test")
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/tools/test")
+        await client.get("/inconnu")
+
+    assert HTTP_LATENCY.count("/tools/test") == before + 1
+    assert HTTP_REQUESTS.get("other", "GET", "404") >= 1
+    assert HTTP_IN_FLIGHT.get() == 0
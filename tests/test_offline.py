@@ -0,0 +1,121 @@
+import io
+import tarfile
+
+import pytest
+
+from src.offline.ingest import ingest
+from src.offline.store import OfflineStore, match_expression
+from src.utils.legifrance_client import LegifranceClient
+from src.utils.transformers import CODE_FIELDS, JURISPRUDENCE_FIELDS
+
+ARTICLE_CODE = """<?xml version="1.0" encoding="UTF-8"?>
+<ARTICLE>
+<META><META_COMMUN><ID>LEGIARTI000032041571</ID><ORIGINE>LEGI</ORIGINE><NATURE>Article</NATURE></META_COMMUN>
+<META_SPEC><META_ARTICLE><NUM>1240</NUM><ETAT>VIGUEUR</ETAT><DATE_DEBUT>2016-10-01</DATE_DEBUT><DATE_FIN>2999-01-01</DATE_FIN></META_ARTICLE></META_SPEC></META>
+<CONTEXTE><TEXTE cid="LEGITEXT000006070721" nature="CODE"><TITRE_TXT c_titre_court="Code civil">Code civil</TITRE_TXT>
+<TM><TITRE_TM>Livre III</TITRE_TM><TM><TITRE_TM>Chapitre II : La responsabilité extracontractuelle en général</TITRE_TM></TM></TM></TEXTE></CONTEXTE>
+<BLOC_TEXTUEL><CONTENU><p>Tout fait quelconque de l'homme, qui cause à autrui un dommage, oblige celui par la faute duquel il est arrivé à le réparer.</p></CONTENU></BLOC_TEXTUEL>
+</ARTICLE>"""
+
+ARTICLE_ABROGE = ARTICLE_CODE.replace("LEGIARTI000032041571", "LEGIARTI000006438819").replace(
+    "<ETAT>VIGUEUR</ETAT>", "<ETAT>MODIFIE</ETAT>"
+)
+
+DECISION = """<?xml version="1.0" encoding="UTF-8"?>
+<TEXTE_JURI_JUDI>
+<META><META_COMMUN><ID>JURITEXT000041746811</ID><ORIGINE>CASS</ORIGINE><NATURE>ARRET</NATURE></META_COMMUN>
+<META_SPEC><META_JURI><DATE_DEC>2020-03-12</DATE_DEC><JURIDICTION>Cour de cassation</JURIDICTION><NUMERO>1912345</NUMERO></META_JURI>
+<META_JURI_JUDI><NUMEROS_AFFAIRES><NUMERO_AFFAIRE>19-12.345</NUMERO_AFFAIRE></NUMEROS_AFFAIRES><PUBLI_BULL publie="oui"/></META_JURI_JUDI></META_SPEC></META>
+<TEXTE><BLOC_TEXTUEL><CONTENU>Sur le moyen unique : le bailleur d'un bail commercial...</CONTENU></BLOC_TEXTUEL>
+<SOMMAIRE><SCT>BAIL COMMERCIAL</SCT><ANA>Le délai de prescription court à compter du congé.</ANA></SOMMAIRE></TEXTE>
+</TEXTE_JURI_JUDI>"""
+
+SECTION = """<?xml version="1.0" encoding="UTF-8"?><SECTION_TA><ID>LEGISCTA000006136352</ID></SECTION_TA>"""
+
+
+def _archive(path, files):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OfflineStore(str(tmp_path / "legifrance.db"))
+    archive = _archive(tmp_path / "legi.tar.gz", {
+        "legi/article/LEGIARTI000032041571.xml": ARTICLE_CODE,
+        "legi/article/LEGIARTI000006438819.xml": ARTICLE_ABROGE,
+        "legi/section_ta/LEGISCTA000006136352.xml": SECTION,
+        "cass/JURITEXT000041746811.xml": DECISION,
+    })
+    stats = ingest(store, [archive])
+    assert stats["code"] == 2 and stats["jurisprudence"] == 1 and stats["skipped"] == 1
+    yield store
+    store.close()
+
+
+def test_recherche_plein_texte(store):
+    # Insensible à la casse et aux accents ; seuls les articles en vigueur
+    response = store.search("code", {"search": "FAUTE domMage", "code_name": "code civil"})
+    assert response["totalResultNumber"] == 1
+    article = response["results"][0]
+    assert tuple(article) == CODE_FIELDS
+    assert article["id"] == "LEGIARTI000032041571"
+    assert article["section"] == "Chapitre II : La responsabilité extracontractuelle en général"
+    assert article["source"] == "Légifrance"
+
+    assert store.search("code", {"search": "dommage faute", "type_recherche": "EXACTE"})["totalResultNumber"] == 0
+    assert store.search("code", {"search": "1240", "champ": "NUM_ARTICLE"})["totalResultNumber"] == 1
+
+    decisions = store.search("jurisprudence", {"search": "delai", "publication_bulletin": ["T"]})
+    assert tuple(decisions["results"][0]) == JURISPRUDENCE_FIELDS
+    assert decisions["results"][0]["numero"] == "19-12.345"
+    assert store.search("jurisprudence", {"search": "delai", "publication_bulletin": ["F"]})["totalResultNumber"] == 0
+
+
+def test_expression_echappee():
+    assert match_expression('bail" OR NEAR(') == '"bail" AND "OR" AND "NEAR"'
+    assert match_expression("  ") is None
+
+
+def test_liste_de_suppression(store, tmp_path):
+    archive = _archive(tmp_path / "increment.tar.gz", {
+        "20240105/liste_suppression_legi.dat": "legi/global/code_et_TNC_en_vigueur/LEGIARTI000032041571\n"
+    })
+    assert ingest(store, [archive])["deleted"] == 1
+    assert store.search("code", {"search": "dommage"})["totalResultNumber"] == 0
+
+
+def test_recherche_a_date(store, tmp_path):
+    # Version antérieure de l'article 1240, remplacée le 2016-10-01
+    ancienne = ARTICLE_CODE.replace("LEGIARTI000032041571", "LEGIARTI000006438820").replace(
+        "<ETAT>VIGUEUR</ETAT><DATE_DEBUT>2016-10-01</DATE_DEBUT><DATE_FIN>2999-01-01</DATE_FIN>",
+        "<ETAT>MODIFIE</ETAT><DATE_DEBUT>1804-02-19</DATE_DEBUT><DATE_FIN>2016-10-01</DATE_FIN>"
+    )
+    ingest(store, [_archive(tmp_path / "versions.tar.gz", {"legi/article/LEGIARTI000006438820.xml": ancienne})])
+
+    ids = lambda params: [record["id"] for record in store.search("code", params)["results"]]
+    assert ids({"search": "dommage"}) == ["LEGIARTI000032041571"]
+    assert ids({"search": "dommage", "date": "2000-01-01"}) == ["LEGIARTI000006438820"]
+    assert sorted(ids({"search": "dommage", "date": "2016-10-01"})) == ["LEGIARTI000006438819", "LEGIARTI000032041571"]
+    assert ids({"search": "dommage", "date": "1800-01-01"}) == []
+
+
+@pytest.mark.asyncio
+async def test_client_sert_le_miroir_local(legifrance_env, mock_http_client, upstream_calls, store, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_OFFLINE_DB", store.path)
+    client = LegifranceClient(http_client=mock_http_client)
+
+    response = await client.rechercher_code({"search": "dommage"})
+    assert response["results"][0]["id"] == "LEGIARTI000032041571"
+    assert upstream_calls == []
+
+    # Sans résultat local, repli sur PISTE
+    await client.rechercher_code({"search": "introuvable"})
+    assert len(upstream_calls) == 2
+    assert client.offline_hits == 1
+    await mock_http_client.aclose()
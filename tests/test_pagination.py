@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from src.utils.pagination import fetch_all_pages, iter_pages, with_page
+
+TOTAL = 250
+
+
+def make_fetcher(calls, delay=0.0):
+    running = {"now": 0, "max": 0}
+
+    async def fetch_page(page_number, page_size):
+        calls.append((page_number, page_size))
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(delay)
+        running["now"] -= 1
+        start = (page_number - 1) * page_size
+        ids = range(start, min(start + page_size, TOTAL))
+        return {"results": [{"id": i} for i in ids], "totalResultNumber": TOTAL}
+
+    return fetch_page, running
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_pages_fusionne_dans_l_ordre():
+    calls = []
+    fetch_page, running = make_fetcher(calls, delay=0.01)
+    result = await fetch_all_pages(fetch_page, page_size=20, concurrency=4)
+
+    assert [item["id"] for item in result["results"]] == list(range(TOTAL))
+    assert len(calls) == 13
+    assert running["max"] <= 4
+    assert result["truncated"] is False
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_pages_limites():
+    calls = []
+    fetch_page, _ = make_fetcher(calls)
+    result = await fetch_all_pages(fetch_page, page_size=500, max_results=150)
+
+    # Taille de page bornée à 100, arrêt au plafond de résultats
+    assert calls == [(1, 100), (2, 100)]
+    assert len(result["results"]) == 150
+    assert result["truncated"] is True
+
+
+def test_with_page_ne_modifie_pas_le_corps():
+    payload = {"recherche": {"pageNumber": 1, "pageSize": 10}, "fond": "JURI"}
+    assert with_page(payload, 3, 50) == {"recherche": {"pageNumber": 3, "pageSize": 50}, "fond": "JURI"}
+    assert payload["recherche"]["pageNumber"] == 1
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_borne_les_pages_en_avance():
+    calls = []
+    fetch_page, running = make_fetcher(calls)
+    ids = []
+    async for page in iter_pages(fetch_page, page_size=20, concurrency=3):
+        # Consommateur lent : les demandes ne dépassent pas la fenêtre
+        await asyncio.sleep(0.005)
+        assert len(calls) <= len(ids) // 20 + 1 + 3
+        ids.extend(item["id"] for item in page["results"])
+    assert ids == list(range(TOTAL))
+
+    # Itération abandonnée : les demandes restantes ne sont pas faites
+    calls.clear()
+    pages = iter_pages(fetch_page, page_size=20, concurrency=3)
+    await pages.__anext__()
+    await pages.__anext__()
+    await pages.aclose()
+    await asyncio.sleep(0.01)
+    assert len(calls) <= 5 and running["now"] == 0
@@ -0,0 +1,45 @@
+import asyncio
+import time
+import pytest
+from src.utils.rate_limit import AdaptiveConcurrencyLimiter, TokenBucket, backoff_delay, parse_retry_after
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_respecte_le_debit():
+    bucket = TokenBucket(rate=100, burst=5)
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(25)))
+    # 5 jetons en rafale, puis 20 au rythme de 100/s
+    assert time.monotonic() - start >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_limite_adaptative_aimd():
+    limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=8, latency_target=0.5)
+    for _ in range(4):
+        await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    # Une erreur réduit la limite : la place libérée ne suffit pas à débloquer l'appelant
+    limiter.release(0.1, success=False)
+    assert limiter.limit == pytest.approx(2.8)
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    for _ in range(2):
+        limiter.release(0.1, success=True)
+    await asyncio.sleep(0)
+    assert waiter.done()
+    assert limiter.inflight == 2
+    # Succès rapides : croissance additive
+    assert 2.8 < limiter.limit < 4
+
+
+def test_retry_after_et_backoff():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("n'importe quoi") is None
+    assert backoff_delay(0, 0.2, 10, retry_after=30) == 10
+    assert all(0 <= backoff_delay(4, 0.2, 1) <= 1 for _ in range(50))
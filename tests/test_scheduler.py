@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from src.utils.scheduler import CALLER, INTERNAL, Caller, FairScheduler, batch_priority
+
+
+async def run_calls(scheduler, calls, served, duration=0.002):
+    async def call(caller, number):
+        async with scheduler.turn(caller):
+            served.append((caller.name, number))
+            await asyncio.sleep(duration)
+
+    return [asyncio.ensure_future(call(caller, number)) for caller, number in calls]
+
+
+@pytest.mark.asyncio
+async def test_file_equitable_entre_cles():
+    scheduler = FairScheduler()
+    served = []
+    bulk = Caller("indexeur", "batch")
+    portal = Caller("portail", "interactive")
+    tasks = await run_calls(scheduler, [(bulk, number) for number in range(40)], served)
+    await asyncio.sleep(0.01)
+    # Arrivés derrière 40 appels de masse, les appels interactifs passent presque aussitôt
+    tasks += await run_calls(scheduler, [(portal, number) for number in range(3)], served)
+    await asyncio.gather(*tasks)
+
+    position = [index for index, (name, _) in enumerate(served) if name == "portail"]
+    assert max(position) < len(served) - 30
+    assert [number for name, number in served if name == "indexeur"] == list(range(40))
+    assert scheduler.queued == 0 and not scheduler._busy
+
+    # Appel interactif d'une clé dont les traitements de masse occupent déjà la file
+    served.clear()
+    tasks = await run_calls(scheduler, [(bulk, number) for number in range(20)], served)
+    await asyncio.sleep(0.005)
+    tasks += await run_calls(scheduler, [(Caller("indexeur"), 0)], served)
+    await asyncio.gather(*tasks)
+    assert served.index(("indexeur", 0)) < 5 and served[-1] != ("indexeur", 0)
+
+    # Deux clés de même classe : service alterné, au prorata des poids
+    served.clear()
+    heavy, light = Caller("a", weight=2), Caller("b")
+    tasks = await run_calls(scheduler, [(heavy, n) for n in range(20)] + [(light, n) for n in range(20)], served)
+    await asyncio.gather(*tasks)
+    assert [name for name, _ in served[:15]].count("a") == 10
+
+
+@pytest.mark.asyncio
+async def test_annulation_dans_la_file():
+    scheduler = FairScheduler()
+    served = []
+    tasks = await run_calls(scheduler, [(Caller("a"), n) for n in range(3)], served, duration=0.01)
+    await asyncio.sleep(0)
+    tasks[1].cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert served == [("a", 0), ("a", 2)]
+    assert not scheduler._busy
+
+
+def test_priorite_batch():
+    assert CALLER.get() == INTERNAL
+    token = CALLER.set(Caller("portail"))
+    with batch_priority():
+        assert CALLER.get() == Caller("portail", "batch")
+    assert CALLER.get() == Caller("portail")
+    CALLER.reset(token)
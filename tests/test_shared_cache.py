@@ -0,0 +1,143 @@
+import asyncio
+import socket
+import socketserver
+import threading
+
+import httpx
+import pytest
+
+from src.cache.cache_manager import CacheManager
+from src.cache.shared import LocalStore, RespClient, encode_command, read_reply
+from src.utils.legifrance_client import LegifranceClient
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Serveur local parlant le protocole Redis (GET, SET [PX] [NX], DEL), adossé à un LocalStore"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.store = LocalStore()
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.url = f"redis://127.0.0.1:{self.server_address[1]}"
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        store = self.server.store
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except ConnectionError:
+                return
+            name, args = command[0].upper(), command[1:]
+            if name == b"GET":
+                value = store.get(args[0].decode())
+                reply = b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            elif name == b"SET":
+                options = [arg.upper() for arg in args[2:]]
+                ttl = int(options[options.index(b"PX") + 1]) / 1000 if b"PX" in options else None
+                written = store.set(args[0].decode(), args[1], ttl=ttl, nx=b"NX" in options)
+                reply = b"+OK\r\n" if written else b"$-1\r\n"
+            elif name == b"DEL":
+                store.delete(args[0].decode())
+                reply = b":1\r\n"
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def resp_server():
+    server = RespStandIn()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_resp(resp_server):
+    client = RespClient(resp_server.url)
+    assert client.get("absente") is None
+    assert client.set("cle", b"\x00valeur\r\n")
+    assert client.get("cle") == b"\x00valeur\r\n"
+    assert not client.set("cle", b"autre", nx=True)
+    assert client.set("verrou", b"1", ttl=0.001, nx=True)
+    with pytest.raises(ConnectionError):
+        client.execute("FLUSHALL")
+    # Une réponse d'erreur ne coupe pas la connexion
+    assert client.available and client.get("cle") == b"\x00valeur\r\n"
+    client.delete("cle")
+    assert client.get("cle") is None
+    assert encode_command("SET", "k", 1) == b"*3\r\n$3\r\nSET\r\n$1\r\nk\r\n$1\r\n1\r\n"
+
+    # Écriture groupée en un seul aller-retour
+    client.set_many([("a", b"1", None), ("b", b"2", 60)])
+    assert client.get("a") == b"1" and client.get("b") == b"2"
+
+    # Magasin injoignable : le cache continue en local seul
+    down = RespClient("redis://127.0.0.1:1", retry_delay=60)
+    cache = CacheManager(shared=down)
+    key = cache.get_key("code", {"search": "bail"})
+    cache.set(key, {"totalResultNumber": 0})
+    assert cache.get(key) == {"totalResultNumber": 0}
+    assert not down.available and down.errors == 1
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_magasin_lent_ne_bloque_pas_la_boucle():
+    # Serveur qui accepte les connexions sans jamais répondre
+    silent = socket.socket()
+    silent.bind(("127.0.0.1", 0))
+    silent.listen()
+    client = RespClient(f"redis://127.0.0.1:{silent.getsockname()[1]}", timeout=0.2, retry_delay=60)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    assert await client.aget("cle") is None
+    task.cancel()
+    # La boucle a continué de tourner pendant l'attente de la réponse
+    assert ticks >= 5
+    assert not client.available and not await client.aset("cle", b"1")
+    client.close()
+    silent.close()
+
+
+@pytest.mark.asyncio
+async def test_workers_partagent_cache_et_token(legifrance_env, upstream_calls, resp_server, monkeypatch):
+    monkeypatch.setenv("LEGIFRANCE_SHARED_CACHE_URL", resp_server.url)
+
+    async def handler(request):
+        upstream_calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        if request.url.path.endswith("/oauth/token"):
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        return httpx.Response(200, json={"results": [{"id": "LEGIARTI000006419280"}], "totalResultNumber": 1})
+
+    # Deux workers : un client chacun, avec son cache mémoire et sa connexion au magasin
+    workers = [
+        LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        for _ in range(2)
+    ]
+    responses = await asyncio.gather(*(worker.rechercher_code({"search": "bail"}) for worker in workers))
+    assert responses[0] == responses[1]
+    assert sorted(upstream_calls) == ["/api/oauth/token", "/lf-engine-app/code"]
+    assert sum(worker.cache.shared_hits for worker in workers) == 1
+    assert [await worker.get_token() for worker in workers] == ["token", "token"]
+    assert sum(worker.token_stats["shared"] for worker in workers) == 1
+
+    # Un troisième worker démarre à froid : tout vient du magasin partagé
+    late = LegifranceClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    assert (await late.rechercher_code({"search": "bail"})) == responses[0]
+    assert await late.get_token() == "token"
+    assert len(upstream_calls) == 2
+    for worker in workers + [late]:
+        await worker.http_client.aclose()
+        await worker.close()
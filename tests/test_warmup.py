@@ -0,0 +1,74 @@
+import json
+import time
+
+import pytest
+
+from src.cache.shared import LocalStore
+from src.cache.warmup import HotQueries, load_queries
+from src.utils.legifrance_client import LegifranceClient
+
+
+def test_recherches_les_plus_demandees():
+    hot = HotQueries(max_entries=4)
+    for hits, search in enumerate(["a", "b", "c", "d"], 1):
+        for _ in range(hits * 2):
+            hot.record(f"code:{search}", "code", {"search": search})
+    assert hot.top(2) == [("code", {"search": "d"}), ("code", {"search": "c"})]
+
+    # Au-delà du plafond, les moins demandées sont oubliées
+    for search in "efg":
+        for _ in range(3):
+            hot.record(f"code:{search}", "code", {"search": search})
+    assert len(hot) <= 5
+    assert ("code", {"search": "a"}) not in hot.top(10)
+
+
+@pytest.mark.asyncio
+async def test_prechauffage_et_enregistrement(legifrance_env, mock_http_client, upstream_calls, tmp_path, monkeypatch):
+    queries_file = tmp_path / "warmup.jsonl"
+    queries_file.write_text(
+        json.dumps({"prefix": "code", "params": {"search": "bail", "code_name": "Code civil"}}) + "\n"
+        + "ligne invalide\n"
+        + json.dumps({"prefix": "jurisprudence", "params": {"search": "bail"}}) + "\n",
+        encoding="utf-8"
+    )
+    state_file = tmp_path / "state.jsonl"
+    monkeypatch.setenv("LEGIFRANCE_WARMUP_FILE", str(queries_file))
+    monkeypatch.setenv("LEGIFRANCE_WARMUP_STATE", str(state_file))
+    monkeypatch.setenv("LEGIFRANCE_WARMUP_RATE", "0")
+    client = LegifranceClient(http_client=mock_http_client)
+
+    client.warmer.start()
+    assert await client.warmer.wait_warmed(5)
+    searches = [call for call in upstream_calls if not call.url.path.endswith("/oauth/token")]
+    assert len(searches) == 2
+
+    # Les entrées fraîches ne sont pas redemandées ; les recherches servies sont comptées
+    assert await client.warmer.warm(client.warmer.queries()) == 0
+    await client.rechercher_code({"search": "BAIL ", "code_name": "Code civil"})
+    assert len([call for call in upstream_calls if not call.url.path.endswith("/oauth/token")]) == 2
+
+    await client.close()
+    assert load_queries(str(state_file)) == [("code", {"search": "BAIL ", "code_name": "Code civil"})]
+    assert client.warmer.get_stats()["failures"] == 0
+    await mock_http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rafraichissement_anticipe_avec_magasin_partage(legifrance_env, mock_http_client, upstream_calls, monkeypatch):
+    client = LegifranceClient(http_client=mock_http_client)
+    client.cache.shared = LocalStore()
+    query = ("code", {"search": "bail"})
+    await client.rechercher(*query)
+    assert await client.warmer.warm([query]) == 0
+
+    # Aux 8/10 du délai souple, l'entrée encore fraîche dans le magasin est redemandée à Légifrance
+    soft_ttl = client.cache.get_ttl(client.cache.get_key(*query))[0]
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + soft_ttl * 0.85)
+    assert await client.warmer.warm([query]) == 1
+    searches = [call for call in upstream_calls if not call.url.path.endswith("/oauth/token")]
+    assert len(searches) == 2
+    assert await client.warmer.warm([query]) == 0
+    await client.close()
+    await mock_http_client.aclose()